@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+
+from application.config.settings import settings
+from infrastructure.database.repositories.stock_price_repository import (
+    StockPriceRepository,
+)
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _cache_control(end: datetime | None, last_ingested: datetime) -> str:
+    """
+    Ranges closing before the last ingested day are history and won't move.
+
+    Every route needs a Bearer token, so only the client may store the
+    response, never a shared cache.
+    """
+
+    last_day = datetime.combine(
+        _utc(last_ingested).date(),
+        time.min,
+        tzinfo=timezone.utc,
+    )
+    if end is not None and _utc(end) < last_day:
+        max_age = settings.http_historical_max_age_seconds
+        return f"private, max-age={max_age}, immutable"
+    return f"private, max-age={settings.http_live_max_age_seconds}"
+
+
+def _etag(request: Request, freshness) -> str:
+    fingerprint = repr(
+        (
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            request.headers.get("accept", ""),
+            tuple(freshness),
+        )
+    )
+    digest = hashlib.blake2b(fingerprint.encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def _not_modified(
+    request: Request,
+    etag: str,
+    last_modified: datetime | None,
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        weak = {tag.removeprefix("W/") for tag in candidates}
+        return "*" in candidates or etag in weak
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+    return False
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    stock_price_repository: StockPriceRepository,
+    tickers: list[str],
+    end: datetime | None = None,
+) -> Response | None:
+    """
+    Validate a ticker range read against the client's cached copy.
+
+    Sets ETag, Last-Modified, Cache-Control and Vary on `response` and
+    returns a bodiless 304 when the client already holds the current
+    representation, before any row is read. Returns None otherwise.
+
+    Validators follow the tickers' write versions, so any write to the
+    tickers changes them, inside the requested range or not.
+    """
+
+    freshness = await stock_price_repository.get_freshness(tickers)
+    if freshness.version is None:
+        return None
+
+    etag = _etag(request, freshness)
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept"
+    response.headers["Cache-Control"] = _cache_control(
+        end,
+        freshness.last_ingested,
+    )
+    if freshness.last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(
+            _utc(freshness.last_modified),
+            usegmt=True,
+        )
+
+    if _not_modified(request, etag, freshness.last_modified):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=dict(response.headers),
+        )
+    return None
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
+import math
+from fastapi import Request, Response
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import declarative_base
 
+from application.config.settings import settings
 from infrastructure.database.connection import async_session_maker
+from infrastructure.database.replicas import WRITE_LSN_QUERY, replica_pool
 
 
 Base = declarative_base()
 
+# Set on responses to writes; holds the primary's WAL position, in bytes,
+# after the client's last write.
+LAST_WRITE_COOKIE = "last_write"
+
 
 async def async_get_db():
     _session_maker = async_session_maker()
@@ -16,3 +28,86 @@ async def async_get_db():
         except Exception as e:
             await db.rollback()
             raise e
+
+
+def _last_write(request: Request) -> int | None:
+    if not settings.replica_read_your_writes:
+        return None
+    try:
+        return int(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+async def read_session_maker(request: Request):
+    """
+    Session maker for the reads of `request`: a healthy replica that has
+    caught up with the client's last write, otherwise the primary
+    """
+
+    pool = replica_pool()
+    if pool.replicas:
+        replica = await pool.pick(written_lsn=_last_write(request))
+        if replica is not None:
+            return replica
+    return async_session_maker()
+
+
+async def async_get_read_db(request: Request):
+    """
+    Read-only session for GET routes, served by a replica when possible.
+
+    Never use it to write: replicas reject writes, and the primary fallback
+    would make such a route work only while every replica is down.
+    """
+
+    _session_maker = await read_session_maker(request)
+    async with _session_maker() as db:
+        try:
+            yield db
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica_pool().mark_down(_session_maker)
+            await db.rollback()
+            raise e
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+
+async def remember_write(response: Response, db: AsyncSession) -> None:
+    """
+    Route the client's reads to the primary until replicas have replayed
+    the write.
+
+    Call with the primary session once the write is committed.
+    """
+
+    if settings.replica_read_your_writes and replica_pool().replicas:
+        written = await db.scalar(WRITE_LSN_QUERY)
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(int(written)),
+            max_age=math.ceil(settings.replica_max_lag_seconds),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+@asynccontextmanager
+async def async_db_session(request: Request | None = None):
+    """
+    Session owned by the caller rather than by the request.
+
+    Streaming responses iterate after dependencies with yield have already
+    been torn down, so they open and close their own session with this.
+    Given the request being served, it reads from the same place as
+    `async_get_read_db` would.
+    """
+
+    if request is None:
+        _session_maker = async_session_maker()
+    else:
+        _session_maker = await read_session_maker(request)
+    async with _session_maker() as db:
+        yield db
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+import base64
+from collections.abc import Sequence
+from datetime import datetime
+from fastapi import HTTPException, Query, Request, Response, status
+
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SERIES_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Keyset position on the (ticker, timestamp) key of the last row served
+    """
+
+    ticker: str
+    timestamp: datetime
+
+    def encode(self) -> str:
+        raw = json.dumps([self.ticker, self.timestamp.isoformat()])
+        return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> Cursor:
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            ticker, timestamp = json.loads(base64.urlsafe_b64decode(padded))
+            return cls(
+                ticker=ticker, timestamp=datetime.fromisoformat(timestamp)
+            )
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor",
+            ) from exc
+
+
+def cursor_param(
+    cursor: str | None = Query(
+        None,
+        description="Opaque cursor returned in the previous page's Link header",
+    ),
+) -> Cursor | None:
+    return Cursor.decode(cursor) if cursor else None
+
+
+def paginate(
+    request: Request,
+    response: Response,
+    rows: Sequence,
+    limit: int,
+) -> list:
+    """
+    Trim a `limit + 1` fetch to one page and advertise the next cursor.
+
+    The extra row only tells us another page exists; the cursor points at the
+    last row actually returned so the next query resumes right after it.
+    """
+
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        last = page[-1]
+        token = Cursor(ticker=last.ticker, timestamp=last.timestamp).encode()
+        url = request.url.remove_query_params("skip").include_query_params(
+            cursor=token,
+        )
+        response.headers["X-Next-Cursor"] = token
+        response.headers["Link"] = f'<{url}>; rel="next"'
+    return page
@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from application.api.routers import stock_ingestion, stock_price
+from application.api.routers import metrics, stock_ingestion, stock_price
 from application.config.settings import settings
 
 
@@ -28,6 +28,7 @@ app.add_middleware(
 
 app.include_router(stock_price.router)
 app.include_router(stock_ingestion.router)
+app.include_router(metrics.router)
 
 
 @app.get("/healthcheck", operation_id="health_check")
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import csv
+import io
+import numpy as np
+import orjson
+import struct
+from collections.abc import AsyncIterator, Sequence
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+STREAM_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE)
+COLUMNAR_MEDIA_TYPE = "application/vnd.market-data.columns"
+
+# Columnar layout, all little-endian:
+#   header   magic "MDC1", u16 column count, u32 row count,
+#            u8 ticker length + ticker (utf-8)
+#   columns  per column: u8 name length + name, u8 dtype ("q" int64 or
+#            "d" float64); then every column body back to back, row count
+#            values each, in the order the columns were described.
+COLUMNAR_MAGIC = b"MDC1"
+_COLUMNAR_HEADER = struct.Struct("<4sHI")
+_COLUMNAR_DTYPES = {"q": np.dtype("<i8"), "d": np.dtype("<f8")}
+
+PRICE_FIELDS = (
+    "id",
+    "ticker",
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+)
+
+
+def negotiate(request: Request, offered: Sequence[str]) -> str | None:
+    """
+    Pick the first offered media type named in the Accept header.
+
+    Returns None when the client did not ask for any of them, in which case
+    the route falls back to its regular JSON body.
+    """
+
+    accept = request.headers.get("accept", "")
+    requested = {part.split(";")[0].strip() for part in accept.split(",")}
+    for media_type in offered:
+        if media_type in requested:
+            return media_type
+    return None
+
+
+def _price_values(row) -> tuple:
+    return (
+        str(row.id),
+        row.ticker,
+        row.timestamp.isoformat(),
+        row.open,
+        row.high,
+        row.low,
+        row.close,
+        row.volume,
+    )
+
+
+def _price_object(row) -> dict:
+    return {
+        "id": row.id,
+        "ticker": row.ticker,
+        "timestamp": row.timestamp,
+        "open": row.open,
+        "high": row.high,
+        "low": row.low,
+        "close": row.close,
+        "volume": row.volume,
+    }
+
+
+def _dumps(value) -> bytes:
+    # OPT_UTC_Z keeps "Z" suffixes identical to what Pydantic emits.
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+
+
+def _bar_object(row) -> dict:
+    return {
+        "ticker": row.ticker,
+        "timestamp": row.timestamp,
+        "open": row.open,
+        "high": row.high,
+        "low": row.low,
+        "close": row.close,
+        "volume": row.volume,
+    }
+
+
+def json_bars(rows: Sequence, headers=None) -> Response:
+    """
+    Like `json_prices` for bars that carry no id
+    """
+
+    return Response(
+        _dumps([_bar_object(row) for row in rows]),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def json_prices(rows: Sequence, headers=None) -> Response:
+    """
+    Serialize price rows straight to a JSON array.
+
+    Rows are trusted database values, so this skips the per-row validation
+    `response_model` would run while producing the same document.
+    """
+
+    return Response(
+        _dumps([_price_object(row) for row in rows]),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def json_price_groups(
+    tickers: Sequence[str],
+    rows: Sequence,
+    headers=None,
+) -> Response:
+    """
+    Serialize ticker-ordered price rows as {ticker: [price, ...]}.
+
+    Every requested ticker gets a key, empty when nothing matched.
+    """
+
+    groups = {ticker: [] for ticker in tickers}
+    for row in rows:
+        groups.setdefault(row.ticker, []).append(_price_object(row))
+    return Response(
+        _dumps(groups),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def json_columns(
+    ticker: str,
+    columns: dict[str, np.ndarray],
+    headers=None,
+) -> Response:
+    """
+    Serialize NumPy columns as {"ticker": ..., column: [values, ...]}.
+
+    The epoch microsecond timestamp column is rendered as ISO 8601 and NaN
+    as null.
+    """
+
+    body = dict(columns)
+    body["timestamp"] = columns["timestamp"].astype("datetime64[us]")
+    return Response(
+        orjson.dumps(
+            {"ticker": ticker, **body},
+            option=orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_NAIVE_UTC
+            | orjson.OPT_UTC_Z,
+        ),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def _encode_ndjson(chunks: AsyncIterator[Sequence]):
+    async for chunk in chunks:
+        yield b"".join(_dumps(_price_object(row)) + b"\n" for row in chunk)
+
+
+async def _encode_csv(chunks: AsyncIterator[Sequence]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(PRICE_FIELDS)
+    async for chunk in chunks:
+        writer.writerows(_price_values(row) for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def stream_prices(
+    media_type: str,
+    chunks: AsyncIterator[Sequence],
+    headers=None,
+) -> StreamingResponse:
+    """
+    Encode price row chunks as NDJSON or CSV while they are fetched
+    """
+
+    if media_type == CSV_MEDIA_TYPE:
+        body = _encode_csv(chunks)
+    else:
+        body = _encode_ndjson(chunks)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def columnar_prices(
+    ticker: str,
+    columns: dict[str, np.ndarray],
+    headers=None,
+) -> Response:
+    """
+    Pack equally sized NumPy columns into the columnar layout above
+    """
+
+    rows = len(next(iter(columns.values()))) if columns else 0
+    name = ticker.encode()
+    parts = [
+        _COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, len(columns), rows),
+        struct.pack("<B", len(name)),
+        name,
+    ]
+    bodies = []
+    for column, values in columns.items():
+        code = "q" if np.issubdtype(values.dtype, np.integer) else "d"
+        label = column.encode()
+        parts += [struct.pack("<B", len(label)), label, code.encode()]
+        bodies.append(values.astype(_COLUMNAR_DTYPES[code], copy=False))
+    parts += [body.tobytes() for body in bodies]
+    return Response(
+        b"".join(parts),
+        media_type=COLUMNAR_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def read_columnar(payload: bytes) -> tuple[str, dict[str, np.ndarray]]:
+    """
+    Decode a columnar body back into (ticker, columns) without copying
+    """
+
+    magic, count, rows = _COLUMNAR_HEADER.unpack_from(payload)
+    if magic != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar market data payload")
+    offset = _COLUMNAR_HEADER.size
+    length = payload[offset]
+    ticker = payload[offset + 1 : offset + 1 + length].decode()
+    offset += 1 + length
+
+    layout = []
+    for _ in range(count):
+        length = payload[offset]
+        column = payload[offset + 1 : offset + 1 + length].decode()
+        code = chr(payload[offset + 1 + length])
+        layout.append((column, _COLUMNAR_DTYPES[code]))
+        offset += 2 + length
+
+    columns = {}
+    for column, dtype in layout:
+        columns[column] = np.frombuffer(
+            payload, dtype=dtype, count=rows, offset=offset
+        )
+        offset += rows * dtype.itemsize
+    return ticker, columns
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, status
+
+from application.api.dependencies.middleware import token_auth_middleware
+from domain.indicators.engine import indicator_engine
+from infrastructure.cache.memory import price_cache
+from infrastructure.cache.shared import shared_cache_snapshot
+from infrastructure.cache.snapshot import latest_quotes
+from infrastructure.database.pool_metrics import pool_snapshot
+from infrastructure.database.replicas import replica_pool
+
+
+router = APIRouter(
+    prefix="/api/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(token_auth_middleware)],
+)
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_metrics() -> dict:
+    """Hit, miss and eviction counters of the read caches"""
+
+    return {
+        "memory": price_cache.snapshot(),
+        "shared": shared_cache_snapshot(),
+        "latest": latest_quotes.snapshot(),
+        "indicators": indicator_engine.snapshot(),
+    }
+
+
+@router.get("/replicas", status_code=status.HTTP_200_OK)
+async def replica_metrics() -> dict:
+    """Health, lag and routing counters of the read replicas"""
+
+    return replica_pool().snapshot()
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+async def pool_metrics() -> dict:
+    """Connection pool occupancy, checkout waits and statement cache use"""
+
+    return pool_snapshot()
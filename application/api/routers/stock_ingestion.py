@@ -6,14 +6,28 @@ from fastapi import (
     BackgroundTasks,
     Depends,
     File,
+    Form,
     HTTPException,
+    Query,
     UploadFile,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from uuid import UUID
 
+from application.api.dependencies.db import async_get_db
 from application.api.dependencies.middleware import token_auth_middleware
-from application.celery.tasks import process_stocks_data_task
+from application.api.schemas.ingestion_job import (
+    DEFAULT_JOBS_PAGE_SIZE,
+    MAX_JOBS_PAGE_SIZE,
+    IngestionJob,
+)
+from application.celery.tasks import process_stocks_data_file_task
 from domain.stock_data.stock_data_ingestion import BatchDataProcessor
+from infrastructure.database.repositories.ingestion_job_repository import (
+    IngestionJobRepository,
+)
+from infrastructure.storage.spool import spool_upload
 from load_symbols import load_symbols
 
 
@@ -30,30 +44,77 @@ SYMBOLS: list[str] = cfg.get("symbols", ["AAPL", "MSFT"])
 
 
 @router.post("/ingestion", status_code=status.HTTP_200_OK)
-async def ingest_stock_data(background_tasks: BackgroundTasks):
+async def ingest_stock_data(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(async_get_db),
+):
     processor = BatchDataProcessor()
+    job = await IngestionJobRepository(db).create_job(
+        "api", "twelvedata", len(set(SYMBOLS))
+    )
 
     async def run():
         log.info("Starting on-demand ETL via API")
-        await processor.run_batch(SYMBOLS)
+        await processor.run_batch(SYMBOLS, job.id)
         log.info("Finished on-demand ETL via API")
 
     background_tasks.add_task(run)
-    return {"message": "ETL process started in background"}
+    return {
+        "message": "ETL process started in background",
+        "job_id": str(job.id),
+    }
+
+
+# Job routes read from the primary: replicas may lag behind the progress
+# the workers keep writing.
+@router.get("/ingestion/jobs", response_model=list[IngestionJob])
+async def list_ingestion_jobs(
+    state: str | None = Query(
+        None,
+        alias="status",
+        description="queued, running, succeeded or failed",
+    ),
+    limit: int = Query(DEFAULT_JOBS_PAGE_SIZE, ge=1, le=MAX_JOBS_PAGE_SIZE),
+    db: AsyncSession = Depends(async_get_db),
+):
+    return await IngestionJobRepository(db).list_jobs(limit, state)
+
+
+@router.get("/ingestion/jobs/{job_id}", response_model=IngestionJob)
+async def get_ingestion_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(async_get_db),
+):
+    return await IngestionJobRepository(db).get_job(job_id)
 
 
 @router.post("/stocks-data", status_code=status.HTTP_202_ACCEPTED)
-async def ingest_stocks_data_file(file: UploadFile = File(...)):
+async def ingest_stocks_data_file(
+    file: UploadFile = File(...),
+    sha256: str | None = Form(
+        None,
+        description="Hex SHA-256 of the file, checked once uploaded",
+    ),
+    db: AsyncSession = Depends(async_get_db),
+):
     if not file.filename.endswith(".csv"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid file type: please upload a CSV file.",
         )
 
-    raw = await file.read()
-    csv_string = raw.decode("utf-8")
-
-    # Enqueue background job
-    process_stocks_data_task.delay(csv_string)
+    # Stream to the spool shared with the workers; only a reference to the
+    # file goes through the broker.
+    spooled = await spool_upload(file, suffix=".csv", expected_sha256=sha256)
+    job = await IngestionJobRepository(db).create_job(
+        "csv", spooled.filename, spooled.size
+    )
+    process_stocks_data_file_task.delay(spooled.to_message(), str(job.id))
 
-    return {"message": "Processing enqueued"}
+    return {
+        "message": "Processing enqueued",
+        "job_id": str(job.id),
+        "file": spooled.name,
+        "size": spooled.size,
+        "sha256": spooled.sha256,
+    }
@@ -1,18 +1,61 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from datetime import datetime, timedelta
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 from uuid import UUID
 
-from application.api.dependencies.db import async_get_db
+from application.api.conditional import conditional_get
+from application.api.dependencies.db import (
+    async_db_session,
+    async_get_db,
+    async_get_read_db,
+    remember_write,
+)
 from application.api.dependencies.middleware import token_auth_middleware
+from application.api.dependencies.pagination import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_SERIES_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Cursor,
+    cursor_param,
+    paginate,
+)
+from application.api.responses import (
+    COLUMNAR_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    STREAM_MEDIA_TYPES,
+    columnar_prices,
+    json_bars,
+    json_columns,
+    json_price_groups,
+    json_prices,
+    negotiate,
+    stream_prices,
+)
 from application.api.schemas.stock_price import (
+    Candle,
+    LatestPrice,
     StockPrice,
+    StockPriceBatchQuery,
     StockPriceCreate,
     StockPriceUpdate,
 )
+from domain.indicators.engine import indicator_engine
+from domain.indicators.indicators import IndicatorSpec
+from domain.stock_data.bulk import validate_bars
+from infrastructure.cache.snapshot import latest_quotes, shared_versions
 from infrastructure.database.repositories.stock_price_repository import (
     StockPriceRepository,
 )
@@ -26,6 +69,102 @@ router = APIRouter(
 
 log = logging.getLogger("stock_price")
 
+CANDLE_INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "30m": timedelta(minutes=30),
+    "1h": timedelta(hours=1),
+    "4h": timedelta(hours=4),
+    "1d": timedelta(days=1),
+}
+MAX_LATEST_TICKERS = 500
+MAX_INDICATORS = 10
+MAX_BULK_BARS = 100_000
+MAX_REPORTED_REJECTIONS = 100
+
+
+def split_tickers(values: list[str] | None) -> list[str] | None:
+    """
+    Accept both ?ticker=A&ticker=B and ?ticker=A,B
+    """
+
+    if not values:
+        return None
+    return sorted(
+        {t.strip() for value in values for t in value.split(",") if t.strip()}
+    )
+
+
+def split_indicators(values: list[str]) -> list[str]:
+    """
+    Accept both ?indicator=a&indicator=b and ?indicator=a,b, keeping the
+    requested order
+    """
+
+    return [
+        name.strip()
+        for value in values
+        for name in value.split(",")
+        if name.strip()
+    ]
+
+
+async def _read_bars(request: Request) -> list:
+    """
+    Records of a JSON array body, or of an NDJSON body with one per line
+    """
+
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            records = [
+                orjson.loads(line)
+                for line in body.splitlines()
+                if line.strip()
+            ]
+        else:
+            records = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed body: {exc}",
+        ) from exc
+
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Expected an array of bars",
+        )
+    if len(records) > MAX_BULK_BARS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_BARS} bars per request",
+        )
+    return records
+
+
+def _stream_response(
+    request: Request,
+    media_type: str,
+    headers=None,
+    **filters,
+):
+    """
+    Stream the matching rows on a session that lives as long as the body
+    """
+
+    async def chunks():
+        async with async_db_session(request) as db:
+            stock_price_repository = StockPriceRepository(db)
+            async for chunk in stock_price_repository.stream_stock_prices(
+                **filters,
+            ):
+                yield chunk
+
+    return stream_prices(media_type, chunks(), headers)
+
 
 @router.get(
     "/search",
@@ -33,15 +172,61 @@ log = logging.getLogger("stock_price")
     status_code=status.HTTP_200_OK,
 )
 async def search_prices(
+    request: Request,
+    response: Response,
     start: datetime | None = Query(None, description="Start of time range"),
     end: datetime | None = Query(None, description="End of time range"),
-    db: AsyncSession = Depends(async_get_db),
+    ticker: list[str] | None = Query(
+        None,
+        description="Ticker symbol(s), repeated or comma separated",
+    ),
+    order: Literal["asc", "desc"] = Query(
+        "asc",
+        description="Timestamp ordering within each ticker",
+    ),
+    limit: int = Query(DEFAULT_SERIES_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Cursor | None = Depends(cursor_param),
+    db: AsyncSession = Depends(async_get_read_db),
 ) -> list[StockPrice]:
+    after = (cursor.ticker, cursor.timestamp) if cursor else None
+    tickers = split_tickers(ticker)
+    descending = order == "desc"
     stock_price_repository = StockPriceRepository(db)
-    return await stock_price_repository.get_stock_prices_by_date_range(
+
+    if tickers:
+        not_modified = await conditional_get(
+            request,
+            response,
+            stock_price_repository,
+            tickers,
+            end=end,
+        )
+        if not_modified:
+            return not_modified
+
+    media_type = negotiate(request, STREAM_MEDIA_TYPES)
+    if media_type:
+        return _stream_response(
+            request,
+            media_type,
+            response.headers,
+            tickers=tickers,
+            start=start,
+            end=end,
+            after=after,
+            descending=descending,
+        )
+
+    prices = await stock_price_repository.get_stock_prices_by_date_range(
         start,
         end,
+        limit=limit + 1,
+        after=after,
+        tickers=tickers,
+        descending=descending,
     )
+    page = paginate(request, response, prices, limit)
+    return json_prices(page, response.headers)
 
 
 @router.get(
@@ -50,12 +235,74 @@ async def search_prices(
     status_code=status.HTTP_200_OK,
 )
 async def read_prices(
-    skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(async_get_db),
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Cursor | None = Depends(cursor_param),
+    db: AsyncSession = Depends(async_get_read_db),
 ) -> list[StockPrice]:
     stock_price_repository = StockPriceRepository(db)
-    return await stock_price_repository.get_stock_prices(skip, limit)
+    prices = await stock_price_repository.get_stock_prices(
+        skip,
+        limit + 1,
+        after=(cursor.ticker, cursor.timestamp) if cursor else None,
+    )
+    page = paginate(request, response, prices, limit)
+    return json_prices(page, response.headers)
+
+
+@router.get(
+    "/latest",
+    response_model=list[LatestPrice],
+    status_code=status.HTTP_200_OK,
+)
+async def read_latest(
+    ticker: list[str] = Query(
+        ...,
+        description="Ticker symbol(s), repeated or comma separated",
+    ),
+    db: AsyncSession = Depends(async_get_read_db),
+) -> list[LatestPrice]:
+    tickers = split_tickers(ticker)
+    if not tickers or len(tickers) > MAX_LATEST_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request between 1 and {MAX_LATEST_TICKERS} tickers",
+        )
+
+    # Read before the bars, so a write racing this request leaves them
+    # tagged with an outdated version rather than passing for current.
+    versions = await shared_versions(tickers)
+    bars, missing = latest_quotes.get_many(tickers, versions)
+    if missing:
+        stock_price_repository = StockPriceRepository(db)
+        fetched = await stock_price_repository.get_latest_prices(missing)
+        latest_quotes.offer(fetched, versions)
+        bars += fetched
+    return json_bars(sorted(bars, key=lambda bar: bar.ticker))
+
+
+@router.post(
+    "/batch",
+    response_model=dict[str, list[StockPrice]],
+    status_code=status.HTTP_200_OK,
+)
+async def read_batch(
+    query: StockPriceBatchQuery,
+    db: AsyncSession = Depends(async_get_read_db),
+) -> dict[str, list[StockPrice]]:
+    tickers = split_tickers(query.tickers) or []
+    stock_price_repository = StockPriceRepository(db)
+    prices = await stock_price_repository.get_stock_prices_batch(
+        tickers,
+        ids=sorted(set(query.ids)),
+        start=query.start,
+        end=query.end,
+        limit=query.limit,
+        descending=query.order == "desc",
+    )
+    return json_price_groups(tickers, prices)
 
 
 @router.get(
@@ -65,7 +312,7 @@ async def read_prices(
 )
 async def read_price_by_id(
     stock_price_id: UUID,
-    db: AsyncSession = Depends(async_get_db),
+    db: AsyncSession = Depends(async_get_read_db),
 ) -> StockPrice:
     stock_price_repository = StockPriceRepository(db)
     return await stock_price_repository.get_stock_price_by_id(stock_price_id)
@@ -77,11 +324,153 @@ async def read_price_by_id(
     status_code=status.HTTP_200_OK,
 )
 async def read_by_ticker(
+    request: Request,
+    response: Response,
     ticker: str,
-    db: AsyncSession = Depends(async_get_db),
+    limit: int = Query(DEFAULT_SERIES_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Cursor | None = Depends(cursor_param),
+    db: AsyncSession = Depends(async_get_read_db),
 ) -> list[StockPrice]:
+    if cursor and cursor.ticker != ticker:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not belong to this ticker",
+        )
+
     stock_price_repository = StockPriceRepository(db)
-    return await stock_price_repository.get_stock_prices_by_ticker(ticker)
+    not_modified = await conditional_get(
+        request,
+        response,
+        stock_price_repository,
+        [ticker],
+    )
+    if not_modified:
+        return not_modified
+
+    media_type = negotiate(
+        request,
+        (COLUMNAR_MEDIA_TYPE, *STREAM_MEDIA_TYPES),
+    )
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        columns = await stock_price_repository.get_stock_price_columns(
+            ticker,
+            after=cursor.timestamp if cursor else None,
+        )
+        return columnar_prices(ticker, columns, response.headers)
+    if media_type:
+        return _stream_response(
+            request,
+            media_type,
+            response.headers,
+            tickers=[ticker],
+            after=(ticker, cursor.timestamp) if cursor else None,
+        )
+
+    prices = await stock_price_repository.get_stock_prices_by_ticker(
+        ticker,
+        limit=limit + 1,
+        after=cursor.timestamp if cursor else None,
+    )
+    page = paginate(request, response, prices, limit)
+    return json_prices(page, response.headers)
+
+
+@router.get(
+    "/ticker/{ticker}/candles",
+    response_model=list[Candle],
+    status_code=status.HTTP_200_OK,
+)
+async def read_candles(
+    request: Request,
+    response: Response,
+    ticker: str,
+    interval: Literal["1m", "5m", "15m", "30m", "1h", "4h", "1d"] = Query(
+        "1h",
+        description="Candle width",
+    ),
+    start: datetime | None = Query(None, description="Start of time range"),
+    end: datetime | None = Query(None, description="End of time range"),
+    db: AsyncSession = Depends(async_get_read_db),
+) -> list[Candle]:
+    stock_price_repository = StockPriceRepository(db)
+    not_modified = await conditional_get(
+        request,
+        response,
+        stock_price_repository,
+        [ticker],
+        end=end,
+    )
+    if not_modified:
+        return not_modified
+
+    return await stock_price_repository.get_candles(
+        ticker,
+        CANDLE_INTERVALS[interval],
+        start,
+        end,
+    )
+
+
+@router.get(
+    "/ticker/{ticker}/indicators",
+    status_code=status.HTTP_200_OK,
+)
+async def read_indicators(
+    request: Request,
+    response: Response,
+    ticker: str,
+    indicator: list[str] = Query(
+        ...,
+        description=(
+            "sma, ema, rsi or bollinger with an optional :period, or vwap; "
+            "repeated or comma separated"
+        ),
+    ),
+    start: datetime | None = Query(None, description="Start of time range"),
+    end: datetime | None = Query(None, description="End of time range"),
+    db: AsyncSession = Depends(async_get_read_db),
+) -> dict:
+    try:
+        # Repeats of the same indicator, however spelled, come out once.
+        specs = list(
+            dict.fromkeys(
+                IndicatorSpec.parse(name)
+                for name in split_indicators(indicator)
+            )
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    if len(specs) > MAX_INDICATORS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_INDICATORS} indicators per request",
+        )
+
+    stock_price_repository = StockPriceRepository(db)
+    # Indicators depend on every bar before `end`, not just the window.
+    not_modified = await conditional_get(
+        request,
+        response,
+        stock_price_repository,
+        [ticker],
+        end=end,
+    )
+    if not_modified:
+        return not_modified
+
+    columns = await indicator_engine.compute(
+        stock_price_repository,
+        ticker,
+        specs,
+        start,
+        end,
+    )
+    if negotiate(request, (COLUMNAR_MEDIA_TYPE,)):
+        return columnar_prices(ticker, columns, response.headers)
+    return json_columns(ticker, columns, response.headers)
 
 
 @router.post(
@@ -91,10 +480,47 @@ async def read_by_ticker(
 )
 async def create_price(
     stock_price: StockPriceCreate,
+    response: Response,
     db: AsyncSession = Depends(async_get_db),
 ):
     stock_price_repository = StockPriceRepository(db)
-    return await stock_price_repository.create_stock_price(stock_price)
+    price = await stock_price_repository.create_stock_price(stock_price)
+    await remember_write(response, db)
+    return price
+
+
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_write_prices(
+    request: Request,
+    response: Response,
+    return_ids: bool = Query(
+        False,
+        description="Include the ids of the written bars, in write order",
+    ),
+    db: AsyncSession = Depends(async_get_db),
+) -> dict:
+    """
+    Insert or overwrite many bars, sent as a JSON array or as NDJSON.
+
+    Invalid bars are skipped and reported by position; the others are
+    written in one transaction.
+    """
+
+    bars, rejected = validate_bars(await _read_bars(request))
+    stock_price_repository = StockPriceRepository(db)
+    result = await stock_price_repository.upsert_stock_prices(bars)
+    if bars:
+        await remember_write(response, db)
+
+    summary = {
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "rejected": len(rejected),
+        "rejections": rejected[:MAX_REPORTED_REJECTIONS],
+    }
+    if return_ids:
+        summary["ids"] = result.ids
+    return summary
 
 
 @router.put(
@@ -105,6 +531,7 @@ async def create_price(
 async def update_stock_price(
     stock_price_id: UUID,
     payload: StockPriceUpdate,
+    response: Response,
     db: AsyncSession = Depends(async_get_db),
 ) -> StockPrice:
     stock_price_repository = StockPriceRepository(db)
@@ -116,15 +543,18 @@ async def update_stock_price(
             detail="No update fields provided",
         )
 
-    return await stock_price_repository.update_stock_price(
+    price = await stock_price_repository.update_stock_price(
         stock_price_id,
         stock_price_payload,
     )
+    await remember_write(response, db)
+    return price
 
 
 @router.delete("/{stock_price_id}", status_code=status.HTTP_200_OK)
 async def delete_price(
     stock_price_id: UUID,
+    response: Response,
     db: AsyncSession = Depends(async_get_db),
 ) -> dict:
     stock_price_repository = StockPriceRepository(db)
@@ -133,4 +563,5 @@ async def delete_price(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
+    await remember_write(response, db)
     return {"message": "Stock data deleted successfully"}
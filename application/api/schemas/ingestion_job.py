@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+MAX_JOBS_PAGE_SIZE = 100
+DEFAULT_JOBS_PAGE_SIZE = 20
+
+
+class IngestionJob(BaseModel):
+    id: uuid.UUID
+    kind: str
+    source: str | None
+    status: str
+    total: int
+    processed: int
+    parts_total: int
+    parts_done: int
+    parts_failed: int
+    rows: int
+    rows_parsed: int
+    rows_inserted: int
+    rows_updated: int
+    rows_rejected: int
+    error: str | None
+    created: datetime | None
+    started: datetime | None
+    finished: datetime | None
+    percent: float = Field(0.0, description="Share of `total` processed")
+    duration_seconds: float = 0.0
+    rows_per_second: int = 0
+    eta_seconds: float | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def with_progress(cls, data, handler):
+        """
+        Fill in the derived progress fields when built from a job record
+        """
+
+        job = handler(data)
+        if hasattr(data, "progress"):
+            for name, value in data.progress().items():
+                setattr(job, name, value)
+        return job
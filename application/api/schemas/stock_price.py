@@ -2,7 +2,23 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
+from typing import Literal
+
+from application.api.dependencies.pagination import (
+    DEFAULT_SERIES_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+)
+
+
+MAX_BATCH_TICKERS = 100
+MAX_BATCH_IDS = 1000
 
 
 class StockPrice(BaseModel):
@@ -18,6 +34,47 @@ class StockPrice(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class Candle(BaseModel):
+    ticker: str
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LatestPrice(BaseModel):
+    ticker: str
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class StockPriceBatchQuery(BaseModel):
+    tickers: list[str] = Field(
+        default_factory=list, max_length=MAX_BATCH_TICKERS
+    )
+    ids: list[uuid.UUID] = Field(
+        default_factory=list, max_length=MAX_BATCH_IDS
+    )
+    start: datetime | None = None
+    end: datetime | None = None
+    limit: int = Field(DEFAULT_SERIES_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    order: Literal["asc", "desc"] = "asc"
+
+    @model_validator(mode="after")
+    def not_empty(self):
+        if not self.tickers and not self.ids:
+            raise ValueError("tickers or ids must be given")
+        return self
+
+
 class StockPriceUpdate(BaseModel):
     ticker: str | None = None
     timestamp: datetime | None = None
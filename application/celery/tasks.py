@@ -1,50 +1,126 @@
-import asyncio
 import io
+import logging
 import pandas as pd
-from sqlalchemy.dialects.postgresql import insert
+import time
+from celery import chord
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from uuid import UUID
 
 from application.api.dependencies.db import async_get_db
 from application.celery.main import celery
-from infrastructure.database.models.stock_price import StockPrice
+from application.celery.worker import run_async
+from application.config.settings import settings
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.database.copy_loader import copy_prices
+from infrastructure.database.models.ingestion_job import IngestionJob
+from infrastructure.database.repositories.ingestion_job_repository import (
+    update_job,
+)
+from infrastructure.storage.spool import SpooledFile, file_sha256
 
 
-async def _load_dataframe_async(df: pd.DataFrame):
+log = logging.getLogger("celery.tasks")
+
+CSV_COLUMNS = {
+    "symbol": "ticker",
+    "datetime": "timestamp",
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "volume": "volume",
+}
+# Rows missing any of these are rejected.
+REQUIRED_COLUMNS = ["ticker", "timestamp", "close"]
+CSV_DTYPES = {
+    "symbol": "string",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+}
+
+
+def _read_prices_csv(source) -> Iterator[pd.DataFrame]:
     """
-    Asynchronously load a DataFrame into the database
+    Parse a Twelve Data style CSV (path or buffer) into price columns,
+    CSV_CHUNK_ROWS rows at a time
     """
 
-    table = StockPrice.__table__
+    chunks = pd.read_csv(
+        source,
+        usecols=list(CSV_COLUMNS),
+        dtype=CSV_DTYPES,
+        parse_dates=["datetime"],
+        engine="c",
+        chunksize=settings.csv_chunk_rows,
+    )
+    for chunk in chunks:
+        yield chunk.rename(columns=CSV_COLUMNS)
+
+
+def _copy_rows(df: pd.DataFrame):
+    """
+    COPY rows of a parsed chunk, converted a column at a time
+    """
+
+    prices = df[["open", "high", "low", "close"]].round(2)
+    return zip(
+        df["ticker"],
+        df["timestamp"].dt.to_pydatetime(),
+        prices["open"],
+        prices["high"],
+        prices["low"],
+        prices["close"],
+        df["volume"],
+    )
+
 
+async def _load_csv_async(
+    chunks: Iterator[pd.DataFrame],
+    on_chunk: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Asynchronously load CSV chunks into the database, one transaction each.
+    Rows missing REQUIRED_COLUMNS are counted as rejected and skipped.
+    """
+
+    started = time.perf_counter()
+    totals = dict.fromkeys(IngestionJob.COUNTS, 0) | {"chunks": 0}
     async for session in async_get_db():
-        records = []
-        for row in df.itertuples(index=False):
-            records.append(
-                {
-                    "ticker": row.ticker,
-                    "timestamp": row.timestamp.to_pydatetime(),
-                    "open": round(float(row.open), 2),
-                    "high": round(float(row.high), 2),
-                    "low": round(float(row.low), 2),
-                    "close": round(float(row.close), 2),
-                    "volume": float(row.volume),
-                }
-            )
-        stmt = (
-            insert(table)
-            .values(records)
-            .on_conflict_do_update(
-                index_elements=["ticker", "timestamp"],
-                set_={
-                    "open": insert(table).excluded.open,
-                    "high": insert(table).excluded.high,
-                    "low": insert(table).excluded.low,
-                    "close": insert(table).excluded.close,
-                    "volume": insert(table).excluded.volume,
-                },
-            )
-        )
-        await session.execute(stmt)
-        await session.commit()
+        for parsed in chunks:
+            df = parsed.dropna(subset=REQUIRED_COLUMNS)
+            result = await copy_prices(session, _copy_rows(df))
+            await session.commit()
+            await invalidate_tickers(result.tickers)
+
+            totals["rows"] += result.rows
+            totals["rows_parsed"] += len(parsed)
+            totals["rows_rejected"] += len(parsed) - len(df)
+            totals["rows_inserted"] += result.inserted
+            totals["rows_updated"] += result.updated
+            totals["chunks"] += 1
+            progress = {
+                **totals,
+                "chunk_rows": result.rows,
+                "chunk_rows_per_second": round(result.rows_per_second),
+            }
+            log.info("Loaded CSV chunk %s", progress)
+            if on_chunk is not None:
+                on_chunk(progress)
+
+    seconds = time.perf_counter() - started
+    return {
+        **totals,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(totals["rows"] / seconds) if seconds else 0,
+    }
+
+
+def _report_progress(task) -> Callable[[dict], None]:
+    return lambda progress: task.update_state(state="PROGRESS", meta=progress)
 
 
 @celery.task(bind=True, max_retries=3, name="process_stocks_data_csv")
@@ -52,21 +128,166 @@ def process_stocks_data_task(self, csv_data: str):
     """
     Celery task to parse a CSV string and load rows into a database.
     Retries up to 3 times on failure, with a 60-second backoff.
+
+    Kept for messages enqueued before uploads were spooled, see
+    `process_stocks_data_file_task`.
     """
     try:
-        df = pd.read_csv(io.StringIO(csv_data), parse_dates=["datetime"])
-        df = df.rename(
-            columns={
-                "symbol": "ticker",
-                "datetime": "timestamp",
-                "open": "open",
-                "high": "high",
-                "low": "low",
-                "close": "close",
-                "volume": "volume",
-            }
-        ).dropna(subset=["ticker", "timestamp", "close"])
-
-        asyncio.run(_load_dataframe_async(df))
+        chunks = _read_prices_csv(io.StringIO(csv_data))
+        return run_async(_load_csv_async(chunks, _report_progress(self)))
     except Exception as exc:
         raise self.retry(exc=exc, countdown=60)
+
+
+def split_offsets(path: Path, part_bytes: int) -> list[tuple[int, int]]:
+    """
+    Byte ranges of about `part_bytes` covering the rows of a CSV file.
+
+    Ranges start after the header and end on line boundaries, so each one
+    parses on its own once the header is put in front of it.
+    """
+
+    parts = []
+    with path.open("rb") as handle:
+        handle.readline()
+        start = handle.tell()
+        size = path.stat().st_size
+        while start < size:
+            handle.seek(min(start + part_bytes, size))
+            handle.readline()
+            end = handle.tell()
+            parts.append((start, end))
+            start = end
+    return parts
+
+
+def _read_part(path: Path, start: int, end: int) -> io.BytesIO:
+    """
+    The header and the rows between `start` and `end` of a CSV file
+    """
+
+    with path.open("rb") as handle:
+        header = handle.readline()
+        handle.seek(start)
+        return io.BytesIO(header + handle.read(end - start))
+
+
+@celery.task(bind=True, max_retries=3, name="load_stocks_data_part")
+def load_stocks_data_part_task(
+    self, spooled: dict, job_id: str, start: int, end: int
+):
+    """
+    Celery task to load one byte range of a spooled CSV upload.
+    Retries up to 3 times on failure, with a 60-second backoff.
+
+    Chunks are upserted, so a retry reloads the whole part without
+    duplicating rows. The job totals only move once the part is over,
+    and a part that keeps failing is recorded rather than raised so the
+    chord still finishes the job.
+    """
+
+    spooled = SpooledFile.from_message(spooled)
+    try:
+        chunks = _read_prices_csv(_read_part(spooled.path, start, end))
+        result = run_async(_load_csv_async(chunks, _report_progress(self)))
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=60)
+        error = str(exc)
+        log.error("Part %d-%d of %s failed: %s", start, end, job_id, error)
+        run_async(
+            update_job(
+                lambda jobs: jobs.record_part(
+                    UUID(job_id), end - start, error=error
+                )
+            )
+        )
+        return {"rows": 0, "failed": True, "error": error}
+
+    run_async(
+        update_job(
+            lambda jobs: jobs.record_part(UUID(job_id), end - start, result)
+        )
+    )
+    return result
+
+
+@celery.task(name="finish_ingestion_job")
+def finish_ingestion_job_task(results: list[dict], job_id: str, spooled: dict):
+    """
+    Chord callback closing a fanned-out job once every part has finished
+    """
+
+    run_async(update_job(lambda jobs: jobs.finish_job(UUID(job_id))))
+    SpooledFile.from_message(spooled).path.unlink(missing_ok=True)
+    return {
+        "job_id": job_id,
+        "rows": sum(result["rows"] for result in results),
+        "parts": len(results),
+        "parts_failed": sum(bool(result.get("failed")) for result in results),
+    }
+
+
+@celery.task(bind=True, max_retries=3, name="process_stocks_data_file")
+def process_stocks_data_file_task(
+    self, spooled: dict, job_id: str | None = None
+):
+    """
+    Celery task to fan a CSV upload from the shared spool directory out
+    to the workers, INGESTION_PART_BYTES at a time.
+    Retries up to 3 times on failure, with a 60-second backoff.
+
+    Parts are loaded by `load_stocks_data_part_task` in a chord whose
+    callback closes the ingestion job and deletes the file. The file is
+    also deleted once the last retry here has failed.
+    """
+
+    message = spooled
+    spooled = SpooledFile.from_message(spooled)
+    try:
+        if job_id is None:
+            job = run_async(
+                update_job(
+                    lambda jobs: jobs.create_job(
+                        "csv", spooled.filename, spooled.size
+                    )
+                )
+            )
+            job_id = str(job.id)
+        if file_sha256(spooled.path) != spooled.sha256:
+            raise ValueError(f"{spooled.name} does not match its checksum")
+
+        parts = split_offsets(spooled.path, settings.ingestion_part_bytes)
+        run_async(
+            update_job(
+                lambda jobs: jobs.start_job(
+                    UUID(job_id), spooled.size, len(parts)
+                )
+            )
+        )
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            spooled.path.unlink(missing_ok=True)
+            if job_id is not None:
+                error = str(exc)
+                run_async(
+                    update_job(lambda jobs: jobs.fail_job(UUID(job_id), error))
+                )
+        raise self.retry(
+            exc=exc,
+            countdown=60,
+            kwargs={"spooled": message, "job_id": job_id},
+        )
+
+    finish = finish_ingestion_job_task.s(job_id, message)
+    if not parts:
+        finish.delay([])
+    else:
+        chord(
+            load_stocks_data_part_task.s(message, job_id, start, end)
+            for start, end in parts
+        )(finish)
+    log.info(
+        "Split %s into %d parts for job %s", spooled.name, len(parts), job_id
+    )
+    return {"job_id": job_id, "parts": len(parts)}
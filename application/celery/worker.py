@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from celery.signals import worker_process_init, worker_process_shutdown
+from collections.abc import Coroutine
+
+from infrastructure.database.connection import (
+    async_session_maker,
+    dispose_async_engine,
+    forget_engines,
+)
+
+
+log = logging.getLogger("celery.worker")
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop that lives as long as the worker process.
+
+    The async engine's pooled connections are bound to the loop they were
+    opened on, so every task must run on this one to reuse them.
+    """
+
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coroutine: Coroutine):
+    """
+    Run a task's coroutine to completion on the worker loop
+    """
+
+    return worker_loop().run_until_complete(coroutine)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    global _loop
+    # Pooled connections are not shared with the parent process.
+    forget_engines()
+    _loop = None
+    worker_loop()
+    async_session_maker()
+    log.info("Worker process ready with a persistent event loop")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    if _loop is None or _loop.is_closed():
+        return
+    _loop.run_until_complete(dispose_async_engine())
+    _loop.close()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,13 +17,54 @@ class Settings(BaseSettings):
     postgres_host: str = ""
     postgres_database: str = ""
     postgres_port: str = ""
+    postgres_pool_size: int = 5
+    postgres_max_overflow: int = 10
+    postgres_pool_timeout_seconds: float = 30.0
+    postgres_pool_recycle_seconds: int = 30 * 60
+    postgres_pool_pre_ping: bool = False
+    postgres_statement_cache_size: int = 100
+    postgres_pgbouncer: bool = False
     ssl_enabled: bool = False
     env: str = ""
     allowed_origins: str = ""
     twelve_data_url: str = ""
     twelve_data_api_key: str = ""
+    twelve_data_credits_per_minute: int = 8
+    twelve_data_max_concurrency: int = 8
+    twelve_data_timeout_seconds: float = 30.0
+    twelve_data_connect_timeout_seconds: float = 5.0
+    twelve_data_max_retries: int = 4
+    twelve_data_backoff_seconds: float = 1.0
+    twelve_data_backoff_max_seconds: float = 60.0
     redis_broker: str = ""
     redis_backend: str = ""
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_ttl_seconds: float = 30.0
+    query_cache_redis_url: str = ""
+    query_cache_ttl_seconds: int = 300
+    query_cache_lock_timeout_seconds: float = 5.0
+    http_live_max_age_seconds: int = 5
+    latest_snapshot_ttl_seconds: float = 10.0
+    indicator_state_max_tickers: int = 256
+    indicator_state_max_bytes: int = 512 * 1024**2
+    partition_months_ahead: int = 2
+    compact_storage: bool = False
+    bulk_write_chunk_size: int = 2000
+    copy_load_min_rows: int = 5000
+    csv_chunk_rows: int = 50_000
+    ingestion_spool_dir: str = str(
+        Path(tempfile.gettempdir()) / "stock-ingestion"
+    )
+    ingestion_max_upload_bytes: int = 10 * 1024**3
+    ingestion_part_bytes: int = 32 * 1024**2
+    postgres_replica_urls: str = ""
+    replica_check_interval_seconds: float = 5.0
+    replica_check_timeout_seconds: float = 1.0
+    replica_max_lag_seconds: float = 30.0
+    replica_read_your_writes: bool = True
+    http_historical_max_age_seconds: int = 30 * 24 * 60 * 60
 
     model_config = SettingsConfigDict(
         env_file=".env.docker", env_file_encoding="utf-8", extra="ignore"
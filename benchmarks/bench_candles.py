@@ -0,0 +1,122 @@
+"""
+Compare server-side candles with client-side resampling of minute bars.
+
+Runs against a live API that already holds data for the ticker (for example
+test_data/aapl_1min.csv uploaded through POST /api/stocks-data):
+
+    python -m benchmarks.bench_candles --ticker AAPL --interval 5m
+
+The client-side path downloads every minute bar through the paginated
+/api/stock/ticker/{ticker} route and resamples it with pandas, which is what
+dashboards did before /candles existed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pandas as pd
+import statistics
+import time
+from dotenv import load_dotenv
+from httpx import Client
+
+from application.api.routers.stock_price import CANDLE_INTERVALS
+from infrastructure.database.repositories.stock_price_repository import (
+    CANDLE_ORIGIN,
+)
+
+
+load_dotenv()
+
+
+def client_side(http: Client, ticker: str, interval: str):
+    url = f"/api/stock/ticker/{ticker}"
+    params = {"limit": 10_000}
+    rows, transferred = [], 0
+    while url:
+        response = http.get(url, params=params)
+        response.raise_for_status()
+        transferred += len(response.content)
+        rows.extend(response.json())
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+    frame = pd.DataFrame(rows)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+    candles = (
+        frame.set_index("timestamp")
+        .resample(CANDLE_INTERVALS[interval], origin=CANDLE_ORIGIN)
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+            }
+        )
+        .dropna()
+    )
+    return len(candles), transferred
+
+
+def server_side(http: Client, ticker: str, interval: str):
+    response = http.get(
+        f"/api/stock/ticker/{ticker}/candles",
+        params={"interval": interval},
+    )
+    response.raise_for_status()
+    return len(response.json()), len(response.content)
+
+
+def measure(label: str, runs: int, func, *args):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        candles, transferred = func(*args)
+        timings.append(time.perf_counter() - started)
+    print(
+        f"{label:<12} candles={candles:<6} bytes={transferred:<10} "
+        f"median={statistics.median(timings) * 1000:.1f}ms "
+        f"min={min(timings) * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument(
+        "--interval",
+        default="5m",
+        choices=sorted(CANDLE_INTERVALS),
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--url",
+        default=os.getenv("API_URL") or "http://localhost:8000",
+    )
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {os.getenv('VALID_BEARER_TOKEN')}"}
+    with Client(base_url=args.url, headers=headers, timeout=120) as http:
+        measure(
+            "client-side",
+            args.runs,
+            client_side,
+            http,
+            args.ticker,
+            args.interval,
+        )
+        measure(
+            "server-side",
+            args.runs,
+            server_side,
+            http,
+            args.ticker,
+            args.interval,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from application.config.settings import settings
+from domain.indicators.indicators import CALCULATIONS, IndicatorSpec, vwap
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _inputs(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    typical = (columns["high"] + columns["low"] + columns["close"]) / 3
+    return {
+        "timestamp": columns["timestamp"],
+        "close": columns["close"],
+        "pv": np.cumsum(typical * columns["volume"]),
+        "volume": np.cumsum(columns["volume"]),
+    }
+
+
+@dataclass
+class SeriesState:
+    """
+    A ticker's inputs and every indicator computed on them so far.
+
+    `version` and `history_version` are the ticker's write versions when
+    the inputs were read; a later freshness with the same history version
+    means bars were only appended since, after `last_timestamp`.
+    """
+
+    inputs: dict[str, np.ndarray]
+    version: int | None
+    history_version: int | None
+    outputs: dict[IndicatorSpec, dict[str, np.ndarray]] = field(
+        default_factory=dict
+    )
+    carry: dict[IndicatorSpec, object] = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.inputs.values()) + sum(
+            values.nbytes
+            for outputs in self.outputs.values()
+            for values in outputs.values()
+        )
+
+    @property
+    def last_timestamp(self) -> datetime | None:
+        if not len(self.inputs["timestamp"]):
+            return None
+        micros = int(self.inputs["timestamp"][-1])
+        return _EPOCH + timedelta(microseconds=micros)
+
+    def values(self, spec: IndicatorSpec) -> dict[str, np.ndarray]:
+        if spec not in self.outputs:
+            empty = {name: column[:0] for name, column in self.inputs.items()}
+            self.outputs[spec], self.carry[spec] = CALCULATIONS[spec.name](
+                empty, self.inputs, spec.period
+            )
+        return self.outputs[spec]
+
+    def extend(self, columns: dict[str, np.ndarray]) -> SeriesState:
+        """
+        A new state with `columns` appended, extending every indicator
+        """
+
+        new = _inputs(columns)
+        new["pv"] = new["pv"] + self.inputs["pv"][-1:].sum()
+        new["volume"] = new["volume"] + self.inputs["volume"][-1:].sum()
+        state = SeriesState(
+            inputs={
+                name: np.concatenate((column, new[name]))
+                for name, column in self.inputs.items()
+            },
+            version=self.version,
+            history_version=self.history_version,
+        )
+        for spec, outputs in self.outputs.items():
+            tail, state.carry[spec] = CALCULATIONS[spec.name](
+                self.inputs, new, spec.period, self.carry[spec]
+            )
+            state.outputs[spec] = {
+                suffix: np.concatenate((values, tail[suffix]))
+                for suffix, values in outputs.items()
+            }
+        return state
+
+
+@dataclass
+class IndicatorStats:
+    rebuilds: int = 0
+    extensions: int = 0
+    reuses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class IndicatorEngine:
+    """
+    Compute indicators per ticker, keeping the results between requests.
+
+    States are held for the most recently used tickers, at most
+    `max_tickers` of them and `max_bytes` of arrays in all, though the
+    state in use is always kept. New bars are appended to a state,
+    carrying recursive indicators forward; any other change to a ticker's
+    history rebuilds it.
+    """
+
+    max_tickers: int
+    max_bytes: int
+    stats: IndicatorStats = field(default_factory=IndicatorStats)
+    _states: OrderedDict = field(default_factory=OrderedDict)
+
+    async def _state(self, repository, ticker: str) -> SeriesState:
+        freshness = await repository.get_freshness([ticker])
+        state = self._states.get(ticker)
+
+        if state is not None and freshness.version == state.version:
+            self.stats.reuses += 1
+        elif (
+            state is not None
+            and state.last_timestamp is not None
+            and freshness.history_version == state.history_version
+        ):
+            columns = await repository.get_stock_price_columns(
+                ticker, after=state.last_timestamp
+            )
+            if len(columns["timestamp"]):
+                state = state.extend(columns)
+            self.stats.extensions += 1
+        else:
+            state = None
+
+        if state is None or state.last_timestamp is None:
+            columns = await repository.get_stock_price_columns(ticker)
+            state = SeriesState(
+                inputs=_inputs(columns),
+                version=freshness.version,
+                history_version=freshness.history_version,
+            )
+            self.stats.rebuilds += 1
+
+        # Recorded as read before the columns, so a write racing this request
+        # shows up as a mismatch next time rather than being missed.
+        state.version = freshness.version
+        state.history_version = freshness.history_version
+        self._states[ticker] = state
+        self._states.move_to_end(ticker)
+        return state
+
+    def _evict(self) -> None:
+        # Sized after computing, since indicators are added to a state lazily.
+        total = sum(state.nbytes for state in self._states.values())
+        while len(self._states) > 1 and (
+            len(self._states) > self.max_tickers or total > self.max_bytes
+        ):
+            _, state = self._states.popitem(last=False)
+            total -= state.nbytes
+            self.stats.evictions += 1
+
+    async def compute(
+        self,
+        repository,
+        ticker: str,
+        specs: list[IndicatorSpec],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Indicator series for the bars between `start` and `end`.
+
+        Indicators are computed over the full history so the window opens
+        already warmed up; VWAP is anchored at the first bar of the window.
+        """
+
+        state = await self._state(repository, ticker)
+        timestamps = state.inputs["timestamp"]
+        first = (
+            0 if start is None else timestamps.searchsorted(_to_micros(start))
+        )
+        last = (
+            len(timestamps)
+            if end is None
+            else timestamps.searchsorted(_to_micros(end), side="right")
+        )
+
+        result = {"timestamp": timestamps[first:last]}
+        for spec in specs:
+            if spec.name == "vwap":
+                values = vwap(
+                    state.inputs["pv"], state.inputs["volume"], first
+                )
+                result[spec.label] = values[: last - first]
+                continue
+            for suffix, values in state.values(spec).items():
+                result[spec.label + suffix] = values[first:last]
+        self._evict()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "tickers": len(self._states),
+            "bytes": sum(state.nbytes for state in self._states.values()),
+        }
+
+
+indicator_engine = IndicatorEngine(
+    max_tickers=settings.indicator_state_max_tickers,
+    max_bytes=settings.indicator_state_max_bytes,
+)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+BOLLINGER_WIDTH = 2.0
+
+DEFAULT_PERIODS = {
+    "sma": 20,
+    "ema": 20,
+    "rsi": 14,
+    "bollinger": 20,
+    "vwap": None,
+}
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """
+    An indicator and its period, parsed from "name" or "name:period"
+    """
+
+    name: str
+    period: int | None = None
+
+    @classmethod
+    def parse(cls, text: str) -> IndicatorSpec:
+        name, _, period = text.strip().lower().partition(":")
+        if name not in DEFAULT_PERIODS:
+            raise ValueError(f"Unknown indicator {name!r}")
+        if DEFAULT_PERIODS[name] is None:
+            if period:
+                raise ValueError(f"{name} takes no period")
+            return cls(name)
+        if not period:
+            return cls(name, DEFAULT_PERIODS[name])
+        if not period.isdigit() or not 2 <= int(period) <= 1000:
+            raise ValueError(f"Invalid period {period!r} for {name}")
+        return cls(name, int(period))
+
+    @property
+    def label(self) -> str:
+        return (
+            self.name if self.period is None else f"{self.name}_{self.period}"
+        )
+
+
+def _window_stats(
+    values: np.ndarray,
+    period: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population standard deviation over `period` values.
+
+    Positions without a full window yet are NaN.
+    """
+
+    means = np.full(len(values), np.nan)
+    stds = np.full(len(values), np.nan)
+    if len(values) >= period:
+        windows = sliding_window_view(values, period)
+        means[period - 1 :] = windows.mean(axis=1)
+        stds[period - 1 :] = windows.std(axis=1)
+    return means, stds
+
+
+def _recursive_mean(
+    values: np.ndarray,
+    alpha: float,
+    seed: float | None,
+) -> np.ndarray:
+    """
+    y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], continuing from `seed`
+    """
+
+    if seed is not None:
+        values = np.concatenate(([seed], values))
+    smoothed = pd.Series(values).ewm(alpha=alpha, adjust=False).mean()
+    smoothed = smoothed.to_numpy()
+    return smoothed[1:] if seed is not None else smoothed
+
+
+def _mask_warmup(values: np.ndarray, seen: int, warmup: int) -> np.ndarray:
+    """
+    Blank the positions that fall within the first `warmup` bars overall
+    """
+
+    blank = max(0, min(len(values), warmup - seen))
+    values[:blank] = np.nan
+    return values
+
+
+# Each calculation extends an indicator over the `new` bars. `history` holds
+# the bars already processed, `carry` whatever the previous call returned for
+# recursive indicators, and the result maps a label suffix to one value per
+# new bar.
+
+
+def sma(history: dict, new: dict, period: int, carry=None):
+    closes = np.concatenate((history["close"][-(period - 1) :], new["close"]))
+    means, _ = _window_stats(closes, period)
+    return {"": means[-len(new["close"]) :]}, None
+
+
+def bollinger(history: dict, new: dict, period: int, carry=None):
+    closes = np.concatenate((history["close"][-(period - 1) :], new["close"]))
+    means, stds = _window_stats(closes, period)
+    tail = slice(-len(new["close"]), None)
+    width = BOLLINGER_WIDTH * stds[tail]
+    return {
+        "_middle": means[tail],
+        "_upper": means[tail] + width,
+        "_lower": means[tail] - width,
+    }, None
+
+
+def ema(history: dict, new: dict, period: int, carry=None):
+    seed, seen = carry or (None, 0)
+    closes = new["close"]
+    smoothed = _recursive_mean(closes, 2 / (period + 1), seed)
+    carry = (smoothed[-1], seen + len(closes))
+    return {"": _mask_warmup(smoothed.copy(), seen, period - 1)}, carry
+
+
+def rsi(history: dict, new: dict, period: int, carry=None):
+    previous = history["close"][-1:]
+    gain_seed, loss_seed, seen = carry or (None, None, 0)
+    changes = np.diff(np.concatenate((previous, new["close"])))
+    if not len(previous):
+        changes = np.concatenate(([0.0], changes))
+    alpha = 1 / period
+    gains = _recursive_mean(np.clip(changes, 0, None), alpha, gain_seed)
+    losses = _recursive_mean(np.clip(-changes, 0, None), alpha, loss_seed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100 - 100 / (1 + gains / losses)
+    # No losses reads 100, unless there were no gains either: a flat
+    # series is neutral.
+    strength = np.where(
+        losses == 0, np.where(gains == 0, 50.0, 100.0), strength
+    )
+    carry = (gains[-1], losses[-1], seen + len(changes))
+    return {"": _mask_warmup(strength, seen, period)}, carry
+
+
+CALCULATIONS = {
+    "sma": sma,
+    "ema": ema,
+    "rsi": rsi,
+    "bollinger": bollinger,
+}
+
+
+def vwap(
+    cumulative_pv: np.ndarray,
+    cumulative_volume: np.ndarray,
+    anchor: int,
+) -> np.ndarray:
+    """
+    Volume weighted average price anchored at bar `anchor`.
+
+    Takes running totals of typical price * volume and of volume over the
+    whole series, so any anchor costs two subtractions per bar.
+    """
+
+    pv = cumulative_pv[anchor:]
+    volume = cumulative_volume[anchor:]
+    if anchor:
+        pv = pv - cumulative_pv[anchor - 1]
+        volume = volume - cumulative_volume[anchor - 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pv / volume
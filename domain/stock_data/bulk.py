@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+
+BAR_COLUMNS = ("ticker", "timestamp", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+def validate_bars(records: list) -> tuple[list[dict], list[dict]]:
+    """
+    Check many bars at once, column by column rather than row by row.
+
+    Returns the valid bars as records, with timestamps as UTC datetimes and
+    numbers as floats, and a rejection ({"index", "reason"}) for every
+    other record. When a (ticker, timestamp) repeats, the last occurrence
+    wins and the earlier ones are rejected, as the write would have
+    overwritten them anyway.
+    """
+
+    frame = pd.DataFrame(
+        [record if isinstance(record, dict) else {} for record in records],
+        columns=BAR_COLUMNS,
+    )
+    reasons = pd.Series(None, index=frame.index, dtype=object)
+
+    def reject(invalid: pd.Series, reason: str) -> None:
+        reasons[invalid & reasons.isna()] = reason
+
+    is_text = frame["ticker"].map(type).eq(str)
+    # Object dtype, or `.str` refuses a column holding no string at all.
+    frame["ticker"] = frame["ticker"].astype(object).where(is_text).str.strip()
+    reject(~is_text | frame["ticker"].eq(""), "ticker must be a string")
+
+    frame["timestamp"] = pd.to_datetime(
+        frame["timestamp"], utc=True, errors="coerce", format="ISO8601"
+    )
+    reject(frame["timestamp"].isna(), "timestamp must be an ISO 8601 date")
+    reject(
+        frame["timestamp"] > datetime.now(timezone.utc),
+        "timestamp cannot be in the future",
+    )
+
+    for name in (*PRICE_COLUMNS, "volume"):
+        frame[name] = pd.to_numeric(frame[name], errors="coerce").astype(float)
+        reject(~np.isfinite(frame[name]), f"{name} must be a number")
+    reject(
+        (frame[list(PRICE_COLUMNS)] <= 0).any(axis=1),
+        "prices must be positive",
+    )
+    reject(frame["volume"] < 0, "volume cannot be negative")
+    reject(frame["low"] > frame["high"], "low cannot exceed high")
+
+    superseded = (
+        frame[reasons.isna()]
+        .duplicated(["ticker", "timestamp"], keep="last")
+        .reindex(frame.index, fill_value=False)
+    )
+    reject(
+        superseded,
+        "superseded by a later bar with the same ticker and timestamp",
+    )
+
+    valid = frame[reasons.isna()]
+    bars = valid.to_dict("records")
+    for bar, timestamp in zip(bars, valid["timestamp"].dt.to_pydatetime()):
+        bar["timestamp"] = timestamp
+    rejected = [
+        {"index": int(index), "reason": reason}
+        for index, reason in reasons.dropna().items()
+    ]
+    return bars, rejected
@@ -1,27 +1,38 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-import aiohttp
 import asyncio
 import logging
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import insert
+from uuid import UUID
 
 from application.api.dependencies.db import async_get_db
 from application.api.schemas.stock_price import StockPriceCreate
 from application.config.settings import settings
-from infrastructure.database.models.stock_price import StockPrice
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.cache.snapshot import latest_quotes, shared_versions
+from infrastructure.database.copy_loader import COPY_COLUMNS, copy_prices
+from infrastructure.database.price_writer import upsert_prices
+from infrastructure.database.repositories.ingestion_job_repository import (
+    update_job,
+)
+from infrastructure.database.repositories.stock_price_repository import (
+    StockPriceRepository,
+)
+from infrastructure.market_data.twelve_data import (
+    TwelveDataClient,
+    TwelveDataError,
+)
 from load_symbols import load_symbols
 
 
-TWELVEDATA_URL = settings.twelve_data_url
-TWELVEDATA_API_KEY = settings.twelve_data_api_key
-
 cfg = load_symbols()
 INTERVAL = cfg.get("poll_interval_seconds", 1)
 BATCH_TIME_INTERVAL = cfg.get("batch_time_interval", "1day")
 START_DATE = cfg.get("start_date", 1)
+# Bars requested per symbol; a batch loads up to this many per symbol.
+OUTPUT_SIZE = 250
 
 
 logging.basicConfig(level=logging.INFO)
@@ -30,18 +41,20 @@ log = logging.getLogger("etl.batch")
 
 @dataclass
 class BatchDataProcessor:
+    # Shared by every symbol of a batch: one connection pool, one budget
+    # of API credits.
+    client: TwelveDataClient = field(
+        default_factory=TwelveDataClient.from_settings
+    )
+
     async def _fetch_daily(self, symbol: str) -> list[StockPriceCreate]:
-        params = {
-            "symbol": symbol,
-            "interval": BATCH_TIME_INTERVAL,
-            "outputsize": 250,
-            "apikey": TWELVEDATA_API_KEY,
-            "format": "JSON",
-            "start_date": START_DATE,
-        }
-        async with aiohttp.ClientSession() as http:
-            async with http.get(TWELVEDATA_URL, params=params) as resp:
-                data = await resp.json()
+        data = await self.client.get(
+            symbol=symbol,
+            interval=BATCH_TIME_INTERVAL,
+            outputsize=OUTPUT_SIZE,
+            format="JSON",
+            start_date=START_DATE,
+        )
 
         series = data.get("values", [])
         return [
@@ -57,21 +70,121 @@ class BatchDataProcessor:
             for row in series
         ]
 
-    async def process_data(self, symbol: str):
+    @staticmethod
+    async def _refresh_latest(session, symbol: str) -> None:
+        """
+        Put the newest stored bar of `symbol` in the latest-quote snapshot,
+        read back once the batch is committed rather than taken from it
+        """
+
+        versions = await shared_versions([symbol])
+        latest = await StockPriceRepository(session).get_latest_prices(
+            [symbol]
+        )
+        latest_quotes.offer(latest, versions)
+
+    async def process_data(self, symbol: str, bulk: bool = False) -> dict:
+        """
+        Fetch and store the bars of `symbol`, through COPY when there are
+        many of them or when `bulk` marks a large batch
+        """
+
         log.info("Fetching %s stocks", symbol)
         prices = await self._fetch_daily(symbol)
 
         async for session in async_get_db():
             rows = [p.model_dump() for p in prices]
-            stmt = insert(StockPrice).on_conflict_do_nothing(
-                index_elements=["ticker", "timestamp"],
-            )
-            await session.execute(stmt, rows)
+            if bulk or len(rows) >= settings.copy_load_min_rows:
+                # Backfills are large enough for COPY to pay off.
+                result = await copy_prices(
+                    session,
+                    (tuple(row[n] for n in COPY_COLUMNS) for row in rows),
+                    overwrite=False,
+                )
+            else:
+                result = await upsert_prices(
+                    session, rows, overwrite=False, returning=True
+                )
             await session.commit()
+            await invalidate_tickers([symbol])
+            await self._refresh_latest(session, symbol)
             log.info("Upserted %d rows for %s", len(rows), symbol)
 
-    async def run_batch(self, symbols: list[str]):
-        await asyncio.gather(
-            *(self.process_data(symbol) for symbol in set(symbols)),
-        )
+        return {
+            "rows": len(rows),
+            "rows_parsed": len(rows),
+            "rows_inserted": result.inserted,
+            "rows_updated": result.updated,
+        }
+
+    async def _process_tracked(
+        self, symbol: str, job_id: UUID, bulk: bool
+    ) -> bool:
+        """
+        Load one symbol as a part of `job_id`, recording a failure on the
+        job rather than raising
+        """
+
+        try:
+            counts = await self.process_data(symbol, bulk)
+        except Exception as exc:
+            log.error("Failed to process %s: %s", symbol, exc)
+            error = f"{symbol}: {exc}"
+            await update_job(
+                lambda jobs: jobs.record_part(job_id, 1, error=error)
+            )
+            return False
+        await update_job(lambda jobs: jobs.record_part(job_id, 1, counts))
+        return True
+
+    async def _process_untracked(self, symbol: str, bulk: bool) -> bool:
+        """
+        Load one symbol outside of any job, logging an API failure rather
+        than raising so that the other symbols still load
+        """
+
+        try:
+            await self.process_data(symbol, bulk)
+        except TwelveDataError as exc:
+            log.error("Failed to process %s: %s", symbol, exc)
+            return False
+        return True
+
+    async def run_batch(
+        self, symbols: list[str], job_id: UUID | None = None
+    ) -> int:
+        """
+        Load every symbol, returning how many failed on the API
+        """
+
+        symbols = set(symbols)
+        # Symbols are loaded one by one, but a batch that is a backfill as
+        # a whole goes through COPY.
+        bulk = len(symbols) * OUTPUT_SIZE >= settings.copy_load_min_rows
+        async with self.client:
+            if job_id is None:
+                loaded = await asyncio.gather(
+                    *(
+                        self._process_untracked(symbol, bulk)
+                        for symbol in symbols
+                    ),
+                )
+                failed = loaded.count(False)
+            else:
+                await update_job(
+                    lambda jobs: jobs.start_job(
+                        job_id, len(symbols), len(symbols)
+                    )
+                )
+                loaded = await asyncio.gather(
+                    *(
+                        self._process_tracked(symbol, job_id, bulk)
+                        for symbol in symbols
+                    ),
+                )
+                failed = loaded.count(False)
+                await update_job(lambda jobs: jobs.finish_job(job_id))
+        if failed:
+            log.error("%d of %d stocks failed", failed, len(symbols))
         log.info("All stocks processed—shutting down.")
+        return failed
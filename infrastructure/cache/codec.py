@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import numpy as np
+import struct
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+
+# Compact binary encoding for cached repository results.
+#
+# Row lists ("R") are stored column by column: UUIDs as 16 raw bytes,
+# strings dictionary encoded with u16 codes, datetimes as int64 epoch
+# microseconds and numbers as float64, preceded by a u8 null mask when the
+# column holds None. Column dicts ("C") are raw NumPy buffers. A single
+# row ("1") is a one-row list. Texts are u16 length prefixed. Everything
+# is little-endian.
+#
+# VERSION changes with the layout, so entries written by an older layout
+# are never read back.
+
+VERSION = 2
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+
+class UnsupportedValue(TypeError):
+    """Raised for results the codec cannot represent"""
+
+
+@lru_cache(maxsize=64)
+def _row_type(fields: tuple[str, ...]):
+    return namedtuple("CachedRow", fields)
+
+
+def _pack_text(value: str) -> bytes:
+    raw = value.encode()
+    if len(raw) > 0xFFFF:
+        raise UnsupportedValue("String too long")
+    return _U16.pack(len(raw)) + raw
+
+
+def _unpack_text(payload: memoryview, offset: int) -> tuple[str, int]:
+    (length,) = _U16.unpack_from(payload, offset)
+    start = offset + _U16.size
+    end = start + length
+    return bytes(payload[start:end]).decode(), end
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _column_kind(values: list) -> str:
+    present = [value for value in values if value is not None]
+    if len(present) < len(values):
+        # Only numbers carry a null mask.
+        if all(isinstance(value, (int, float)) for value in present):
+            return "n"
+        raise UnsupportedValue("Cannot encode None outside of numbers")
+    sample = values[0]
+    if isinstance(sample, uuid.UUID):
+        return "u"
+    if isinstance(sample, str):
+        return "s"
+    if isinstance(sample, datetime):
+        return "t" if sample.tzinfo is None else "T"
+    if isinstance(sample, (int, float)):
+        return "d"
+    raise UnsupportedValue(f"Cannot encode {type(sample).__name__}")
+
+
+def _encode_column(kind: str, values: list) -> bytes:
+    if kind == "u":
+        return b"".join(value.bytes for value in values)
+    if kind == "s":
+        labels = sorted(set(values))
+        if len(labels) > 0xFFFF:
+            raise UnsupportedValue("Too many distinct strings")
+        codes = {label: code for code, label in enumerate(labels)}
+        return (
+            _U16.pack(len(labels))
+            + b"".join(_pack_text(label) for label in labels)
+            + np.fromiter(
+                (codes[value] for value in values),
+                dtype="<u2",
+                count=len(values),
+            ).tobytes()
+        )
+    if kind in "tT":
+        return np.fromiter(
+            (_to_micros(value) for value in values),
+            dtype="<i8",
+            count=len(values),
+        ).tobytes()
+    numbers = np.fromiter(
+        (np.nan if value is None else value for value in values),
+        dtype="<f8",
+        count=len(values),
+    ).tobytes()
+    if kind == "n":
+        mask = np.fromiter(
+            (value is None for value in values), dtype="u1", count=len(values)
+        )
+        return mask.tobytes() + numbers
+    return numbers
+
+
+def _decode_column(
+    kind: str,
+    payload: memoryview,
+    offset: int,
+    rows: int,
+) -> tuple[list, int]:
+    if kind == "u":
+        end = offset + 16 * rows
+        raw = bytes(payload[offset:end])
+        return [
+            uuid.UUID(bytes=raw[i : i + 16]) for i in range(0, len(raw), 16)
+        ], end
+    if kind == "s":
+        (count,) = _U16.unpack_from(payload, offset)
+        offset += _U16.size
+        labels = []
+        for _ in range(count):
+            label, offset = _unpack_text(payload, offset)
+            labels.append(label)
+        codes = np.frombuffer(payload, dtype="<u2", count=rows, offset=offset)
+        return [labels[code] for code in codes.tolist()], offset + 2 * rows
+    if kind in "tT":
+        micros = np.frombuffer(payload, dtype="<i8", count=rows, offset=offset)
+        tzinfo = timezone.utc if kind == "T" else None
+        return [
+            (_EPOCH + timedelta(microseconds=value)).replace(tzinfo=tzinfo)
+            for value in micros.tolist()
+        ], offset + 8 * rows
+    nulls = None
+    if kind == "n":
+        nulls = np.frombuffer(payload, dtype="u1", count=rows, offset=offset)
+        offset += rows
+    values = np.frombuffer(payload, dtype="<f8", count=rows, offset=offset)
+    values = values.tolist()
+    if nulls is not None:
+        values = [
+            None if null else value
+            for null, value in zip(nulls.tolist(), values)
+        ]
+    return values, offset + 8 * rows
+
+
+def encode(value) -> bytes:
+    """
+    Encode a list of rows, a single row or a dict of NumPy columns
+    """
+
+    if hasattr(value, "_fields"):
+        return b"1" + encode([value])
+
+    if isinstance(value, dict):
+        parts = [b"C", _U16.pack(len(value))]
+        for name, column in value.items():
+            dtype = column.dtype.newbyteorder("<").str
+            parts += [
+                _pack_text(name),
+                _pack_text(dtype),
+                _U32.pack(len(column)),
+                np.ascontiguousarray(column, dtype=dtype).tobytes(),
+            ]
+        return b"".join(parts)
+
+    if not isinstance(value, list):
+        raise UnsupportedValue(f"Cannot encode {type(value).__name__}")
+    if not value:
+        return b"R" + _U16.pack(0) + _U32.pack(0)
+
+    fields = tuple(value[0]._fields)
+    columns = list(zip(*value))
+    kinds = [_column_kind(list(column)) for column in columns]
+    parts = [b"R", _U16.pack(len(fields))]
+    for name, kind in zip(fields, kinds):
+        parts += [_pack_text(name), kind.encode()]
+    parts.append(_U32.pack(len(value)))
+    parts += [
+        _encode_column(kind, list(column))
+        for kind, column in zip(kinds, columns)
+    ]
+    return b"".join(parts)
+
+
+def decode(payload: bytes):
+    """
+    Inverse of `encode`; rows come back as named tuples
+    """
+
+    if payload[:1] == b"1":
+        return decode(payload[1:])[0]
+
+    view = memoryview(payload)
+    tag = bytes(view[:1])
+    (count,) = _U16.unpack_from(view, 1)
+    offset = 1 + _U16.size
+
+    if tag == b"C":
+        columns = {}
+        for _ in range(count):
+            name, offset = _unpack_text(view, offset)
+            dtype, offset = _unpack_text(view, offset)
+            (rows,) = _U32.unpack_from(view, offset)
+            offset += _U32.size
+            column = np.frombuffer(
+                view, dtype=dtype, count=rows, offset=offset
+            )
+            columns[name] = column.copy()
+            offset += column.nbytes
+        return columns
+
+    layout = []
+    for _ in range(count):
+        name, offset = _unpack_text(view, offset)
+        layout.append((name, chr(view[offset])))
+        offset += 1
+    (rows,) = _U32.unpack_from(view, offset)
+    offset += _U32.size
+    if not layout:
+        return []
+
+    columns = []
+    for _, kind in layout:
+        column, offset = _decode_column(kind, view, offset, rows)
+        columns.append(column)
+    row_type = _row_type(tuple(name for name, _ in layout))
+    return [row_type(*values) for values in zip(*columns)]
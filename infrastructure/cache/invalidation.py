@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from infrastructure.cache.memory import price_cache
+from infrastructure.cache.shared import shared_query_cache
+from infrastructure.cache.snapshot import latest_quotes
+
+
+log = logging.getLogger("cache.invalidation")
+
+
+async def invalidate_tickers(tickers: Iterable[str]) -> None:
+    """
+    Drop cached reads for every ticker a write path just touched.
+
+    Called after the write has been committed, by the repository and by the
+    ingestion paths alike.
+    """
+
+    tickers = sorted({ticker for ticker in tickers if ticker})
+    if not tickers:
+        return
+    price_cache.invalidate(*tickers)
+    latest_quotes.discard(*tickers)
+
+    shared = shared_query_cache()
+    if shared is not None:
+        await shared.bump(tickers)
+    log.debug("Invalidated cached reads for %s", ", ".join(tickers))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import logging
+import numpy as np
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+from application.config.settings import settings
+
+
+log = logging.getLogger("cache.memory")
+
+MISSING = object()
+
+# Rough footprint of one cached price row (Row tuple, floats, str, datetime).
+ROW_BYTES = 240
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate bytes held by a cached repository result
+    """
+
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return max(len(value), 1) * ROW_BYTES
+    return ROW_BYTES
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+    tags: frozenset[str]
+
+
+@dataclass
+class TTLCache:
+    """
+    Bounded LRU cache with a TTL, tagged by ticker for precise invalidation.
+
+    Every ticker has a generation counter that writes bump. A loader records
+    the generations before it queries and `set` drops the result if a write
+    landed in between, so a slow read can never re-insert stale rows.
+    """
+
+    max_entries: int
+    max_bytes: int
+    ttl: float
+    clock: Callable[[], float] = time.monotonic
+    stats: CacheStats = field(default_factory=CacheStats)
+    _entries: OrderedDict = field(default_factory=OrderedDict)
+    _tags: dict = field(default_factory=lambda: defaultdict(set))
+    _generations: dict = field(default_factory=lambda: defaultdict(int))
+    _bytes: int = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return MISSING
+        if entry.expires_at <= self.clock():
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry.value
+
+    def generation(self, tags: Iterable[str]) -> tuple[int, ...]:
+        return tuple(self._generations[tag] for tag in sorted(tags))
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[str],
+        generation: tuple[int, ...] | None = None,
+    ) -> None:
+        tags = frozenset(tags)
+        if generation is not None and generation != self.generation(tags):
+            return
+
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(
+            value=value,
+            size=size,
+            expires_at=self.clock() + self.ttl,
+            tags=tags,
+        )
+        self._bytes += size
+        for tag in tags:
+            self._tags[tag].add(key)
+
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._generations[tag] += 1
+            for key in list(self._tags.pop(tag, ())):
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidate(*list(self._tags))
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+        }
+
+
+price_cache = TTLCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    ttl=settings.cache_ttl_seconds,
+)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Sequence
+
+from application.config.settings import settings
+from infrastructure.cache.memory import MISSING, price_cache
+from infrastructure.cache.shared import shared_query_cache
+
+
+async def read_through(
+    key: tuple,
+    tickers: Sequence[str],
+    load: Callable[[], Awaitable],
+):
+    """
+    Resolve a ticker-scoped read through the in-process and Redis caches.
+
+    With Redis configured the ticker versions are part of the in-process key
+    too, so a write in any worker or in Celery is seen by every process on
+    its next read rather than after the local TTL.
+    """
+
+    if not settings.cache_enabled:
+        return await load()
+
+    shared = shared_query_cache()
+    versions = await shared.versions(tickers) if shared else None
+    local_key = key if versions is None else (*key, versions)
+
+    value = price_cache.get(local_key)
+    if value is not MISSING:
+        return value
+
+    generation = price_cache.generation(tickers)
+    if versions is None:
+        value = await load()
+    else:
+        value = await shared.get_or_load(key, versions, load)
+    price_cache.set(local_key, value, tickers, generation)
+    return value
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from application.config.settings import settings
+from infrastructure.cache import codec
+
+
+log = logging.getLogger("cache.shared")
+
+_LOCK_POLL_SECONDS = 0.025
+
+
+@dataclass
+class SharedCacheStats:
+    hits: int = 0
+    misses: int = 0
+    lock_waits: int = 0
+    errors: int = 0
+
+
+@dataclass
+class SharedQueryCache:
+    """
+    Second-level query cache shared by every API worker through Redis.
+
+    Each ticker has a version counter that every write path increments.
+    Versions are part of the data key, so a write makes all older entries
+    unreachable at once and they simply age out through their TTL.
+
+    A miss takes a short NX lock before querying; concurrent misses for the
+    same key wait for the winner's result instead of all hitting Postgres.
+    """
+
+    client: Redis
+    ttl: int
+    lock_timeout: float
+    prefix: str = "mdq"
+    stats: SharedCacheStats = field(default_factory=SharedCacheStats)
+
+    def _version_key(self, ticker: str) -> str:
+        return f"{self.prefix}:v:{ticker}"
+
+    def _data_key(self, key: tuple, versions: Sequence[int]) -> str:
+        digest = hashlib.blake2b(
+            repr((codec.VERSION, key, tuple(versions))).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f"{self.prefix}:q:{digest}"
+
+    async def versions(self, tickers: Sequence[str]) -> tuple[int, ...] | None:
+        """
+        Current version of each ticker, or None if Redis is unreachable
+        """
+
+        try:
+            values = await self.client.mget(
+                [self._version_key(ticker) for ticker in sorted(tickers)]
+            )
+        except RedisError as exc:
+            self._failed("read versions", exc)
+            return None
+        return tuple(int(value or 0) for value in values)
+
+    async def bump(self, tickers: Sequence[str]) -> None:
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for ticker in tickers:
+                    pipe.incr(self._version_key(ticker))
+                await pipe.execute()
+        except RedisError as exc:
+            # Entries for these tickers stay reachable until their TTL.
+            self._failed("bump versions", exc)
+
+    async def get_or_load(
+        self,
+        key: tuple,
+        versions: Sequence[int],
+        load: Callable[[], Awaitable],
+    ):
+        data_key = self._data_key(key, versions)
+        lock_key = f"{data_key}:lock"
+        try:
+            payload = await self.client.get(data_key)
+            if payload is not None:
+                self.stats.hits += 1
+                return codec.decode(payload)
+
+            self.stats.misses += 1
+            locked = await self.client.set(
+                lock_key,
+                b"1",
+                nx=True,
+                px=int(self.lock_timeout * 1000),
+            )
+            if not locked:
+                self.stats.lock_waits += 1
+                value = await self._wait_for(data_key)
+                if value is not None:
+                    return value
+        except RedisError as exc:
+            self._failed("read", exc)
+            return await load()
+
+        try:
+            value = await load()
+            await self._store(data_key, value)
+            return value
+        finally:
+            if locked:
+                await self._release(lock_key)
+
+    async def _wait_for(self, data_key: str):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(_LOCK_POLL_SECONDS)
+            payload = await self.client.get(data_key)
+            if payload is not None:
+                self.stats.hits += 1
+                return codec.decode(payload)
+        return None
+
+    async def _store(self, data_key: str, value) -> None:
+        try:
+            payload = codec.encode(value)
+        except codec.UnsupportedValue:
+            return
+        try:
+            await self.client.set(data_key, payload, ex=self.ttl)
+        except RedisError as exc:
+            self._failed("store", exc)
+
+    async def _release(self, lock_key: str) -> None:
+        try:
+            await self.client.delete(lock_key)
+        except RedisError as exc:
+            self._failed("release lock", exc)
+
+    def _failed(self, action: str, exc: Exception) -> None:
+        self.stats.errors += 1
+        log.warning("Shared query cache could not %s: %s", action, exc)
+
+    def snapshot(self) -> dict:
+        return {**asdict(self.stats), "ttl_seconds": self.ttl}
+
+
+_shared_stats = SharedCacheStats()
+_shared_cache: SharedQueryCache | None = None
+_shared_cache_loop: asyncio.AbstractEventLoop | None = None
+
+
+def shared_query_cache() -> SharedQueryCache | None:
+    """
+    The Redis query cache, or None when QUERY_CACHE_REDIS_URL is unset.
+
+    Redis connections belong to the event loop that opened them, so a new
+    client is built whenever the running loop changes.
+    """
+
+    global _shared_cache, _shared_cache_loop
+    if not settings.query_cache_redis_url:
+        return None
+
+    loop = asyncio.get_running_loop()
+    if _shared_cache is None or _shared_cache_loop is not loop:
+        _shared_cache = SharedQueryCache(
+            client=Redis.from_url(settings.query_cache_redis_url),
+            ttl=settings.query_cache_ttl_seconds,
+            lock_timeout=settings.query_cache_lock_timeout_seconds,
+            stats=_shared_stats,
+        )
+        _shared_cache_loop = loop
+    return _shared_cache
+
+
+def shared_cache_snapshot() -> dict | None:
+    if not settings.query_cache_redis_url:
+        return None
+    return {
+        **asdict(_shared_stats),
+        "ttl_seconds": settings.query_cache_ttl_seconds,
+    }
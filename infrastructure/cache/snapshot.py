@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import time
+from collections import namedtuple
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime, timezone
+
+from application.config.settings import settings
+from infrastructure.cache.shared import shared_query_cache
+
+
+LatestBar = namedtuple(
+    "LatestBar",
+    "ticker timestamp open high low close volume",
+)
+
+
+def _aware(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass
+class SnapshotStats:
+    hits: int = 0
+    misses: int = 0
+    updates: int = 0
+
+
+@dataclass
+class LatestQuoteSnapshot:
+    """
+    Newest bar per ticker, kept in memory and filled from the database.
+
+    Entries are filled by reads and by ingestion, always with the bar the
+    database holds once the write is committed: a written batch says
+    nothing about the newest bar once backfills and skipped duplicates are
+    involved. Every entry is tagged with the ticker's shared cache version
+    when it was read, and only served while that version is current, so
+    writes made by another process (the Celery worker) are seen at once.
+    Without the shared cache, entries are trusted for `ttl` seconds.
+    """
+
+    ttl: float
+    clock: Callable[[], float] = time.monotonic
+    stats: SnapshotStats = field(default_factory=SnapshotStats)
+    _bars: dict = field(default_factory=dict)
+
+    def get_many(
+        self,
+        tickers: Iterable[str],
+        versions: Mapping[str, int] | None = None,
+    ) -> tuple[list[LatestBar], list[str]]:
+        """
+        Split tickers into bars served from memory and tickers still cold
+        or written to since, according to `versions`
+        """
+
+        now = self.clock()
+        found, missing = [], []
+        for ticker in tickers:
+            entry = self._bars.get(ticker)
+            if (
+                entry is not None
+                and entry[1] > now
+                and (versions is None or entry[2] == versions.get(ticker))
+            ):
+                found.append(entry[0])
+            else:
+                missing.append(ticker)
+        self.stats.hits += len(found)
+        self.stats.misses += len(missing)
+        return found, missing
+
+    def offer(
+        self,
+        bars: Iterable,
+        versions: Mapping[str, int] | None = None,
+    ) -> None:
+        """
+        Record bars read from the database under `versions`, read before
+        them. An entry of the same version is only replaced by a newer bar.
+        """
+
+        versions = versions or {}
+        expires_at = self.clock() + self.ttl
+        for bar in bars:
+            bar = LatestBar(
+                ticker=bar.ticker,
+                timestamp=_aware(bar.timestamp),
+                open=bar.open,
+                high=bar.high,
+                low=bar.low,
+                close=bar.close,
+                volume=bar.volume,
+            )
+            version = versions.get(bar.ticker)
+            current = self._bars.get(bar.ticker)
+            if (
+                current is not None
+                and current[2] == version
+                and current[0].timestamp > bar.timestamp
+            ):
+                continue
+            self._bars[bar.ticker] = (bar, expires_at, version)
+            self.stats.updates += 1
+
+    def discard(self, *tickers: str) -> None:
+        for ticker in tickers:
+            self._bars.pop(ticker, None)
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "tickers": len(self._bars),
+            "ttl_seconds": self.ttl,
+        }
+
+
+async def shared_versions(tickers: Iterable[str]) -> dict[str, int] | None:
+    """
+    Shared cache version of each ticker, bumped by every process writing
+    to it, or None without a reachable shared cache
+    """
+
+    shared = shared_query_cache()
+    if shared is None:
+        return None
+    tickers = sorted(set(tickers))
+    values = await shared.versions(tickers)
+    if values is None:
+        return None
+    return dict(zip(tickers, values))
+
+
+latest_quotes = LatestQuoteSnapshot(ttl=settings.latest_snapshot_ttl_seconds)
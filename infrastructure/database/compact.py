@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import distinct, func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from application.api.dependencies.db import async_db_session
+from infrastructure.database.models.stock_bar import StockBar, Symbol
+from infrastructure.database.models.stock_price import StockPrice
+
+
+log = logging.getLogger("compact")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Bar ids are 4 hex digits of symbol id, 16 of epoch microseconds and this
+# suffix. Microseconds before 1970 are written in 64-bit two's complement,
+# as to_hex() does for negative bigints. The view stock_prices_compact
+# builds the same string in SQL.
+_ID_SUFFIX = "0" * 12
+_U64 = 1 << 64
+
+_PRICES = ("open", "high", "low", "close", "volume")
+
+
+def bar_id(symbol_id: int, timestamp: datetime) -> UUID:
+    """
+    Stable UUID of a compact bar, so the API keeps exposing `id`
+    """
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    micros = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    return UUID(hex=f"{symbol_id:04x}{micros % _U64:016x}{_ID_SUFFIX}")
+
+
+def parse_bar_id(value: UUID) -> tuple[int, datetime] | None:
+    """
+    Inverse of `bar_id`; None for ids that were not built by it
+    """
+
+    digits = value.hex
+    if not digits.endswith(_ID_SUFFIX):
+        return None
+    micros = int(digits[4:20], 16)
+    if micros >= _U64 // 2:
+        micros -= _U64
+    return int(digits[:4], 16), _EPOCH + timedelta(microseconds=micros)
+
+
+@dataclass
+class SymbolMap:
+    """
+    In-memory ticker <-> symbol id dictionary, filled from `symbols`
+    """
+
+    _ids: dict[str, int] = field(default_factory=dict)
+    _tickers: dict[int, str] = field(default_factory=dict)
+
+    def _remember(self, symbol_id: int, ticker: str) -> None:
+        self._ids[ticker] = symbol_id
+        self._tickers[symbol_id] = ticker
+
+    async def ids(
+        self,
+        session: AsyncSession,
+        tickers: Iterable[str],
+        create: bool = False,
+    ) -> dict[str, int]:
+        """
+        Symbol ids of `tickers`, inserting unknown tickers if `create`.
+
+        Tickers without a symbol are left out of the result.
+        """
+
+        tickers = set(tickers)
+        missing = sorted(tickers - self._ids.keys())
+        fresh = {}
+        if missing:
+            created = set()
+            if create:
+                result = await session.execute(
+                    insert(Symbol)
+                    .values([{"ticker": ticker} for ticker in missing])
+                    .on_conflict_do_nothing(index_elements=["ticker"])
+                    .returning(Symbol.ticker)
+                )
+                created = set(result.scalars())
+            result = await session.execute(
+                select(Symbol.id, Symbol.ticker).where(
+                    Symbol.ticker.in_(missing)
+                )
+            )
+            for symbol_id, ticker in result.all():
+                # Symbols inserted by this transaction are only cached once
+                # seen committed; a rollback would take them away again.
+                if ticker in created:
+                    fresh[ticker] = symbol_id
+                else:
+                    self._remember(symbol_id, ticker)
+
+        known = {t: self._ids[t] for t in tickers if t in self._ids}
+        return {**known, **fresh}
+
+    async def ticker(
+        self,
+        session: AsyncSession,
+        symbol_id: int,
+    ) -> str | None:
+        if symbol_id not in self._tickers:
+            result = await session.execute(
+                select(Symbol.ticker).where(Symbol.id == symbol_id)
+            )
+            ticker = result.scalar()
+            if ticker is None:
+                return None
+            self._remember(symbol_id, ticker)
+        return self._tickers[symbol_id]
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._tickers.clear()
+
+
+symbol_map = SymbolMap()
+
+
+async def touch_symbols(session: AsyncSession, symbol_ids: Iterable[int]):
+    """
+    Move the write watermark of symbols whose bars changed
+    """
+
+    await session.execute(
+        update(Symbol)
+        .where(Symbol.id.in_(set(symbol_ids)))
+        .values(updated=func.now())
+    )
+
+
+async def migrate_to_compact(
+    session: AsyncSession,
+    tickers: list[str] | None = None,
+) -> list[str]:
+    """
+    Copy bars from stock_prices into symbols/stock_bars.
+
+    Runs one transaction per ticker and overwrites bars already copied
+    with their current values, so it can be interrupted and re-run, and
+    repeated to catch up with writes, inserts and updates alike, made
+    before COMPACT_STORAGE was switched on. Deleted bars are not carried
+    over.
+    """
+
+    if tickers is None:
+        result = await session.execute(
+            select(distinct(StockPrice.ticker)).order_by(StockPrice.ticker)
+        )
+        tickers = list(result.scalars())
+
+    for ticker in tickers:
+        ids = await symbol_map.ids(session, [ticker], create=True)
+        statement = insert(StockBar).from_select(
+            ["symbol_id", "timestamp", *_PRICES],
+            select(
+                literal(ids[ticker]),
+                StockPrice.timestamp,
+                StockPrice.open,
+                StockPrice.high,
+                StockPrice.low,
+                StockPrice.close,
+                func.round(StockPrice.volume),
+            ).where(StockPrice.ticker == ticker),
+        )
+        current = StockBar.__table__.c
+        changed = tuple_(
+            *(current[name] for name in _PRICES)
+        ).is_distinct_from(
+            tuple_(*(statement.excluded[name] for name in _PRICES))
+        )
+        copied = await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["symbol_id", "timestamp"],
+                set_={name: statement.excluded[name] for name in _PRICES},
+                # Unchanged bars are left alone rather than rewritten.
+                where=changed,
+            )
+        )
+        await touch_symbols(session, [ids[ticker]])
+        await session.commit()
+        log.info("Copied %d bars for %s", copied.rowcount, ticker)
+    return tickers
+
+
+async def _main(tickers: list[str] | None):
+    async with async_db_session() as session:
+        await migrate_to_compact(session, tickers)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=migrate_to_compact.__doc__)
+    parser.add_argument(
+        "--ticker",
+        action="append",
+        help="Copy only this ticker (repeatable); all tickers by default",
+    )
+    asyncio.run(_main(parser.parse_args().ticker))
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from uuid import uuid4
 
 from application.config.settings import settings
+from infrastructure.database.pool_metrics import InstrumentedPool, instrument
 
 
 ASYNC_SQLALCHEMY_DATABASE_URL = (
@@ -18,31 +20,130 @@ SYNC_DATABASE_URL = (
     f"{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_database}"
 )
 
-_session_maker = None
+_async_session_maker = None
+_sync_session_maker = None
+
+
+def _statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def statement_cache_args() -> dict:
+    """
+    asyncpg connect arguments for the configured statement caching.
+
+    Behind PgBouncer in transaction mode consecutive statements may run
+    on different server connections, so nothing is cached per connection
+    and prepared statement names are made unique.
+    """
+
+    if settings.postgres_pgbouncer:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _statement_name,
+        }
+    return {
+        "statement_cache_size": settings.postgres_statement_cache_size,
+        "prepared_statement_cache_size": (
+            settings.postgres_statement_cache_size
+        ),
+    }
+
+
+def create_pooled_engine(name: str, url):
+    """
+    Async engine with the configured pool, reported as `name` in metrics
+    """
+
+    return instrument(
+        name,
+        create_async_engine(
+            url,
+            poolclass=InstrumentedPool,
+            pool_size=settings.postgres_pool_size,
+            max_overflow=settings.postgres_max_overflow,
+            pool_timeout=settings.postgres_pool_timeout_seconds,
+            pool_recycle=settings.postgres_pool_recycle_seconds,
+            pool_pre_ping=settings.postgres_pool_pre_ping,
+            connect_args=statement_cache_args(),
+        ),
+    )
 
 
 def async_session_maker():
-    global _session_maker
-    if _session_maker is None:
-        async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
-        _session_maker = sessionmaker(
+    global _async_session_maker
+    if _async_session_maker is None:
+        async_engine = create_pooled_engine(
+            "primary", ASYNC_SQLALCHEMY_DATABASE_URL
+        )
+        _async_session_maker = sessionmaker(
             bind=async_engine,
             expire_on_commit=False,
             class_=AsyncSession,
         )
-    return _session_maker
+    return _async_session_maker
+
+
+def replica_session_makers():
+    """
+    (host, session maker) of every read replica in POSTGRES_REPLICA_URLS
+    """
+
+    makers = []
+    for url in settings.postgres_replica_urls.split(","):
+        if not url.strip():
+            continue
+        url = make_url(url.strip()).set(drivername="postgresql+asyncpg")
+        name = f"{url.host}:{url.port or 5432}"
+        makers.append(
+            (
+                name,
+                sessionmaker(
+                    bind=create_pooled_engine(name, url),
+                    expire_on_commit=False,
+                    class_=AsyncSession,
+                ),
+            )
+        )
+    return makers
 
 
 def session_maker():
-    global _session_maker
-    if _session_maker is None:
+    global _sync_session_maker
+    if _sync_session_maker is None:
         engine = create_engine(SYNC_DATABASE_URL, connect_args=connect_args())
-        _session_maker = sessionmaker(
+        _sync_session_maker = sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=engine,
         )
-    return _session_maker
+    return _sync_session_maker
+
+
+def forget_engines():
+    """
+    Drop the engines inherited from a parent process without closing
+    their connections, which still belong to the parent. The next
+    session maker call builds fresh engines.
+    """
+
+    global _async_session_maker, _sync_session_maker
+    if _async_session_maker is not None:
+        _async_session_maker.kw["bind"].sync_engine.dispose(close=False)
+    if _sync_session_maker is not None:
+        _sync_session_maker.kw["bind"].dispose(close=False)
+    _async_session_maker = None
+    _sync_session_maker = None
+
+
+async def dispose_async_engine():
+    """
+    Close the pooled connections of the async engine, if any
+    """
+
+    if _async_session_maker is not None:
+        await _async_session_maker.kw["bind"].dispose()
 
 
 def use_ssl():
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import logging
+import time
+from collections.abc import Iterable
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Interval,
+    column,
+    func,
+    literal,
+    literal_column,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.config.settings import settings
+from infrastructure.database.compact import symbol_map, touch_symbols
+from infrastructure.database.models.stock_bar import StockBar, Symbol
+from infrastructure.database.models.stock_price import StockPrice
+from infrastructure.database.models.stock_price_rollup import StockPriceHourly
+from infrastructure.database.partitions import ensure_partitions
+from infrastructure.database.price_writer import OHLCV
+from infrastructure.database.rollups import CANDLE_ORIGIN, refresh_rollups
+
+
+log = logging.getLogger("copy_loader")
+
+# Order of the fields in every row handed to `copy_prices`.
+COPY_COLUMNS = ("ticker", "timestamp", *OHLCV)
+
+STAGING = "stock_prices_staging"
+
+# Temporary tables skip the WAL like unlogged ones, are private to the
+# transaction and go away on commit, so concurrent loads never collide.
+_CREATE_STAGING = text(
+    f"CREATE TEMPORARY TABLE {STAGING} ("
+    "seq bigint GENERATED ALWAYS AS IDENTITY, "
+    "ticker text NOT NULL, "
+    "timestamp timestamptz NOT NULL, "
+    "open float8, high float8, low float8, close float8, volume float8"
+    ") ON COMMIT DROP"
+)
+
+staging = table(STAGING, column("seq"), *(column(c) for c in COPY_COLUMNS))
+
+
+@dataclass
+class CopyResult:
+    rows: int
+    seconds: float
+    tickers: list[str]
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _latest_per_key():
+    """
+    Staged rows deduplicated on (ticker, timestamp), last copy wins
+    """
+
+    return (
+        select(staging)
+        .distinct(staging.c.ticker, staging.c.timestamp)
+        .order_by(staging.c.ticker, staging.c.timestamp, staging.c.seq.desc())
+        .subquery("latest")
+    )
+
+
+def _counted(merge):
+    """
+    Run `merge` and count the rows it inserted and updated, server side
+    """
+
+    merged = merge.returning(
+        literal_column("xmax = 0", Boolean).label("inserted")
+    ).cte("merged")
+    return select(
+        func.count().filter(merged.c.inserted),
+        func.count(),
+    ).select_from(merged)
+
+
+def _merge_prices(latest, overwrite: bool):
+    statement = insert(StockPrice.__table__).from_select(
+        ["id", *COPY_COLUMNS, "created"],
+        select(
+            func.gen_random_uuid(),
+            *(latest.c[name] for name in COPY_COLUMNS),
+            func.now(),
+        ),
+    )
+    if not overwrite:
+        return statement.on_conflict_do_nothing(
+            index_elements=["ticker", "timestamp"]
+        )
+    return statement.on_conflict_do_update(
+        index_elements=["ticker", "timestamp"],
+        set_={name: statement.excluded[name] for name in OHLCV}
+        | {"updated": func.now()},
+    )
+
+
+def _merge_bars(latest, overwrite: bool):
+    statement = insert(StockBar.__table__).from_select(
+        ["symbol_id", "timestamp", *OHLCV],
+        select(
+            Symbol.id,
+            latest.c.timestamp,
+            latest.c.open,
+            latest.c.high,
+            latest.c.low,
+            latest.c.close,
+            func.round(latest.c.volume),
+        ).join_from(latest, Symbol, Symbol.ticker == latest.c.ticker),
+    )
+    if not overwrite:
+        return statement.on_conflict_do_nothing(
+            index_elements=["symbol_id", "timestamp"]
+        )
+    return statement.on_conflict_do_update(
+        index_elements=["symbol_id", "timestamp"],
+        set_={name: statement.excluded[name] for name in OHLCV},
+    )
+
+
+async def copy_prices(
+    session: AsyncSession,
+    rows: Iterable[tuple],
+    overwrite: bool = True,
+) -> CopyResult:
+    """
+    Load many bars through binary COPY and one merge statement.
+
+    `rows` are tuples in COPY_COLUMNS order. They are streamed into a
+    staging table in the caller's transaction, then merged into
+    stock_prices (or stock_bars) with a single INSERT ... SELECT ... ON
+    CONFLICT, which is far cheaper per row than parameterised INSERTs.
+    Rollups and partitions are kept up to date as with `upsert_prices`.
+    The caller commits and invalidates caches for `tickers`.
+
+    Duplicates within `rows` count once, and rows skipped because they
+    already exist without `overwrite` count as neither inserted nor
+    updated.
+    """
+
+    started = time.perf_counter()
+    await session.execute(_CREATE_STAGING)
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    status = await raw.driver_connection.copy_records_to_table(
+        STAGING, records=rows, columns=list(COPY_COLUMNS)
+    )
+    copied = int(status.split()[-1])
+
+    # One key per ticker and hour is all the rollups need; the ticker
+    # versions need the real first and last bar times.
+    hours = func.date_bin(
+        literal(StockPriceHourly.width, Interval),
+        staging.c.timestamp,
+        literal(CANDLE_ORIGIN, DateTime(timezone=True)),
+    )
+    result = await session.execute(
+        select(
+            staging.c.ticker,
+            hours,
+            func.min(staging.c.timestamp),
+            func.max(staging.c.timestamp),
+        ).group_by(staging.c.ticker, hours)
+    )
+    keys, spans = [], []
+    for ticker, hour, first, last in result.all():
+        keys.append((ticker, hour))
+        spans += [(ticker, first), (ticker, last)]
+    tickers = sorted({ticker for ticker, _ in keys})
+
+    latest = _latest_per_key()
+    if settings.compact_storage:
+        ids = await symbol_map.ids(session, tickers, create=True)
+        merge = _merge_bars(latest, overwrite)
+    else:
+        # Only the temporary staging table is touched so far, so the
+        # partitions can still be created outside this transaction.
+        await ensure_partitions([hour for _, hour in keys])
+        merge = _merge_prices(latest, overwrite)
+    inserted, written = (await session.execute(_counted(merge))).one()
+    if settings.compact_storage:
+        await touch_symbols(session, ids.values())
+    await refresh_rollups(session, keys, written=spans)
+
+    result = CopyResult(
+        rows=copied,
+        seconds=time.perf_counter() - started,
+        tickers=tickers,
+        inserted=inserted,
+        updated=written - inserted,
+    )
+    log.info(
+        "Loaded %d rows in %.2fs (%.0f rows/s)",
+        result.rows,
+        result.seconds,
+        result.rows_per_second,
+    )
+    return result
@@ -0,0 +1,56 @@
+"""Add ticker versions
+
+Revision ID: 5d2f8b0c6e31
+Revises: c3e9a1f7b264
+Create Date: 2026-10-18 19:40:12.518204
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2f8b0c6e31"
+down_revision: str | None = "c3e9a1f7b264"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ticker_versions",
+        sa.Column("ticker", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("history_version", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "last_timestamp", sa.DateTime(timezone=True), nullable=True
+        ),
+        sa.Column("written_from", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("ticker"),
+    )
+    # One pass over the existing bars of either layout; from here on the
+    # write paths keep the table current.
+    op.execute(
+        """
+        INSERT INTO ticker_versions
+            (ticker, version, history_version, last_timestamp, updated)
+        SELECT ticker, 1, 0, max(timestamp), max(written)
+        FROM (
+            SELECT ticker, timestamp, coalesce(updated, created) AS written
+            FROM stock_prices
+            UNION ALL
+            SELECT symbols.ticker, stock_bars.timestamp, symbols.updated
+            FROM stock_bars JOIN symbols ON symbols.id = stock_bars.symbol_id
+        ) AS bars
+        GROUP BY ticker
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ticker_versions")
@@ -0,0 +1,55 @@
+"""Add ticker timestamp index
+
+Revision ID: 9c1e7f3a2b60
+Revises: 4a63d4911a67
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1e7f3a2b60"
+down_revision: str | None = "4a63d4911a67"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Built concurrently so ingestion keeps writing while it is created.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_stock_prices_ticker_timestamp",
+            "stock_prices",
+            ["ticker", sa.text("timestamp DESC")],
+            unique=False,
+            postgresql_include=["open", "high", "low", "close", "volume"],
+            postgresql_concurrently=True,
+        )
+        # The composite index leads with ticker and makes this one redundant.
+        op.drop_index(
+            "ix_stock_prices_ticker",
+            table_name="stock_prices",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_stock_prices_ticker",
+            "stock_prices",
+            ["ticker"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_stock_prices_ticker_timestamp",
+            table_name="stock_prices",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,45 @@
+"""Add ingestion job row counts
+
+Revision ID: c3e9a1f7b264
+Revises: a6c4e8f2d517
+Create Date: 2026-10-18 18:12:40.105372
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e9a1f7b264"
+down_revision: str | None = "a6c4e8f2d517"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COUNTS = ("rows_parsed", "rows_inserted", "rows_updated", "rows_rejected")
+
+
+def upgrade() -> None:
+    for name in COUNTS:
+        op.add_column(
+            "ingestion_jobs",
+            sa.Column(
+                name, sa.BigInteger(), nullable=False, server_default="0"
+            ),
+        )
+    op.create_index(
+        "ix_ingestion_jobs_status_created",
+        "ingestion_jobs",
+        ["status", "created"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_ingestion_jobs_status_created", table_name="ingestion_jobs"
+    )
+    for name in reversed(COUNTS):
+        op.drop_column("ingestion_jobs", name)
@@ -0,0 +1,64 @@
+"""Add rollup tables
+
+Revision ID: d41b7e2c9a18
+Revises: 9c1e7f3a2b60
+Create Date: 2026-10-18 11:40:02.517930
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d41b7e2c9a18"
+down_revision: str | None = "9c1e7f3a2b60"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+ROLLUPS = (
+    ("stock_prices_1h", "stock_prices", "1 hour", "count(*)"),
+    ("stock_prices_1d", "stock_prices_1h", "1 day", "sum(bars)"),
+)
+
+
+def upgrade() -> None:
+    for table, source, width, bars in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column("ticker", sa.String(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("open", sa.Float(), nullable=True),
+            sa.Column("high", sa.Float(), nullable=True),
+            sa.Column("low", sa.Float(), nullable=True),
+            sa.Column("close", sa.Float(), nullable=True),
+            sa.Column("volume", sa.Float(), nullable=True),
+            sa.Column("bars", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("ticker", "timestamp"),
+        )
+        # Same bucketing as infrastructure.database.rollups; later changes
+        # go through refresh_rollups() or `python -m
+        # infrastructure.database.rollups`.
+        op.execute(f"""
+            INSERT INTO {table}
+                (ticker, timestamp, open, high, low, close, volume, bars)
+            SELECT
+                ticker,
+                date_bin('{width}', timestamp, '2000-01-03T00:00:00Z'),
+                (array_agg(open ORDER BY timestamp))[1],
+                max(high),
+                min(low),
+                (array_agg(close ORDER BY timestamp DESC))[1],
+                sum(volume),
+                {bars}
+            FROM {source}
+            GROUP BY 1, 2
+            """)
+
+
+def downgrade() -> None:
+    for table, *_ in reversed(ROLLUPS):
+        op.drop_table(table)
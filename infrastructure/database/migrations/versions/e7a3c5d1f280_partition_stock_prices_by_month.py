@@ -0,0 +1,148 @@
+"""Partition stock_prices by month
+
+Revision ID: e7a3c5d1f280
+Revises: d41b7e2c9a18
+Create Date: 2026-10-18 14:02:37.904116
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c5d1f280"
+down_revision: str | None = "d41b7e2c9a18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+WITHOUT_TIMESTAMP = "stock_prices_without_timestamp"
+
+COLUMNS = "id, ticker, timestamp, open, high, low, close, volume, created, deleted, updated"
+
+# One partition per UTC month from the oldest row to two months past the
+# newest row or today, named like infrastructure.database.partitions does.
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month timestamptz;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', coalesce(min(timestamp), now()), 'UTC'),
+            date_trunc('month', greatest(max(timestamp), now()), 'UTC')
+                + interval '2 months',
+            interval '1 month'
+        )
+        FROM stock_prices_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF stock_prices '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'stock_prices_' || to_char(month AT TIME ZONE 'UTC', '"y"YYYY"m"MM'),
+            month,
+            month + interval '1 month'
+        );
+    END LOOP;
+END $$;
+"""
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column("ticker", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open", sa.Float(), nullable=True),
+        sa.Column("high", sa.Float(), nullable=True),
+        sa.Column("low", sa.Float(), nullable=True),
+        sa.Column("close", sa.Float(), nullable=True),
+        sa.Column("volume", sa.Float(), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("deleted", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_stock_prices_id", "stock_prices", ["id"])
+    op.create_index(
+        "ix_stock_prices_ticker_timestamp",
+        "stock_prices",
+        ["ticker", sa.text("timestamp DESC")],
+        postgresql_include=["open", "high", "low", "close", "volume"],
+    )
+
+
+def _set_aside_current_table() -> None:
+    op.rename_table("stock_prices", "stock_prices_unpartitioned")
+    op.drop_index(
+        "ix_stock_prices_ticker_timestamp",
+        table_name="stock_prices_unpartitioned",
+    )
+    op.drop_index(
+        "ix_stock_prices_id",
+        table_name="stock_prices_unpartitioned",
+    )
+    op.drop_constraint(
+        "uq_ticker_timestamp",
+        "stock_prices_unpartitioned",
+        type_="unique",
+    )
+    op.drop_constraint(
+        "stock_prices_pkey",
+        "stock_prices_unpartitioned",
+        type_="primary",
+    )
+
+
+def _copy_back(where: str = "") -> None:
+    op.execute(
+        f"INSERT INTO stock_prices ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM stock_prices_unpartitioned {where}"
+    )
+    op.drop_table("stock_prices_unpartitioned")
+
+
+def _set_aside_rows_without_timestamp() -> None:
+    # No partition can hold them, and timestamp is now part of the primary
+    # key. Keep them aside for inspection rather than aborting the upgrade
+    # or dropping them; the downgrade leaves the table in place.
+    op.execute(
+        f"CREATE TABLE {WITHOUT_TIMESTAMP} AS "
+        f"SELECT {COLUMNS} FROM stock_prices_unpartitioned "
+        "WHERE timestamp IS NULL"
+    )
+
+
+def upgrade() -> None:
+    # Partitioned tables need the partition key in every unique constraint,
+    # so the primary key becomes (id, timestamp). uq_ticker_timestamp
+    # already contains it and keeps backing ON CONFLICT upserts.
+    _set_aside_current_table()
+    op.create_table(
+        "stock_prices",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        sa.UniqueConstraint("ticker", "timestamp", name="uq_ticker_timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    _create_indexes()
+    op.execute(CREATE_PARTITIONS)
+    _set_aside_rows_without_timestamp()
+    _copy_back("WHERE timestamp IS NOT NULL")
+
+
+def downgrade() -> None:
+    _set_aside_current_table()
+    op.create_table(
+        "stock_prices",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("ticker", "timestamp", name="uq_ticker_timestamp"),
+    )
+    _create_indexes()
+    _copy_back()
@@ -0,0 +1,77 @@
+"""Add compact bar storage
+
+Revision ID: f2b8d6e4a913
+Revises: e7a3c5d1f280
+Create Date: 2026-10-18 15:12:44.103826
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from collections.abc import Sequence
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b8d6e4a913"
+down_revision: str | None = "e7a3c5d1f280"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Must match infrastructure.database.compact.bar_id. to_hex() writes the
+# microseconds of bars before 1970 in 64-bit two's complement, which is
+# what bar_id does too.
+COMPACT_VIEW = """
+CREATE VIEW stock_prices_compact AS
+SELECT (
+        lpad(to_hex(b.symbol_id), 4, '0')
+        || lpad(
+            to_hex((extract(epoch FROM b.timestamp) * 1000000)::bigint),
+            16,
+            '0'
+        )
+        || '000000000000'
+    )::uuid AS id,
+    s.ticker,
+    b.timestamp,
+    b.open,
+    b.high,
+    b.low,
+    b.close,
+    b.volume::float8 AS volume,
+    NULL::timestamptz AS created,
+    s.updated AS updated
+FROM stock_bars b
+JOIN symbols s ON s.id = b.symbol_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "symbols",
+        sa.Column("id", sa.SmallInteger(), sa.Identity(), nullable=False),
+        sa.Column("ticker", sa.String(), nullable=False),
+        sa.Column("updated", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("ticker"),
+    )
+    op.create_table(
+        "stock_bars",
+        sa.Column("symbol_id", sa.SmallInteger(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open", sa.Float(), nullable=True),
+        sa.Column("high", sa.Float(), nullable=True),
+        sa.Column("low", sa.Float(), nullable=True),
+        sa.Column("close", sa.Float(), nullable=True),
+        sa.Column("volume", sa.BigInteger(), nullable=True),
+        sa.ForeignKeyConstraint(["symbol_id"], ["symbols.id"]),
+        sa.PrimaryKeyConstraint("symbol_id", "timestamp"),
+    )
+    op.execute(COMPACT_VIEW)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW stock_prices_compact")
+    op.drop_table("stock_bars")
+    op.drop_table("symbols")
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+
+from application.api.dependencies.db import Base
+from infrastructure.database.utils import TimestampsMixin, UUIDMixin
+
+
+class IngestionJob(Base, UUIDMixin, TimestampsMixin):
+    """
+    One ingestion request, aggregated over the Celery tasks serving it.
+
+    Work is measured in `total` units (bytes for CSV files, symbols for
+    API batches); subtasks add to `processed` and to the row counts as
+    they finish their part. `rows` counts the valid rows loaded, which
+    were either inserted, updated or left alone as duplicates.
+    """
+
+    __tablename__ = "ingestion_jobs"
+
+    kind = Column(String, nullable=False)
+    source = Column(String)
+    status = Column(String, nullable=False, default="queued")
+    total = Column(BigInteger, nullable=False, default=0)
+    processed = Column(BigInteger, nullable=False, default=0)
+    rows = Column(BigInteger, nullable=False, default=0)
+    rows_parsed = Column(BigInteger, nullable=False, default=0)
+    rows_inserted = Column(BigInteger, nullable=False, default=0)
+    rows_updated = Column(BigInteger, nullable=False, default=0)
+    rows_rejected = Column(BigInteger, nullable=False, default=0)
+    parts_total = Column(Integer, nullable=False, default=0)
+    parts_done = Column(Integer, nullable=False, default=0)
+    parts_failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    started = Column(DateTime(timezone=True))
+    finished = Column(DateTime(timezone=True))
+
+    # Counters added up over the parts of a job.
+    COUNTS = (
+        "rows",
+        "rows_parsed",
+        "rows_inserted",
+        "rows_updated",
+        "rows_rejected",
+    )
+
+    __table_args__ = (
+        Index("ix_ingestion_jobs_created", "created"),
+        Index("ix_ingestion_jobs_status_created", "status", "created"),
+    )
+
+    def progress(self, now: datetime | None = None) -> dict:
+        """
+        Percent done, time spent, throughput since the job started and
+        time left
+        """
+
+        now = self.finished or now or datetime.now(timezone.utc)
+        elapsed = (now - self.started).total_seconds() if self.started else 0
+        done = self.status in ("succeeded", "failed")
+        if self.total:
+            percent = 100 * self.processed / self.total
+        else:
+            percent = 100.0 if done else 0.0
+
+        eta = None
+        if not done and self.processed and elapsed > 0:
+            rate = self.processed / elapsed
+            eta = max(self.total - self.processed, 0) / rate
+        return {
+            "percent": round(percent, 1),
+            "duration_seconds": round(elapsed, 3),
+            "rows_per_second": (
+                round(self.rows / elapsed) if elapsed > 0 else 0
+            ),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
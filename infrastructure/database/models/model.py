@@ -1,4 +1,8 @@
 from __future__ import annotations
 
+import infrastructure.database.models.ingestion_job  # noqa
+import infrastructure.database.models.stock_bar  # noqa
 import infrastructure.database.models.stock_price  # noqa
+import infrastructure.database.models.stock_price_rollup  # noqa
+import infrastructure.database.models.ticker_version  # noqa
 from application.api.dependencies.db import Base  # noqa
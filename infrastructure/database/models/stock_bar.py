@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Identity,
+    MetaData,
+    SmallInteger,
+    String,
+    Table,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from application.api.dependencies.db import Base
+from application.config.settings import settings
+from infrastructure.database.models.stock_price import StockPrice
+
+
+class Symbol(Base):
+    """
+    Ticker dictionary for the compact layout.
+
+    `updated` is bumped by every write to the symbol's bars and stands in
+    for the per-row audit columns stock_bars does not have.
+    """
+
+    __tablename__ = "symbols"
+
+    id = Column(SmallInteger, Identity(), primary_key=True)
+    ticker = Column(String, nullable=False, unique=True)
+    updated = Column(DateTime(timezone=True))
+
+
+class StockBar(Base):
+    """
+    Compact bar: 2 byte symbol, no surrogate key, no audit columns
+    """
+
+    __tablename__ = "stock_bars"
+
+    symbol_id = Column(
+        SmallInteger,
+        ForeignKey("symbols.id"),
+        primary_key=True,
+    )
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+
+class CompactStockPrice(Base):
+    """
+    Read-only view presenting stock_bars in the stock_prices shape.
+
+    `id` is derived from (symbol_id, timestamp), see
+    infrastructure.database.compact.bar_id. The view lives outside the
+    declarative metadata so autogenerate never tries to create it.
+    """
+
+    __table__ = Table(
+        "stock_prices_compact",
+        MetaData(),
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("ticker", String),
+        Column("timestamp", DateTime(timezone=True)),
+        Column("open", Float),
+        Column("high", Float),
+        Column("low", Float),
+        Column("close", Float),
+        Column("volume", Float),
+        Column("created", DateTime(timezone=True)),
+        Column("updated", DateTime(timezone=True)),
+    )
+
+
+def price_model():
+    """
+    Mapped class that price reads go through for the configured layout
+    """
+
+    return CompactStockPrice if settings.compact_storage else StockPrice
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Float, String, UniqueConstraint
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    String,
+    UniqueConstraint,
+)
 
 from application.api.dependencies.db import Base
 from application.api.schemas.stock_price import StockPrice as StockPriceSchema
@@ -10,12 +17,16 @@ from infrastructure.database.utils import TimestampsMixin, UUIDMixin
 class StockPrice(Base, UUIDMixin, TimestampsMixin):
     """
     Model class for StockPrice object
+
+    Range partitioned by month on `timestamp`, see
+    infrastructure.database.partitions.
     """
 
     __tablename__ = "stock_prices"
 
-    ticker = Column(String, index=True)
-    timestamp = Column(DateTime(timezone=True))
+    ticker = Column(String)
+    # Part of the primary key because the table is partitioned on it.
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
@@ -24,6 +35,13 @@ class StockPrice(Base, UUIDMixin, TimestampsMixin):
 
     __table_args__ = (
         UniqueConstraint("ticker", "timestamp", name="uq_ticker_timestamp"),
+        Index(
+            "ix_stock_prices_ticker_timestamp",
+            ticker,
+            timestamp.desc(),
+            postgresql_include=["open", "high", "low", "close", "volume"],
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
     def __init__(self, **kwargs):
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from application.api.dependencies.db import Base
+
+
+class RollupMixin:
+    """
+    Columns shared by the pre-aggregated OHLCV tables.
+
+    `timestamp` is the start of the bucket and `bars` the number of source
+    bars folded into it.
+    """
+
+    ticker = Column(String, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)
+    bars = Column(Integer)
+
+
+class StockPriceHourly(Base, RollupMixin):
+    """
+    Hourly bars aggregated from stock_prices
+    """
+
+    __tablename__ = "stock_prices_1h"
+
+    width = timedelta(hours=1)
+
+
+class StockPriceDaily(Base, RollupMixin):
+    """
+    Daily bars aggregated from stock_prices_1h
+    """
+
+    __tablename__ = "stock_prices_1d"
+
+    width = timedelta(days=1)
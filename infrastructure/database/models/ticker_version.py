@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, String
+
+from application.api.dependencies.db import Base
+
+
+class TickerVersion(Base):
+    """
+    Write watermark of a ticker, bumped in the transaction of every write
+    to its bars.
+
+    `version` moves on any write, `history_version` only on writes that
+    reach back to or before `last_timestamp` (updates, deletes, backfills),
+    so readers can tell appends from rewritten history without looking at
+    the bars.
+    """
+
+    __tablename__ = "ticker_versions"
+
+    ticker = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    history_version = Column(BigInteger, nullable=False, default=0)
+    last_timestamp = Column(DateTime(timezone=True))
+    written_from = Column(DateTime(timezone=True))
+    updated = Column(DateTime(timezone=True))
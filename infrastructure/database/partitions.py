@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from sqlalchemy import text
+
+from application.config.settings import settings
+from infrastructure.database.connection import async_session_maker
+
+
+log = logging.getLogger("partitions")
+
+PARENT = "stock_prices"
+
+# Serialises partition DDL between processes writing the same new month.
+_LOCK_KEY = 0x5350_4152  # "SPAR"
+
+# Months known to have a partition in this process; they never go away
+# except through `detach_partition`. Other processes only notice a detach
+# when they restart.
+_known: set[datetime] = set()
+
+
+def month_start(timestamp: datetime) -> datetime:
+    """
+    First instant of the UTC month holding `timestamp`
+    """
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def _months_ahead(now: datetime, count: int) -> list[datetime]:
+    months = [month_start(now)]
+    for _ in range(count):
+        months.append(next_month(months[-1]))
+    return months
+
+
+# Candidate partition names not currently attached to the parent; a table
+# left behind by `detach_partition` does not count.
+_UNATTACHED = text(
+    "SELECT name FROM unnest(CAST(:names AS text[])) AS name "
+    "WHERE NOT EXISTS (SELECT FROM pg_inherits "
+    "WHERE inhrelid = to_regclass(name) "
+    "AND inhparent = CAST(:parent AS regclass))"
+)
+
+
+async def _unattached(connection, names) -> list[str]:
+    result = await connection.execute(
+        _UNATTACHED, {"names": list(names), "parent": PARENT}
+    )
+    return list(result.scalars())
+
+
+@asynccontextmanager
+async def _autocommit():
+    """
+    Connection of its own whose statements commit one by one, so DDL
+    holds its locks only for as long as it runs
+    """
+
+    engine = async_session_maker().kw["bind"]
+    async with engine.connect() as connection:
+        yield await connection.execution_options(isolation_level="AUTOCOMMIT")
+
+
+async def ensure_partitions(timestamps: Iterable[datetime]) -> None:
+    """
+    Create the monthly partitions `timestamps` fall into, if missing.
+
+    Partitions for the current month and the next PARTITION_MONTHS_AHEAD
+    months are created on the same occasion, so the DDL path is normally
+    taken only when backfilling old data. Each partition is created and
+    committed on a connection of its own, holding the ACCESS EXCLUSIVE
+    lock on `stock_prices` only for that statement.
+
+    Call before the load transaction touches `stock_prices`: the DDL
+    waits for every transaction holding a lock on it, the caller's
+    included.
+    """
+
+    months = {month_start(timestamp) for timestamp in timestamps}
+    months.update(
+        _months_ahead(
+            datetime.now(timezone.utc), settings.partition_months_ahead
+        )
+    )
+    missing = sorted(months - _known)
+    if not missing:
+        return
+
+    names = [partition_name(month) for month in missing]
+    async with _autocommit() as connection:
+        absent = await _unattached(connection, names)
+        if not absent:
+            _known.update(missing)
+            return
+        await connection.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY}
+        )
+        try:
+            # Another process may have created some while we waited.
+            absent = await _unattached(connection, absent)
+            for month, name in zip(missing, names):
+                if name in absent:
+                    await connection.execute(
+                        text(
+                            f"CREATE TABLE {name} PARTITION OF {PARENT} "
+                            f"FOR VALUES FROM ('{month.isoformat()}') "
+                            f"TO ('{next_month(month).isoformat()}')"
+                        )
+                    )
+                    log.info("Created partition %s", name)
+                _known.add(month)
+        finally:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY}
+            )
+
+
+async def detach_partition(month: datetime) -> str:
+    """
+    Detach a month from `stock_prices`, leaving it as a standalone table
+    renamed with a `_detached_<time>` suffix, and return the new name.
+
+    DETACH ... CONCURRENTLY only touches catalog entries, so it takes the
+    same time whatever the size of the month, and it does not block
+    readers or writers of other partitions. The rename frees the name for
+    a new, empty partition should the month be written to again. Rollup
+    rows for the month are kept. Cached reads catch up as their TTLs
+    expire.
+    """
+
+    month = month_start(month)
+    name = partition_name(month)
+    detached = f"{name}_detached_{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    async with _autocommit() as connection:
+        await connection.execute(
+            text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} CONCURRENTLY")
+        )
+        await connection.execute(
+            text(f"ALTER TABLE {name} RENAME TO {detached}")
+        )
+    _known.discard(month)
+    log.info("Detached partition %s as %s", name, detached)
+    return detached
+
+
+async def _main(arguments: argparse.Namespace):
+    if arguments.command == "detach":
+        await detach_partition(
+            datetime.strptime(arguments.month, "%Y-%m").replace(
+                tzinfo=timezone.utc
+            )
+        )
+        return
+
+    await ensure_partitions([])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Manage stock_prices partitions"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "ensure",
+        help="Create partitions up to PARTITION_MONTHS_AHEAD months ahead",
+    )
+    detach = commands.add_parser("detach", help="Detach one month")
+    detach.add_argument("month", help="Month to detach, as YYYY-MM")
+    asyncio.run(_main(parser.parse_args()))
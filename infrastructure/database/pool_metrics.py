@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import LRUCache
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    statement_cache_hits: int = 0
+    statements_prepared: int = 0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times how long checkouts wait for a connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.checkouts += 1
+            self.stats.wait_seconds_total += waited
+            self.stats.wait_seconds_max = max(
+                self.stats.wait_seconds_max, waited
+            )
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting across it.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class CountingStatementCache(LRUCache):
+    """
+    The asyncpg dialect's prepared statement cache, counting its use.
+
+    The dialect checks for a statement with `in` and stores it after
+    preparing, so found lookups are hits and writes are prepares.
+    """
+
+    def __init__(self, capacity: int, stats: PoolStats):
+        super().__init__(capacity)
+        self.stats = stats
+
+    def __contains__(self, key) -> bool:
+        found = key in self._data
+        if found:
+            self.stats.statement_cache_hits += 1
+        return found
+
+    def __setitem__(self, key, value):
+        self.stats.statements_prepared += 1
+        super().__setitem__(key, value)
+
+
+_engines: dict[str, AsyncEngine] = {}
+
+
+def instrument(name: str, engine: AsyncEngine) -> AsyncEngine:
+    """
+    Report `engine` under `name` in `pool_snapshot`
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def count_statements(dbapi_connection, connection_record):
+        cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        stats = getattr(engine.pool, "stats", None)
+        if cache is not None and stats is not None:
+            dbapi_connection._prepared_statement_cache = (
+                CountingStatementCache(cache.capacity, stats)
+            )
+
+    _engines[name] = engine
+    return engine
+
+
+def pool_snapshot() -> dict:
+    """
+    Occupancy and wait counters of every instrumented engine's pool
+    """
+
+    snapshot = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        entry = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+        stats = getattr(pool, "stats", None)
+        if stats is not None:
+            lookups = stats.statement_cache_hits + stats.statements_prepared
+            entry.update(
+                asdict(stats),
+                wait_seconds_mean=(
+                    stats.wait_seconds_total / stats.checkouts
+                    if stats.checkouts
+                    else 0.0
+                ),
+                statement_cache_hit_ratio=(
+                    stats.statement_cache_hits / lookups if lookups else None
+                ),
+            )
+        snapshot[name] = entry
+    return snapshot
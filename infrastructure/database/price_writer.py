@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from collections.abc import Sequence
+from sqlalchemy import Boolean, Table, func, literal_column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from application.config.settings import settings
+from infrastructure.database.compact import bar_id, symbol_map, touch_symbols
+from infrastructure.database.models.stock_bar import StockBar
+from infrastructure.database.models.stock_price import StockPrice
+from infrastructure.database.partitions import ensure_partitions
+from infrastructure.database.rollups import refresh_rollups
+
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+def _parameters_per_row(table: Table, columns: Sequence[str]) -> int:
+    # Columns with client-side defaults (id, created) are bound too.
+    compiled = insert(table).compile(
+        dialect=postgresql.dialect(), column_keys=list(columns)
+    )
+    return len(compiled.params)
+
+
+# SQLAlchemy splits an executemany INSERT once it would bind more than
+# insertmanyvalues_max_parameters (just under asyncpg's 32767). Chunks of
+# at most this many rows therefore go out as a single statement in either
+# layout.
+_PARAMETERS_PER_ROW = max(
+    _parameters_per_row(StockPrice.__table__, ("ticker", "timestamp", *OHLCV)),
+    _parameters_per_row(
+        StockBar.__table__, ("symbol_id", "timestamp", *OHLCV)
+    ),
+)
+MAX_STATEMENT_ROWS = (
+    postgresql.dialect().insertmanyvalues_max_parameters // _PARAMETERS_PER_ROW
+)
+
+# A row that was inserted rather than updated has no locking transaction.
+_INSERTED = literal_column("xmax = 0", Boolean).label("inserted")
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    ids: list[UUID] = field(default_factory=list)
+
+
+async def upsert_prices(
+    session: AsyncSession,
+    records: Sequence[dict],
+    overwrite: bool = True,
+    returning: bool = False,
+) -> UpsertResult | None:
+    """
+    Write price records keyed on (ticker, timestamp) in the caller's
+    transaction.
+
+    Existing bars are overwritten, or left alone when `overwrite` is false.
+    Records go to stock_prices or, with COMPACT_STORAGE, to stock_bars, and
+    the rollup buckets they touch are refreshed. The caller commits and
+    invalidates caches. Missing partitions are created first, outside the
+    caller's transaction, which must not have touched stock_prices yet
+    unless the months are known to exist.
+
+    With `returning`, all records go out as one INSERT whose RETURNING
+    clause reports the id of each written row and whether it was new.
+    """
+
+    if not records:
+        return UpsertResult() if returning else None
+
+    if settings.compact_storage:
+        ids = await symbol_map.ids(
+            session, {record["ticker"] for record in records}, create=True
+        )
+        rows = [
+            {
+                "symbol_id": ids[record["ticker"]],
+                "timestamp": record["timestamp"],
+                "open": record["open"],
+                "high": record["high"],
+                "low": record["low"],
+                "close": record["close"],
+                "volume": round(record["volume"]),
+            }
+            for record in records
+        ]
+        statement = insert(StockBar.__table__)
+        key = ["symbol_id", "timestamp"]
+        written = (StockBar.symbol_id, StockBar.timestamp)
+        touched = {}
+    else:
+        await ensure_partitions([record["timestamp"] for record in records])
+        rows = [
+            {"ticker": record["ticker"], "timestamp": record["timestamp"]}
+            | {column: record[column] for column in OHLCV}
+            for record in records
+        ]
+        statement = insert(StockPrice.__table__)
+        key = ["ticker", "timestamp"]
+        written = (StockPrice.id,)
+        touched = {"updated": func.now()}
+
+    if overwrite:
+        statement = statement.on_conflict_do_update(
+            index_elements=key,
+            set_={column: statement.excluded[column] for column in OHLCV}
+            | touched,
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=key)
+
+    result = None
+    if returning:
+        statement = statement.returning(*written, _INSERTED)
+        statement = statement.execution_options(
+            insertmanyvalues_page_size=len(rows)
+        )
+        result = UpsertResult()
+        for *key_values, inserted in await session.execute(statement, rows):
+            if inserted:
+                result.inserted += 1
+            else:
+                result.updated += 1
+            result.ids.append(
+                bar_id(*key_values)
+                if settings.compact_storage
+                else key_values[0]
+            )
+    else:
+        await session.execute(statement, rows)
+
+    if settings.compact_storage:
+        await touch_symbols(session, ids.values())
+    await refresh_rollups(
+        session,
+        [(record["ticker"], record["timestamp"]) for record in records],
+    )
+    return result
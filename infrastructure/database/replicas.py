@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from application.config.settings import settings
+from infrastructure.database.connection import replica_session_makers
+
+
+log = logging.getLogger("replicas")
+
+# Seconds of replay lag (zero when everything received has been replayed,
+# since the last replayed commit can be old on an idle primary), and the
+# replayed WAL position in bytes, comparable with `WRITE_LSN_QUERY`.
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) "
+    "END, pg_wal_lsn_diff(pg_last_wal_replay_lsn(), '0/0')"
+)
+
+# WAL position in bytes on the primary past every commit made so far.
+WRITE_LSN_QUERY = text(
+    "SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), '0/0')"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    session_maker: Callable
+    healthy: bool = False
+    lag: float | None = None
+    replayed: int = -1
+    checked_at: float = 0.0
+
+
+@dataclass
+class ReplicaStats:
+    replica_reads: int = 0
+    primary_fallbacks: int = 0
+    failed_checks: int = 0
+
+
+@dataclass
+class ReplicaPool:
+    """
+    Round-robin over the read replicas that passed their last health check.
+
+    Replicas are checked lazily, at most once every `check_interval`
+    seconds, and count as healthy when they answer within `check_timeout`
+    with a replay lag under `max_lag`.
+    """
+
+    replicas: list[Replica]
+    check_interval: float
+    check_timeout: float
+    max_lag: float
+    clock: Callable[[], float] = time.time
+    stats: ReplicaStats = field(default_factory=ReplicaStats)
+    _turn: int = 0
+
+    async def _check(self, replica: Replica) -> None:
+        replica.checked_at = self.clock()
+        try:
+            async with replica.session_maker() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LAG_QUERY), self.check_timeout
+                )
+                lag, replayed = result.one()
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as exc:
+            if replica.healthy:
+                log.warning("Replica %s is down: %r", replica.name, exc)
+            replica.healthy = False
+            self.stats.failed_checks += 1
+            return
+
+        replica.lag = float(lag or 0)
+        replica.replayed = int(replayed if replayed is not None else -1)
+        healthy = replica.lag <= self.max_lag
+        if healthy != replica.healthy:
+            log.warning(
+                "Replica %s is %s (lag %.1fs)",
+                replica.name,
+                "back" if healthy else "lagging",
+                replica.lag,
+            )
+        replica.healthy = healthy
+
+    async def pick(self, written_lsn: int | None = None):
+        """
+        Session maker of a healthy replica, or None to use the primary.
+
+        With `written_lsn`, the primary's WAL position after the client's
+        last write, only replicas known to have replayed that far qualify,
+        so a client reads its own writes.
+        """
+
+        now = self.clock()
+        due = [
+            replica
+            for replica in self.replicas
+            if now - replica.checked_at >= self.check_interval
+        ]
+        if due:
+            await asyncio.gather(*(self._check(replica) for replica in due))
+
+        candidates = [
+            replica
+            for replica in self.replicas
+            if replica.healthy
+            and (written_lsn is None or replica.replayed >= written_lsn)
+        ]
+        if not candidates:
+            self.stats.primary_fallbacks += 1
+            return None
+        self._turn += 1
+        self.stats.replica_reads += 1
+        return candidates[self._turn % len(candidates)].session_maker
+
+    def mark_down(self, session_maker) -> None:
+        """
+        Take a replica out of rotation until its next successful check
+        """
+
+        for replica in self.replicas:
+            if replica.session_maker is session_maker:
+                replica.healthy = False
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+_replica_pool = None
+
+
+def replica_pool() -> ReplicaPool:
+    global _replica_pool
+    if _replica_pool is None:
+        _replica_pool = ReplicaPool(
+            replicas=[
+                Replica(name, session_maker)
+                for name, session_maker in replica_session_makers()
+            ],
+            check_interval=settings.replica_check_interval_seconds,
+            check_timeout=settings.replica_check_timeout_seconds,
+            max_lag=settings.replica_max_lag_seconds,
+        )
+    return _replica_pool
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+from fastapi import HTTPException
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from uuid import UUID
+
+from application.api.dependencies.db import async_db_session
+from infrastructure.database.models.ingestion_job import IngestionJob
+
+
+log = logging.getLogger("repository.ingestion_job")
+
+
+@dataclass
+class IngestionJobRepository:
+    """
+    Job records shared by the API, which creates and reads them, and the
+    Celery tasks, which move them along. Every change is committed at
+    once so progress is visible while the job runs.
+    """
+
+    db: AsyncSession
+
+    async def create_job(
+        self,
+        kind: str,
+        source: str | None = None,
+        total: int = 0,
+    ) -> IngestionJob:
+        """Create a queued job"""
+
+        job = IngestionJob(kind=kind, source=source, total=total)
+        try:
+            self.db.add(job)
+            await self.db.commit()
+            await self.db.refresh(job)
+            return job
+
+        except SQLAlchemyError as exc:
+            log.error("Error creating ingestion job: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database creation failed",
+            ) from exc
+
+    async def get_job(self, job_id: UUID) -> IngestionJob:
+        """Get ingestion job"""
+
+        job = await self.db.get(IngestionJob, job_id, populate_existing=True)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No ingestion job found",
+            )
+        return job
+
+    async def list_jobs(
+        self,
+        limit: int,
+        state: str | None = None,
+    ) -> list[IngestionJob]:
+        """List the most recent ingestion jobs, newest first"""
+
+        query = select(IngestionJob)
+        if state is not None:
+            query = query.where(IngestionJob.status == state)
+        try:
+            result = await self.db.execute(
+                query.order_by(IngestionJob.created.desc()).limit(limit)
+            )
+            return list(result.scalars())
+
+        except SQLAlchemyError as exc:
+            log.error("Error listing ingestion jobs: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+    async def _update(self, job_id: UUID, **values) -> None:
+        await self.db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(updated=func.now(), **values)
+        )
+        await self.db.commit()
+
+    async def start_job(
+        self,
+        job_id: UUID,
+        total: int,
+        parts_total: int,
+    ) -> None:
+        """Mark a job running once its work has been split into parts"""
+
+        await self._update(
+            job_id,
+            status="running",
+            total=total,
+            parts_total=parts_total,
+            started=func.coalesce(IngestionJob.started, func.now()),
+        )
+
+    async def record_part(
+        self,
+        job_id: UUID,
+        processed: int,
+        counts: Mapping[str, int] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """
+        Add a finished part to the totals, in one statement so concurrent
+        subtasks never lose each other's counts. `counts` are keyed on
+        IngestionJob.COUNTS.
+        """
+
+        counts = counts or {}
+        failed = error is not None
+        await self._update(
+            job_id,
+            **{
+                name: getattr(IngestionJob, name) + counts.get(name, 0)
+                for name in IngestionJob.COUNTS
+            },
+            processed=IngestionJob.processed + processed,
+            parts_done=IngestionJob.parts_done + 1,
+            parts_failed=IngestionJob.parts_failed + int(failed),
+            error=error if failed else IngestionJob.error,
+        )
+
+    async def finish_job(self, job_id: UUID) -> None:
+        """Close a job, failed if any of its parts failed"""
+
+        await self._update(
+            job_id,
+            status=case(
+                (IngestionJob.parts_failed > 0, "failed"),
+                else_="succeeded",
+            ),
+            finished=func.now(),
+        )
+
+    async def fail_job(self, job_id: UUID, error: str) -> None:
+        """Close a job that could not be split or dispatched"""
+
+        await self._update(
+            job_id, status="failed", error=error, finished=func.now()
+        )
+
+
+async def update_job(update: Callable[[IngestionJobRepository], Awaitable]):
+    """
+    Apply `update` to the job repository in a session of its own, for
+    the workers moving jobs along outside of a request
+    """
+
+    async with async_db_session() as session:
+        return await update(IngestionJobRepository(session))
@@ -2,21 +2,124 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import functools
+import inspect
 import logging
-from datetime import datetime
+import numpy as np
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Interval,
+    Row,
+    Select,
+    String,
+    and_,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    true,
+    tuple_,
+    union,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from uuid import UUID
 
 from application.api.schemas.stock_price import StockPriceCreate
+from application.config.settings import settings
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.cache.read_through import read_through
+from infrastructure.database.compact import (
+    bar_id,
+    parse_bar_id,
+    symbol_map,
+    touch_symbols,
+)
+from infrastructure.database.models.stock_bar import StockBar, price_model
 from infrastructure.database.models.stock_price import StockPrice
+from infrastructure.database.models.ticker_version import TickerVersion
+from infrastructure.database.partitions import ensure_partitions
+from infrastructure.database.price_writer import (
+    MAX_STATEMENT_ROWS,
+    OHLCV,
+    UpsertResult,
+    upsert_prices,
+)
+from infrastructure.database.rollups import (
+    CANDLE_ORIGIN,
+    bucket_start,
+    first,
+    refresh_rollups,
+    rollup_for,
+)
 
 
 log = logging.getLogger("repository.stock_price")
 
+STREAM_CHUNK_SIZE = 5000
+
+# stock_prices, or the stock_prices_compact view over stock_bars when
+# COMPACT_STORAGE is on; both expose the same columns to every read below.
+Price = price_model()
+
+# List reads select just these columns and return plain rows: no identity
+# map, no audit columns and nothing for the session to track.
+PRICE_COLUMNS = (
+    Price.id,
+    Price.ticker,
+    Price.timestamp,
+    Price.open,
+    Price.high,
+    Price.low,
+    Price.close,
+    Price.volume,
+)
+
+
+def _ticker_cached(tickers_of: Callable[[dict], Sequence[str] | None]):
+    """
+    Serve a ticker-scoped read through the query caches.
+
+    The key is the method name plus its bound arguments; `tickers_of` picks
+    the tickers the result depends on so writes to them invalidate it. Only
+    successful results are stored, a raised 404 is not.
+    """
+
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(list(bound.arguments.items())[1:])
+            tickers = tickers_of(arguments)
+            if not tickers:
+                return await method(self, *args, **kwargs)
+
+            key = (method.__name__,) + tuple(
+                tuple(value) if isinstance(value, list) else value
+                for value in arguments.values()
+            )
+            return await read_through(
+                key,
+                tickers,
+                lambda: method(self, *args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorate
+
 
 @dataclass
 class StockPriceRepository:
@@ -26,10 +129,18 @@ class StockPriceRepository:
         self,
         skip: int = 0,
         limit: int = 100,
-    ) -> list[StockPrice]:
-        """Retrieve stock prices"""
+        after: tuple[str, datetime] | None = None,
+    ) -> list[Row]:
+        """
+        Retrieve stock prices ordered by (ticker, timestamp).
 
-        statement = select(StockPrice).offset(skip).limit(limit)
+        `after` resumes right past a previously served row using the unique
+        (ticker, timestamp) index; `skip` is kept for older clients only.
+        """
+
+        statement = _order_by_key(select(*PRICE_COLUMNS), after).limit(limit)
+        if after is None and skip:
+            statement = statement.offset(skip)
 
         try:
             result = await self.db.execute(statement)
@@ -41,9 +152,9 @@ class StockPriceRepository:
                 detail="Database query failed",
             ) from exc
 
-        prices = result.scalars().all()
+        prices = result.all()
 
-        if not prices:
+        if not prices and after is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No stock prices found",
@@ -51,31 +162,337 @@ class StockPriceRepository:
 
         return list(prices)
 
+    @_ticker_cached(lambda arguments: arguments["tickers"])
     async def get_stock_prices_by_date_range(
         self,
         start: datetime | None = None,
         end: datetime | None = None,
-    ) -> list[StockPrice]:
-        """Retrieve stock prices by date range"""
-
-        statement = select(StockPrice)
-
+        limit: int | None = None,
+        after: tuple[str, datetime] | None = None,
+        tickers: list[str] | None = None,
+        descending: bool = False,
+    ) -> list[Row]:
+        """
+        Retrieve stock prices by date range, optionally for a set of tickers.
+
+        With tickers given each one is an index range scan over
+        ix_stock_prices_ticker_timestamp instead of a heap scan of the window.
+        `start` and `end` also prune the monthly partitions outside them.
+        """
+
+        statement = _order_by_key(select(*PRICE_COLUMNS), after, descending)
+
+        if tickers:
+            statement = statement.where(Price.ticker.in_(tickers))
         if start:
-            statement = statement.where(StockPrice.timestamp >= start)
+            statement = statement.where(Price.timestamp >= start)
         if end:
-            statement = statement.where(StockPrice.timestamp <= end)
+            statement = statement.where(Price.timestamp <= end)
+        if limit is not None:
+            statement = statement.limit(limit)
 
         result = await self.db.execute(statement)
-        prices = result.scalars().all()
+        prices = result.all()
         return list(prices)
 
+    async def stream_stock_prices(
+        self,
+        tickers: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: tuple[str, datetime] | None = None,
+        descending: bool = False,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream stock prices in chunks through a server-side cursor.
+
+        Only the price columns are selected and no ORM objects are built, so
+        memory is bounded by `chunk_size` whatever the size of the result.
+        """
+
+        statement = _order_by_key(select(*PRICE_COLUMNS), after, descending)
+
+        if tickers:
+            statement = statement.where(Price.ticker.in_(tickers))
+        if start:
+            statement = statement.where(Price.timestamp >= start)
+        if end:
+            statement = statement.where(Price.timestamp <= end)
+
+        result = await self.db.stream(
+            statement.execution_options(yield_per=chunk_size),
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    @_ticker_cached(lambda arguments: [arguments["ticker"]])
+    async def get_stock_price_columns(
+        self,
+        ticker: str,
+        after: datetime | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Fetch a ticker's series as one array per column.
+
+        Timestamps come back from Postgres as epoch microseconds so the whole
+        result is numeric and lands in NumPy without building row objects.
+        """
+
+        statement = (
+            select(
+                cast(
+                    func.extract("epoch", Price.timestamp) * 1_000_000,
+                    BigInteger,
+                ),
+                Price.open,
+                Price.high,
+                Price.low,
+                Price.close,
+                Price.volume,
+            )
+            .where(Price.ticker == ticker)
+            .order_by(Price.timestamp)
+        )
+        if after is not None:
+            statement = statement.where(Price.timestamp > after)
+
+        try:
+            result = await self.db.execute(statement)
+        except SQLAlchemyError as exc:
+            log.error("Error fetching stock price columns: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+        rows = result.all()
+
+        if not rows and after is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No stock prices found",
+            )
+
+        matrix = np.array(rows, dtype=np.float64).reshape(-1, 6).T
+        return {
+            "timestamp": matrix[0].astype(np.int64),
+            "open": matrix[1],
+            "high": matrix[2],
+            "low": matrix[3],
+            "close": matrix[4],
+            "volume": matrix[5],
+        }
+
+    @_ticker_cached(lambda arguments: [arguments["ticker"]])
+    async def get_candles(
+        self,
+        ticker: str,
+        interval: timedelta,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Row]:
+        """
+        Aggregate a ticker's bars into OHLCV candles inside Postgres.
+
+        Open and close are the first and last values of each bucket, so only
+        the aggregated rows ever leave the database. Intervals made of whole
+        hours or days read the rollup tables, see `_candle_source`.
+        """
+
+        source = _candle_source(ticker, interval, start, end)
+        bucket = func.date_bin(
+            literal(interval, Interval),
+            source.c.timestamp,
+            literal(CANDLE_ORIGIN, DateTime(timezone=True)),
+        ).label("timestamp")
+        statement = (
+            select(
+                source.c.ticker,
+                bucket,
+                first(source.c.open, source.c.timestamp).label("open"),
+                func.max(source.c.high).label("high"),
+                func.min(source.c.low).label("low"),
+                first(source.c.close, source.c.timestamp.desc()).label(
+                    "close"
+                ),
+                func.sum(source.c.volume).label("volume"),
+            )
+            .group_by(source.c.ticker, bucket)
+            .order_by(bucket)
+        )
+
+        try:
+            result = await self.db.execute(statement)
+        except SQLAlchemyError as exc:
+            log.error("Error aggregating candles: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+        return list(result.all())
+
+    @_ticker_cached(lambda arguments: arguments["tickers"])
+    async def get_freshness(self, tickers: list[str]) -> Row:
+        """
+        Summarise how current the bars of some tickers are.
+
+        Returns the tickers' summed write versions, the newest write and the
+        newest bar ingested, all None for unknown tickers. One primary key
+        probe per ticker, whatever the length of the history.
+        """
+
+        statement = select(
+            func.sum(TickerVersion.version).label("version"),
+            func.sum(TickerVersion.history_version).label("history_version"),
+            func.max(TickerVersion.updated).label("last_modified"),
+            func.max(TickerVersion.last_timestamp).label("last_ingested"),
+        ).where(TickerVersion.ticker.in_(tickers))
+
+        try:
+            result = await self.db.execute(statement)
+        except SQLAlchemyError as exc:
+            log.error("Error fetching stock price freshness: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+        return result.one()
+
+    async def get_latest_prices(self, tickers: list[str]) -> list[Row]:
+        """
+        Newest bar of each ticker, one index probe per ticker
+        """
+
+        statement = (
+            select(
+                Price.ticker,
+                Price.timestamp,
+                Price.open,
+                Price.high,
+                Price.low,
+                Price.close,
+                Price.volume,
+            )
+            .where(Price.ticker.in_(tickers))
+            .distinct(Price.ticker)
+            .order_by(Price.ticker, Price.timestamp.desc())
+        )
+
+        try:
+            result = await self.db.execute(statement)
+        except SQLAlchemyError as exc:
+            log.error("Error fetching latest stock prices: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+        return list(result.all())
+
+    @_ticker_cached(
+        lambda arguments: None if arguments["ids"] else arguments["tickers"]
+    )
+    async def get_stock_prices_batch(
+        self,
+        tickers: list[str],
+        ids: list[UUID] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 1000,
+        descending: bool = False,
+    ) -> list[Row]:
+        """
+        Fetch up to `limit` rows per ticker plus any rows by id in one query.
+
+        Each ticker drives a LATERAL index range scan that stops after
+        `limit` rows; ids are looked up in the same statement and UNION
+        drops rows matched both ways. Rows come back ordered by ticker.
+        """
+
+        requested = (
+            func.unnest(literal(tickers, ARRAY(String)))
+            .table_valued("ticker")
+            .render_derived(name="requested")
+        )
+        window = select(*PRICE_COLUMNS).where(
+            Price.ticker == requested.c.ticker
+        )
+        if start:
+            window = window.where(Price.timestamp >= start)
+        if end:
+            window = window.where(Price.timestamp <= end)
+        window = (
+            window.order_by(
+                Price.timestamp.desc() if descending else Price.timestamp
+            )
+            .limit(limit)
+            .lateral("bars")
+        )
+        statement = select(window).select_from(requested).join(window, true())
+
+        if ids:
+            statement = union(
+                statement,
+                select(*PRICE_COLUMNS).where(await self._id_filter(ids)),
+            )
+        statement = select(statement.subquery("batch"))
+        timestamp = statement.selected_columns.timestamp
+        statement = statement.order_by(
+            statement.selected_columns.ticker,
+            timestamp.desc() if descending else timestamp,
+        )
+
+        try:
+            result = await self.db.execute(statement)
+        except SQLAlchemyError as exc:
+            log.error("Error fetching stock price batch: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database query failed",
+            ) from exc
+
+        return list(result.all())
+
+    async def _id_filter(self, ids: list[UUID]):
+        """
+        Condition matching price ids in either storage layout.
+
+        Compact ids decode to (ticker, timestamp) so the lookup uses the
+        primary key instead of computing every row's id.
+        """
+
+        if not settings.compact_storage:
+            return Price.id.in_(ids)
+
+        keys = []
+        for value in ids:
+            parsed = parse_bar_id(value)
+            if parsed is None:
+                continue
+            ticker = await symbol_map.ticker(self.db, parsed[0])
+            if ticker is not None:
+                keys.append((ticker, parsed[1]))
+        return tuple_(Price.ticker, Price.timestamp).in_(keys)
+
     async def get_stock_price_by_id(
         self,
         stock_price_id: UUID,
     ) -> StockPrice:
         """Get stock price"""
 
-        statement = select(StockPrice).where(StockPrice.id == stock_price_id)
+        statement = (
+            select(Price)
+            .where(await self._id_filter([stock_price_id]))
+            .execution_options(populate_existing=True)
+        )
 
         try:
             result = await self.db.execute(statement)
@@ -97,13 +514,24 @@ class StockPriceRepository:
 
         return price
 
+    @_ticker_cached(lambda arguments: [arguments["ticker"]])
     async def get_stock_prices_by_ticker(
         self,
         ticker: str,
-    ) -> list[StockPrice]:
+        limit: int | None = None,
+        after: datetime | None = None,
+    ) -> list[Row]:
         """Get stock prices by ticker symbol"""
 
-        statement = select(StockPrice).where(StockPrice.ticker == ticker)
+        statement = (
+            select(*PRICE_COLUMNS)
+            .where(Price.ticker == ticker)
+            .order_by(Price.timestamp)
+        )
+        if after is not None:
+            statement = statement.where(Price.timestamp > after)
+        if limit is not None:
+            statement = statement.limit(limit)
 
         try:
             result = await self.db.execute(statement)
@@ -115,9 +543,9 @@ class StockPriceRepository:
                 detail="Database query failed",
             ) from exc
 
-        prices = result.scalars().all()
+        prices = result.all()
 
-        if not prices:
+        if not prices and after is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No stock prices found",
@@ -131,12 +559,19 @@ class StockPriceRepository:
     ) -> StockPrice:
         """Create new stock price"""
 
+        if settings.compact_storage:
+            return await self._write_bar(stock_price.model_dump())
+
         price = StockPrice(**stock_price.model_dump())
 
         try:
+            await ensure_partitions([price.timestamp])
             self.db.add(price)
+            await self.db.flush()
+            await refresh_rollups(self.db, [(price.ticker, price.timestamp)])
             await self.db.commit()
             await self.db.refresh(price)
+            await invalidate_tickers([price.ticker])
             return price
 
         except SQLAlchemyError as exc:
@@ -147,6 +582,42 @@ class StockPriceRepository:
                 detail="Database creation failed",
             ) from exc
 
+    async def upsert_stock_prices(self, bars: list[dict]) -> UpsertResult:
+        """
+        Insert or overwrite many validated bars in one transaction.
+
+        Bars are written BULK_WRITE_CHUNK_SIZE at a time, each chunk as a
+        single INSERT ... ON CONFLICT whose RETURNING clause tells inserted
+        rows from updated ones.
+        """
+
+        size = max(1, min(settings.bulk_write_chunk_size, MAX_STATEMENT_ROWS))
+        total = UpsertResult()
+        try:
+            if not settings.compact_storage:
+                # Before the first chunk locks stock_prices in this
+                # transaction.
+                await ensure_partitions([bar["timestamp"] for bar in bars])
+            for offset in range(0, len(bars), size):
+                result = await upsert_prices(
+                    self.db, bars[offset : offset + size], returning=True
+                )
+                total.inserted += result.inserted
+                total.updated += result.updated
+                total.ids += result.ids
+            await self.db.commit()
+
+        except SQLAlchemyError as exc:
+            log.error("Error writing stock prices in bulk: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Bulk write failed",
+            ) from exc
+
+        await invalidate_tickers(bar["ticker"] for bar in bars)
+        return total
+
     async def delete_stock_price(self, stock_price_id: UUID) -> bool:
         """Delete stock price"""
 
@@ -158,8 +629,14 @@ class StockPriceRepository:
                 detail="No stock price found",
             )
 
-        await self.db.delete(price)
+        if settings.compact_storage:
+            await self._delete_bar(price)
+        else:
+            await self.db.delete(price)
+        await self.db.flush()
+        await refresh_rollups(self.db, [(price.ticker, price.timestamp)])
         await self.db.commit()
+        await invalidate_tickers([price.ticker])
         return True
 
     async def update_stock_price(
@@ -169,6 +646,13 @@ class StockPriceRepository:
     ) -> StockPrice:
         """Update stock price"""
 
+        if (
+            stock_price_payload.get("timestamp")
+            and not settings.compact_storage
+        ):
+            # Before reading the price locks stock_prices in this transaction.
+            await ensure_partitions([stock_price_payload["timestamp"]])
+
         price = await self.get_stock_price_by_id(stock_price_id)
 
         if not price:
@@ -177,11 +661,28 @@ class StockPriceRepository:
                 detail="No stock price found",
             )
 
+        previous = (price.ticker, price.timestamp)
+
+        if settings.compact_storage:
+            values = {
+                column: getattr(price, column)
+                for column in ("ticker", "timestamp", *OHLCV)
+            }
+            return await self._write_bar(
+                values | stock_price_payload, replace=price
+            )
+
         try:
             for field, value in stock_price_payload.items():
                 setattr(price, field, value)
+            price.update()
+            await self.db.flush()
+            await refresh_rollups(
+                self.db, [previous, (price.ticker, price.timestamp)]
+            )
             await self.db.commit()
             await self.db.refresh(price)
+            await invalidate_tickers([previous[0], price.ticker])
             return price
 
         except SQLAlchemyError as exc:
@@ -191,3 +692,165 @@ class StockPriceRepository:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Stock market update failed",
             ) from exc
+
+    async def _delete_bar(self, price) -> None:
+        """Remove the stock_bars row behind a compact price"""
+
+        symbol_id, timestamp = parse_bar_id(price.id)
+        await self.db.execute(
+            delete(StockBar).where(
+                StockBar.symbol_id == symbol_id,
+                StockBar.timestamp == timestamp,
+            )
+        )
+        await touch_symbols(self.db, [symbol_id])
+        self.db.expunge(price)
+
+    async def _write_bar(self, values: dict, replace=None):
+        """
+        Insert a bar in the compact layout, replacing the `replace` price.
+
+        The view behind compact prices cannot be written to, so the bar is
+        written to stock_bars and read back under its (possibly new) id.
+        """
+
+        keys = [(values["ticker"], values["timestamp"])]
+        try:
+            ids = await symbol_map.ids(
+                self.db, [values["ticker"]], create=True
+            )
+            if replace is not None:
+                keys.append((replace.ticker, replace.timestamp))
+                await self._delete_bar(replace)
+            await self.db.execute(
+                insert(StockBar).values(
+                    symbol_id=ids[values["ticker"]],
+                    timestamp=values["timestamp"],
+                    open=values["open"],
+                    high=values["high"],
+                    low=values["low"],
+                    close=values["close"],
+                    volume=round(values["volume"]),
+                )
+            )
+            await touch_symbols(self.db, ids.values())
+            await refresh_rollups(self.db, keys)
+            await self.db.commit()
+
+        except SQLAlchemyError as exc:
+            log.error("Error writing stock bar: %s", exc)
+
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database write failed",
+            ) from exc
+
+        await invalidate_tickers({ticker for ticker, _ in keys})
+        return await self.get_stock_price_by_id(
+            bar_id(ids[values["ticker"]], values["timestamp"])
+        )
+
+
+def _order_by_key(
+    statement: Select,
+    after: tuple[str, datetime] | None = None,
+    descending: bool = False,
+) -> Select:
+    """
+    Order by the (ticker, timestamp) key and seek past `after` if given.
+
+    Tickers are always ascending; `descending` only flips the timestamps so
+    each ticker is read newest first, matching the index order.
+    """
+
+    if not descending:
+        if after is not None:
+            statement = statement.where(
+                tuple_(Price.ticker, Price.timestamp) > tuple_(*after)
+            )
+        return statement.order_by(Price.ticker, Price.timestamp)
+
+    if after is not None:
+        ticker, timestamp = after
+        statement = statement.where(
+            or_(
+                Price.ticker > ticker,
+                and_(
+                    Price.ticker == ticker,
+                    Price.timestamp < timestamp,
+                ),
+            )
+        )
+    return statement.order_by(Price.ticker, Price.timestamp.desc())
+
+
+def _candle_source(
+    ticker: str,
+    interval: timedelta,
+    start: datetime | None,
+    end: datetime | None,
+):
+    """
+    Bars to aggregate into candles of `interval`, as a subquery.
+
+    When a rollup divides the interval, whole rollup buckets inside the
+    range replace their minute bars and only the partial buckets at either
+    edge are read from stock_prices, so candles match the raw aggregation.
+    """
+
+    raw = select(
+        Price.ticker,
+        Price.timestamp,
+        Price.open,
+        Price.high,
+        Price.low,
+        Price.close,
+        Price.volume,
+    ).where(Price.ticker == ticker)
+    if start is not None:
+        start = _aware(start)
+        raw = raw.where(Price.timestamp >= start)
+    if end is not None:
+        end = _aware(end)
+        raw = raw.where(Price.timestamp <= end)
+
+    rollup = rollup_for(interval)
+    if rollup is None:
+        return raw.subquery("bars")
+
+    # Rollup buckets [covered_from, covered_to) lie entirely inside the range.
+    covered_from = covered_to = None
+    if start is not None:
+        covered_from = bucket_start(start, rollup.width)
+        if covered_from < start:
+            covered_from += rollup.width
+    if end is not None:
+        covered_to = bucket_start(
+            end + timedelta(microseconds=1), rollup.width
+        )
+    if covered_from and covered_to and covered_from >= covered_to:
+        return raw.subquery("bars")
+
+    rolled = select(
+        rollup.ticker,
+        rollup.timestamp,
+        rollup.open,
+        rollup.high,
+        rollup.low,
+        rollup.close,
+        rollup.volume,
+    ).where(rollup.ticker == ticker)
+    parts = []
+    if covered_from is not None:
+        rolled = rolled.where(rollup.timestamp >= covered_from)
+        parts.append(raw.where(Price.timestamp < covered_from))
+    if covered_to is not None:
+        rolled = rolled.where(rollup.timestamp < covered_to)
+        parts.append(raw.where(Price.timestamp >= covered_to))
+    return union_all(rolled, *parts).subquery("bars")
+
+
+def _aware(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import (
+    DateTime,
+    Float,
+    Interval,
+    String,
+    column,
+    delete,
+    distinct,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.api.dependencies.db import async_db_session
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.database.models.stock_bar import price_model
+from infrastructure.database.models.stock_price_rollup import (
+    StockPriceDaily,
+    StockPriceHourly,
+)
+from infrastructure.database.ticker_versions import (
+    bump_ticker_versions,
+    rewrite_ticker_versions,
+)
+
+
+log = logging.getLogger("rollups")
+
+# Buckets are aligned on this origin so every interval starts on a round
+# minute/hour/day boundary in UTC.
+CANDLE_ORIGIN = datetime(2000, 1, 3, tzinfo=timezone.utc)
+
+# Each rollup is aggregated from the one before it, finest first.
+ROLLUP_SOURCES = (
+    (StockPriceHourly, price_model()),
+    (StockPriceDaily, StockPriceHourly),
+)
+
+
+def first(column, order_by):
+    """
+    First value of `column` in a group when ordered by `order_by`
+    """
+
+    return func.array_agg(
+        aggregate_order_by(column, order_by),
+        type_=ARRAY(Float),
+    )[1]
+
+
+def bucket_start(timestamp: datetime, width: timedelta) -> datetime:
+    """
+    Start of the `width` bucket holding `timestamp`, like date_bin()
+    """
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return CANDLE_ORIGIN + (timestamp - CANDLE_ORIGIN) // width * width
+
+
+def rollup_for(interval: timedelta):
+    """
+    The coarsest rollup candles of `interval` can be built from, if any
+    """
+
+    for rollup, _ in reversed(ROLLUP_SOURCES):
+        if interval % rollup.width == timedelta(0):
+            return rollup
+    return None
+
+
+def _aggregate(source, bucket, *where):
+    """
+    OHLCV of `source` rows grouped by ticker and `bucket`
+    """
+
+    bars = func.sum(source.bars) if hasattr(source, "bars") else func.count()
+    return (
+        select(
+            source.ticker,
+            bucket,
+            first(source.open, source.timestamp),
+            func.max(source.high),
+            func.min(source.low),
+            first(source.close, source.timestamp.desc()),
+            func.sum(source.volume),
+            bars,
+        )
+        .where(*where)
+        .group_by(source.ticker, bucket)
+    )
+
+
+def _upsert(rollup, aggregate):
+    statement = insert(rollup).from_select(
+        [
+            "ticker",
+            "timestamp",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "bars",
+        ],
+        aggregate,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["ticker", "timestamp"],
+        set_={
+            name: statement.excluded[name]
+            for name in ("open", "high", "low", "close", "volume", "bars")
+        },
+    )
+
+
+async def _lock_tickers(session: AsyncSession, tickers: set[str]) -> None:
+    """
+    Serialise rollup refreshes per ticker until the end of the transaction.
+
+    Concurrent loads of the same ticker would otherwise aggregate from
+    snapshots missing each other's bars, or deadlock upserting the same
+    buckets. Locks are taken in sorted order so loads never wait on each
+    other in a cycle.
+    """
+
+    if not tickers:
+        return
+    locked = func.unnest(literal(sorted(tickers), ARRAY(String))).table_valued(
+        "ticker"
+    )
+    await session.execute(
+        select(
+            func.pg_advisory_xact_lock(
+                func.hashtext(literal("rollup:") + locked.c.ticker)
+            )
+        )
+    )
+
+
+async def refresh_rollups(
+    session: AsyncSession,
+    keys: Iterable[tuple[str, datetime]],
+    written: Iterable[tuple[str, datetime]] | None = None,
+) -> None:
+    """
+    Recompute the rollup buckets touched by writes to (ticker, timestamp).
+
+    Runs in the caller's transaction after the writes are flushed. Buckets
+    left without bars are deleted, the others are upserted from the finer
+    table, so the cost is a few buckets per write batch whatever the size
+    of the history.
+
+    Every write path comes through here, so this is also where the
+    tickers' write versions are bumped, from the bar times in `written`
+    when `keys` only hold bucket starts (at least the first and last bar
+    of each ticker), otherwise from `keys`.
+    """
+
+    keys = {(ticker, timestamp) for ticker, timestamp in keys}
+    await _lock_tickers(session, {ticker for ticker, _ in keys})
+    await bump_ticker_versions(session, keys if written is None else written)
+    for rollup, source in ROLLUP_SOURCES:
+        buckets = sorted(
+            {(ticker, bucket_start(ts, rollup.width)) for ticker, ts in keys}
+        )
+        if not buckets:
+            return
+        tickers, starts = zip(*buckets)
+        affected = (
+            func.unnest(
+                literal(list(tickers), ARRAY(String)),
+                literal(list(starts), ARRAY(DateTime(timezone=True))),
+            )
+            .table_valued(
+                column("ticker", String),
+                column("bucket", DateTime(timezone=True)),
+            )
+            .render_derived(name="affected")
+        )
+
+        await session.execute(
+            delete(rollup).where(
+                rollup.ticker == affected.c.ticker,
+                rollup.timestamp == affected.c.bucket,
+            )
+        )
+        await session.execute(
+            _upsert(
+                rollup,
+                _aggregate(
+                    source,
+                    affected.c.bucket,
+                    source.ticker == affected.c.ticker,
+                    source.timestamp >= affected.c.bucket,
+                    source.timestamp
+                    < affected.c.bucket + literal(rollup.width, Interval),
+                ),
+            )
+        )
+
+
+async def rebuild_rollups(
+    session: AsyncSession,
+    tickers: list[str] | None = None,
+) -> list[str]:
+    """
+    Regenerate the rollups of `tickers`, or of every ticker, from scratch.
+
+    Each ticker is locked against concurrent refreshes like a write, and
+    its versions are bumped as for a rewritten history, so validators and
+    indicator states built on the old rollups are dropped.
+    """
+
+    if tickers is None:
+        price = price_model()
+        result = await session.execute(
+            select(distinct(price.ticker)).order_by(price.ticker)
+        )
+        tickers = list(result.scalars())
+
+    for ticker in tickers:
+        await _lock_tickers(session, {ticker})
+        for rollup, source in ROLLUP_SOURCES:
+            bucket = func.date_bin(
+                literal(rollup.width, Interval),
+                source.timestamp,
+                literal(CANDLE_ORIGIN, DateTime(timezone=True)),
+            )
+            await session.execute(
+                delete(rollup).where(rollup.ticker == ticker)
+            )
+            await session.execute(
+                _upsert(
+                    rollup, _aggregate(source, bucket, source.ticker == ticker)
+                )
+            )
+        await rewrite_ticker_versions(session, [ticker])
+        # One transaction per ticker keeps locks and WAL bursts short.
+        await session.commit()
+        log.info("Rebuilt rollups for %s", ticker)
+    return tickers
+
+
+async def _main(tickers: list[str] | None):
+    async with async_db_session() as session:
+        tickers = await rebuild_rollups(session, tickers)
+    await invalidate_tickers(tickers)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=rebuild_rollups.__doc__)
+    parser.add_argument(
+        "--ticker",
+        action="append",
+        help="Rebuild only this ticker (repeatable); all tickers by default",
+    )
+    asyncio.run(_main(parser.parse_args().ticker))
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    column,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models.ticker_version import TickerVersion
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def bump_ticker_versions(
+    session: AsyncSession,
+    keys: Iterable[tuple[str, datetime]],
+) -> None:
+    """
+    Record writes to (ticker, timestamp) on the tickers' versions, in the
+    caller's transaction.
+
+    A write counts as an append when it starts after the ticker's last
+    known bar; anything else also bumps `history_version`.
+    """
+
+    spans: dict[str, tuple[datetime, datetime]] = {}
+    for ticker, timestamp in keys:
+        timestamp = _utc(timestamp)
+        first, last = spans.get(ticker, (timestamp, timestamp))
+        spans[ticker] = (min(first, timestamp), max(last, timestamp))
+    if not spans:
+        return
+
+    tickers = sorted(spans)
+    written = func.unnest(
+        literal(tickers, ARRAY(String)),
+        literal(
+            [spans[t][0] for t in tickers], ARRAY(DateTime(timezone=True))
+        ),
+        literal(
+            [spans[t][1] for t in tickers], ARRAY(DateTime(timezone=True))
+        ),
+    ).table_valued(
+        column("ticker", String),
+        column("first", DateTime(timezone=True)),
+        column("last", DateTime(timezone=True)),
+    )
+    statement = insert(TickerVersion).from_select(
+        [
+            "ticker",
+            "version",
+            "history_version",
+            "last_timestamp",
+            "written_from",
+            "updated",
+        ],
+        select(
+            written.c.ticker,
+            literal(1),
+            literal(0),
+            written.c.last,
+            written.c.first,
+            func.now(),
+        ),
+    )
+    current = TickerVersion.__table__.c
+    excluded = statement.excluded
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["ticker"],
+            set_={
+                "version": current.version + 1,
+                "history_version": current.history_version
+                + func.coalesce(
+                    (excluded.written_from <= current.last_timestamp).cast(
+                        Integer
+                    ),
+                    0,
+                ),
+                "last_timestamp": func.greatest(
+                    current.last_timestamp, excluded.last_timestamp
+                ),
+                "written_from": excluded.written_from,
+                "updated": func.now(),
+            },
+        )
+    )
+
+
+async def rewrite_ticker_versions(
+    session: AsyncSession,
+    tickers: Iterable[str],
+) -> None:
+    """
+    Record that the history of `tickers` was rewritten wholesale, in the
+    caller's transaction, bumping both versions
+    """
+
+    await session.execute(
+        update(TickerVersion)
+        .where(TickerVersion.ticker.in_(sorted(set(tickers))))
+        .values(
+            version=TickerVersion.version + 1,
+            history_version=TickerVersion.history_version + 1,
+            updated=func.now(),
+        )
+    )
@@ -26,7 +26,7 @@ class TimestampsMixin:
 
     created = Column(
         DateTime(timezone=True),
-        default=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
     )
     deleted = Column(DateTime(timezone=True), default=None)
     updated = Column(DateTime(timezone=True), default=None)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import aiohttp
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from application.config.settings import settings
+
+
+log = logging.getLogger("twelve_data")
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class TwelveDataError(Exception):
+    """
+    Twelve Data refused a request, or kept failing past the retries
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message, status)
+        self.message = message
+        self.status = status
+
+    def __str__(self) -> str:
+        return self.message
+
+
+def retry_after(value: str | None) -> float | None:
+    """
+    Seconds to wait from a Retry-After header, in seconds or as a date
+    """
+
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class TokenBucket:
+    """
+    Spends API credits at `rate` per second, up to `capacity` at once.
+
+    Callers queue on the bucket in arrival order. `pause` empties it for
+    a while, when the server says the credits have run out anyway.
+    """
+
+    rate: float
+    capacity: float
+    clock: Callable[[], float] = time.monotonic
+    _tokens: float | None = None
+    _updated: float = 0.0
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @classmethod
+    def per_minute(cls, credits: int) -> TokenBucket:
+        return cls(rate=credits / 60, capacity=credits)
+
+    def _refill(self, now: float) -> float:
+        if self._tokens is None:
+            self._tokens, self._updated = self.capacity, now
+        elapsed = max(now - self._updated, 0.0)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(now, self._updated)
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens`, waiting for them as long as needed. Returns the time
+        spent waiting.
+        """
+
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = self.clock()
+                available = self._refill(now)
+                if available >= tokens and now >= self._updated:
+                    self._tokens -= tokens
+                    return waited
+                delay = max(
+                    self._updated - now,
+                    (tokens - available) / self.rate,
+                )
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out nothing for `seconds`, then one token, then refill from
+        empty
+        """
+
+        now = self.clock()
+        self._refill(now)
+        self._tokens = min(1.0, self.capacity)
+        self._updated = max(self._updated, now + seconds)
+
+
+@dataclass
+class TwelveDataClient:
+    """
+    Shared HTTP client for the Twelve Data API.
+
+    One keep-alive connection pool serves every request. Requests are
+    limited to `max_concurrency` in flight and spend credits from
+    `bucket`. Connection errors, timeouts and 5xx responses are retried
+    with exponential backoff and full jitter; 429 responses, which Twelve
+    Data also sends as a JSON body with a 200 status, pause the bucket
+    for Retry-After, or until the credits reset on the next minute.
+    """
+
+    url: str
+    api_key: str
+    bucket: TokenBucket
+    max_concurrency: int = 8
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    max_retries: int = 4
+    backoff: float = 1.0
+    backoff_max: float = 60.0
+    _session: aiohttp.ClientSession | None = field(default=None, repr=False)
+    _slots: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    @classmethod
+    def from_settings(cls) -> TwelveDataClient:
+        return cls(
+            url=settings.twelve_data_url,
+            api_key=settings.twelve_data_api_key,
+            bucket=TokenBucket.per_minute(
+                settings.twelve_data_credits_per_minute
+            ),
+            max_concurrency=settings.twelve_data_max_concurrency,
+            timeout=settings.twelve_data_timeout_seconds,
+            connect_timeout=settings.twelve_data_connect_timeout_seconds,
+            max_retries=settings.twelve_data_max_retries,
+            backoff=settings.twelve_data_backoff_seconds,
+            backoff_max=settings.twelve_data_backoff_max_seconds,
+        )
+
+    def _http(self) -> aiohttp.ClientSession:
+        # Created on first use, inside the event loop that will run it.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.timeout, sock_connect=self.connect_timeout
+                ),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> TwelveDataClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff * 2**attempt)
+        )
+
+    async def _send(self, params: dict) -> tuple[int, dict | None, str | None]:
+        async with self._slots:
+            await self.bucket.acquire()
+            async with self._http().get(self.url, params=params) as response:
+                try:
+                    payload = await response.json(content_type=None)
+                except ValueError:
+                    payload = None
+                return (
+                    response.status,
+                    payload,
+                    response.headers.get("Retry-After"),
+                )
+
+    async def get(self, **params) -> dict:
+        """
+        GET the API endpoint with `params` and the API key, retrying as
+        described on the class
+        """
+
+        params = {**params, "apikey": self.api_key}
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, payload, wait = await self._send(params)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = TwelveDataError(f"Request failed: {exc!r}")
+                delay = self._backoff(attempt)
+            else:
+                if not isinstance(payload, dict):
+                    payload = {}
+                if payload.get("status") == "error":
+                    status = payload.get("code", status)
+                if status < 400:
+                    return payload
+                message = payload.get("message", f"HTTP {status}")
+                error = TwelveDataError(message, status)
+                if status == 429:
+                    # Every caller waits on the bucket, this one included.
+                    pause = retry_after(wait)
+                    if pause is None:
+                        pause = 60 - time.time() % 60
+                    self.bucket.pause(pause)
+                    delay = 0.0
+                elif status in RETRY_STATUSES:
+                    delay = self._backoff(attempt)
+                else:
+                    raise error
+
+            if attempt == self.max_retries:
+                break
+            log.warning(
+                "Twelve Data %s, retrying (%d/%d)",
+                error,
+                attempt + 1,
+                self.max_retries,
+            )
+            await asyncio.sleep(delay)
+        raise error
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+import hashlib
+import logging
+import os
+from fastapi import HTTPException, UploadFile
+from pathlib import Path
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+from uuid import uuid4
+
+from application.config.settings import settings
+
+
+log = logging.getLogger("spool")
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class SpooledFile:
+    """
+    Reference to an upload in the spool directory, small enough to enqueue.
+
+    `name` is relative to INGESTION_SPOOL_DIR, so the API and the workers
+    may mount the shared directory at different paths.
+    """
+
+    name: str
+    filename: str
+    size: int
+    sha256: str
+
+    def to_message(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_message(cls, message: dict) -> SpooledFile:
+        return cls(**message)
+
+    @property
+    def path(self) -> Path:
+        path = spool_dir() / self.name
+        if path.parent != spool_dir():
+            raise ValueError(f"{self.name!r} is not a spooled file")
+        return path
+
+
+def spool_dir() -> Path:
+    return Path(settings.ingestion_spool_dir).resolve()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(SPOOL_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def spool_upload(
+    upload: UploadFile,
+    suffix: str = "",
+    expected_sha256: str | None = None,
+) -> SpooledFile:
+    """
+    Copy an upload to the spool directory chunk by chunk.
+
+    Memory use is one chunk whatever the size of the file. The file only
+    appears under its final name once complete, and is discarded when it
+    exceeds INGESTION_MAX_UPLOAD_BYTES or does not match
+    `expected_sha256`.
+    """
+
+    directory = spool_dir()
+    await run_in_threadpool(directory.mkdir, parents=True, exist_ok=True)
+    name = f"{uuid4().hex}{suffix}"
+    partial = directory / f"{name}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    handle = await run_in_threadpool(partial.open, "wb")
+    try:
+        while chunk := await upload.read(SPOOL_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.ingestion_max_upload_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=(
+                        f"Uploads are limited to "
+                        f"{settings.ingestion_max_upload_bytes} bytes"
+                    ),
+                )
+            digest.update(chunk)
+            await run_in_threadpool(handle.write, chunk)
+        await run_in_threadpool(handle.close)
+
+        if expected_sha256 and expected_sha256.lower() != digest.hexdigest():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Checksum mismatch, the upload was corrupted",
+            )
+        await run_in_threadpool(os.replace, partial, directory / name)
+
+    except BaseException:
+        handle.close()
+        partial.unlink(missing_ok=True)
+        raise
+
+    log.info("Spooled %s (%d bytes) as %s", upload.filename, size, name)
+    return SpooledFile(
+        name=name,
+        filename=upload.filename or "",
+        size=size,
+        sha256=digest.hexdigest(),
+    )
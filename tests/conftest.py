@@ -2,7 +2,7 @@ import os
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from application.api.dependencies.db import async_get_db
+from application.api.dependencies.db import async_get_db, async_get_read_db
 from application.api.main import app
 
 
@@ -29,10 +29,11 @@ async def client():
 @pytest.fixture(autouse=True)
 def override_db():
     """
-    Override the async_get_db dependency so all routes receive a fake DB session.
+    Override the session dependencies so all routes receive a fake DB session.
     """
 
     async def fake_get_db():
         yield None
 
     app.dependency_overrides[async_get_db] = fake_get_db
+    app.dependency_overrides[async_get_read_db] = fake_get_db
@@ -39,19 +39,31 @@ class StockPriceRepositoryPrepopulated(StockPriceRepository):
         ]
 
     async def get_stock_prices(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, after=None
     ) -> list[StockPrice]:
+        if after is not None:
+            return [
+                p for p in self._prices if (p.ticker, p.timestamp) > after
+            ][:limit]
         return self._prices[skip : skip + limit]
 
     async def get_stock_prices_by_date_range(
-        self, start: datetime | None = None, end: datetime | None = None
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int | None = None,
+        after=None,
+        tickers: list[str] | None = None,
+        descending: bool = False,
     ) -> list[StockPrice]:
         return [
             p
             for p in self._prices
             if (start is None or p.timestamp >= start)
             and (end is None or p.timestamp <= end)
-        ]
+            and (after is None or (p.ticker, p.timestamp) > after)
+            and (not tickers or p.ticker in tickers)
+        ][:limit]
 
 
 @pytest.mark.asyncio
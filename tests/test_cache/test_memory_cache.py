@@ -0,0 +1,99 @@
+import pytest
+
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.cache.memory import MISSING, TTLCache, price_cache
+from infrastructure.database.repositories.stock_price_repository import (
+    StockPriceRepository,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class CountingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = 0
+
+    async def execute(self, statement):
+        self.executed += 1
+        return FakeResult(self.rows)
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(max_entries=2, max_bytes=10**6, ttl=60)
+    cache.set("a", [1], ["AAPL"])
+    cache.set("b", [2], ["MSFT"])
+    assert cache.get("a") == [1]
+    cache.set("c", [3], ["TSLA"])
+
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == [3]
+    assert cache.stats.evictions == 1
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 1
+
+
+def test_memory_cap_evicts_oldest():
+    cache = TTLCache(max_entries=100, max_bytes=1000, ttl=60)
+    cache.set("a", [0] * 3, ["AAPL"])
+    cache.set("b", [0] * 3, ["MSFT"])
+    assert cache.get("a") is MISSING
+    assert cache.snapshot()["bytes"] <= 1000
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, max_bytes=10**6, ttl=5, clock=clock)
+    cache.set("a", [1], ["AAPL"])
+    clock.now = 5
+    assert cache.get("a") is MISSING
+    assert cache.stats.expirations == 1
+
+
+def test_invalidation_is_scoped_to_ticker():
+    cache = TTLCache(max_entries=10, max_bytes=10**6, ttl=60)
+    cache.set("a", [1], ["AAPL"])
+    cache.set("b", [2], ["MSFT"])
+    cache.set("ab", [3], ["AAPL", "MSFT"])
+    cache.invalidate("AAPL")
+
+    assert cache.get("a") is MISSING
+    assert cache.get("ab") is MISSING
+    assert cache.get("b") == [2]
+
+
+def test_write_during_load_discards_stale_result():
+    cache = TTLCache(max_entries=10, max_bytes=10**6, ttl=60)
+    generation = cache.generation(["AAPL"])
+    cache.invalidate("AAPL")
+    cache.set("a", [1], ["AAPL"], generation)
+    assert cache.get("a") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_repository_reads_are_cached_until_a_write():
+    price_cache.clear()
+    session = CountingSession(rows=["row"])
+    repository = StockPriceRepository(session)
+
+    assert await repository.get_stock_prices_by_ticker("AAPL") == ["row"]
+    assert await repository.get_stock_prices_by_ticker("AAPL") == ["row"]
+    assert session.executed == 1
+
+    await invalidate_tickers(["AAPL"])
+    await repository.get_stock_prices_by_ticker("AAPL")
+    assert session.executed == 2
@@ -0,0 +1,102 @@
+import asyncio
+import numpy as np
+import pytest
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from fakeredis import FakeAsyncRedis
+
+from infrastructure.cache import codec
+from infrastructure.cache.shared import SharedQueryCache
+
+
+Row = namedtuple("Row", "id ticker timestamp close volume")
+
+
+def make_cache():
+    return SharedQueryCache(
+        client=FakeAsyncRedis(),
+        ttl=60,
+        lock_timeout=1,
+    )
+
+
+def test_codec_round_trips_rows():
+    rows = [
+        Row(
+            uuid.UUID(int=1),
+            "AAPL",
+            datetime(2025, 1, 1, 12, 0, 0, 1, tzinfo=timezone.utc),
+            105.25,
+            1000.0,
+        ),
+        Row(
+            uuid.UUID(int=2),
+            "TSLA",
+            datetime(2025, 1, 2, tzinfo=timezone.utc),
+            205.0,
+            2000.0,
+        ),
+    ]
+    decoded = codec.decode(codec.encode(rows))
+    assert [tuple(row) for row in decoded] == [tuple(row) for row in rows]
+    assert decoded[0].ticker == "AAPL"
+
+
+def test_codec_keeps_nulls_and_long_strings():
+    rows = [
+        Row(uuid.UUID(int=1), "A" * 300, datetime(2025, 1, 1), None, 1.0),
+        Row(uuid.UUID(int=2), "B", datetime(2025, 1, 2), 2.5, None),
+    ]
+    decoded = codec.decode(codec.encode(rows))
+    assert [tuple(row) for row in decoded] == [tuple(row) for row in rows]
+
+    with pytest.raises(codec.UnsupportedValue):
+        codec.encode([rows[0]._replace(ticker="A" * 70_000)])
+    with pytest.raises(codec.UnsupportedValue):
+        codec.encode([rows[0]._replace(ticker=None), rows[1]])
+
+
+@pytest.mark.asyncio
+async def test_hit_after_first_load():
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return [Row(uuid.UUID(int=1), "AAPL", datetime(2025, 1, 1), 1.0, 2.0)]
+
+    versions = await cache.versions(["AAPL"])
+    await cache.get_or_load(("by_ticker", "AAPL"), versions, load)
+    rows = await cache.get_or_load(("by_ticker", "AAPL"), versions, load)
+
+    assert len(calls) == 1
+    assert rows[0].close == 1.0
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_bump_makes_old_entries_unreachable():
+    cache = make_cache()
+    before = await cache.versions(["AAPL", "MSFT"])
+    await cache.bump(["AAPL"])
+    after = await cache.versions(["AAPL", "MSFT"])
+    assert after == (before[0] + 1, before[1])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_query_once():
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"close": np.arange(3, dtype="float64")}
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(("columns", "AAPL"), (0,), load) for _ in range(5))
+    )
+    assert len(calls) == 1
+    assert all(result["close"].tolist() == [0, 1, 2] for result in results)
+    assert cache.stats.lock_waits == 4
@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timezone
+from fakeredis import FakeAsyncRedis
+
+from infrastructure.cache import snapshot as snapshot_module
+from infrastructure.cache.invalidation import invalidate_tickers
+from infrastructure.cache.shared import SharedQueryCache
+from infrastructure.cache.snapshot import (
+    LatestBar,
+    LatestQuoteSnapshot,
+    latest_quotes,
+    shared_versions,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def bar(ticker, day, close):
+    return LatestBar(
+        ticker=ticker,
+        timestamp=datetime(2025, 1, day),
+        open=close,
+        high=close,
+        low=close,
+        close=close,
+        volume=1.0,
+    )
+
+
+def test_keeps_newest_bar_per_ticker():
+    snapshot = LatestQuoteSnapshot(ttl=60)
+    snapshot.offer([bar("AAPL", 2, 101.0), bar("AAPL", 1, 100.0)])
+
+    found, missing = snapshot.get_many(["AAPL", "MSFT"])
+    assert [b.close for b in found] == [101.0]
+    assert found[0].timestamp.tzinfo is timezone.utc
+    assert missing == ["MSFT"]
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    snapshot = LatestQuoteSnapshot(ttl=10, clock=clock)
+    snapshot.offer([bar("AAPL", 1, 100.0)])
+    clock.now = 10
+
+    assert snapshot.get_many(["AAPL"]) == ([], ["AAPL"])
+
+
+@pytest.mark.asyncio
+async def test_writes_discard_the_snapshot():
+    latest_quotes.offer([bar("AAPL", 1, 100.0)])
+    await invalidate_tickers(["AAPL"])
+
+    assert latest_quotes.get_many(["AAPL"]) == ([], ["AAPL"])
+
+
+@pytest.mark.asyncio
+async def test_writes_from_another_process_are_seen(monkeypatch):
+    shared = SharedQueryCache(client=FakeAsyncRedis(), ttl=60, lock_timeout=1)
+    monkeypatch.setattr(snapshot_module, "shared_query_cache", lambda: shared)
+    snapshot = LatestQuoteSnapshot(ttl=60)
+
+    versions = await shared_versions(["AAPL", "MSFT"])
+    snapshot.offer([bar("AAPL", 2, 100.0), bar("MSFT", 2, 50.0)], versions)
+    found, _ = snapshot.get_many(["AAPL"], await shared_versions(["AAPL"]))
+    assert [b.close for b in found] == [100.0]
+
+    # The worker's invalidate_tickers only reaches this process via Redis.
+    await shared.bump(["AAPL"])
+    versions = await shared_versions(["AAPL", "MSFT"])
+    found, missing = snapshot.get_many(["AAPL", "MSFT"], versions)
+    assert [b.ticker for b in found] == ["MSFT"]
+    assert missing == ["AAPL"]
+
+    # A bar read under the new version replaces the older one, even if
+    # the write removed the newest bar.
+    snapshot.offer([bar("AAPL", 1, 99.0)], versions)
+    found, _ = snapshot.get_many(["AAPL"], versions)
+    assert [b.close for b in found] == [99.0]
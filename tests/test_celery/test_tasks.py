@@ -0,0 +1,182 @@
+import io
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from application.celery import tasks
+from infrastructure.database.copy_loader import CopyResult
+from infrastructure.database.models.ingestion_job import IngestionJob
+from infrastructure.storage import spool
+
+
+CSV = """symbol,datetime,open,high,low,close,volume,exchange
+AAPL,2025-01-02,1.234,2,0.5,1.5,10,NASDAQ
+AAPL,2025-01-03,1,2,0.5,,10,NASDAQ
+AAPL,2025-01-06,1,2,0.5,1.5,11,NASDAQ
+MSFT,2025-01-02,1,2,0.5,1.5,12,NASDAQ
+MSFT,2025-01-03,1,2,0.5,1.5,13,NASDAQ
+"""
+
+
+class FakeSession:
+    commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_csv_is_loaded_in_chunks(monkeypatch):
+    session = FakeSession()
+    copied = []
+
+    async def fake_get_db():
+        yield session
+
+    async def fake_copy(session, rows):
+        rows = list(rows)
+        copied.append(rows)
+        return CopyResult(
+            len(rows),
+            0.5,
+            sorted({r[0] for r in rows}),
+            inserted=1,
+            updated=len(rows) - 1,
+        )
+
+    async def ignore(tickers):
+        pass
+
+    monkeypatch.setattr(tasks.settings, "csv_chunk_rows", 2)
+    monkeypatch.setattr(tasks, "async_get_db", fake_get_db)
+    monkeypatch.setattr(tasks, "copy_prices", fake_copy)
+    monkeypatch.setattr(tasks, "invalidate_tickers", ignore)
+    progress = []
+
+    result = await tasks._load_csv_async(
+        tasks._read_prices_csv(io.StringIO(CSV)), progress.append
+    )
+
+    assert [len(rows) for rows in copied] == [1, 2, 1]
+    assert copied[0][0] == (
+        "AAPL",
+        datetime(2025, 1, 2),
+        1.23,
+        2.0,
+        0.5,
+        1.5,
+        10.0,
+    )
+    assert session.commits == 3
+    assert result["rows"] == 4 and result["chunks"] == 3
+    assert result["rows_parsed"] == 5 and result["rows_rejected"] == 1
+    assert result["rows_inserted"] == 3 and result["rows_updated"] == 1
+    assert [p["chunk_rows_per_second"] for p in progress] == [2, 4, 2]
+
+
+def test_parts_split_on_line_boundaries(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text(CSV)
+
+    parts = tasks.split_offsets(path, 50)
+
+    assert parts[0][0] == CSV.index("\n") + 1
+    assert parts[-1][1] == len(CSV)
+    assert all(end == start for (_, end), (start, _) in zip(parts, parts[1:]))
+    rows = [
+        df
+        for start, end in parts
+        for df in tasks._read_prices_csv(tasks._read_part(path, start, end))
+    ]
+    assert sum(len(df) for df in rows) == 5
+    assert tasks.split_offsets(path, 10**6) == [parts[0][:1] + (len(CSV),)]
+
+
+def test_job_progress_reports_rate_and_eta():
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    job = IngestionJob(
+        status="running",
+        total=1000,
+        processed=250,
+        rows=5000,
+        started=started,
+    )
+
+    assert job.progress(started + timedelta(seconds=10)) == {
+        "percent": 25.0,
+        "duration_seconds": 10.0,
+        "rows_per_second": 500,
+        "eta_seconds": 30.0,
+    }
+
+
+def test_upload_fans_out_into_a_chord(monkeypatch, tmp_path):
+    monkeypatch.setattr(spool.settings, "ingestion_spool_dir", str(tmp_path))
+    monkeypatch.setattr(tasks.settings, "ingestion_part_bytes", 50)
+    (tmp_path / "prices.csv").write_text(CSV)
+    spooled = spool.SpooledFile(
+        "prices.csv",
+        "prices.csv",
+        len(CSV),
+        spool.file_sha256(tmp_path / "prices.csv"),
+    )
+    job_id = str(uuid4())
+    started = []
+    dispatched = {}
+
+    class FakeJobs:
+        async def start_job(self, job_id, total, parts_total):
+            started.append((str(job_id), total, parts_total))
+
+    async def fake_update_job(update):
+        return await update(FakeJobs())
+
+    def fake_chord(header):
+        dispatched["parts"] = list(header)
+        return lambda body: dispatched.update(body=body)
+
+    monkeypatch.setattr(tasks, "update_job", fake_update_job)
+    monkeypatch.setattr(tasks, "chord", fake_chord)
+
+    result = tasks.process_stocks_data_file_task.run(
+        spooled.to_message(), job_id
+    )
+
+    parts = tasks.split_offsets(spooled.path, 50)
+    assert result == {"job_id": job_id, "parts": len(parts)}
+    assert started == [(job_id, len(CSV), len(parts))]
+    assert [part.args[2:] for part in dispatched["parts"]] == parts
+    assert dispatched["body"].args == (job_id, spooled.to_message())
+
+
+def test_finishing_a_job_removes_the_upload(monkeypatch, tmp_path):
+    monkeypatch.setattr(spool.settings, "ingestion_spool_dir", str(tmp_path))
+    (tmp_path / "prices.csv").write_text(CSV)
+    spooled = spool.SpooledFile("prices.csv", "prices.csv", len(CSV), "")
+    finished = []
+
+    async def fake_update_job(update):
+        jobs = SimpleNamespace(finish_job=lambda job_id: _record(job_id))
+        return await update(jobs)
+
+    async def _record(job_id):
+        finished.append(job_id)
+
+    monkeypatch.setattr(tasks, "update_job", fake_update_job)
+    job_id = str(uuid4())
+
+    result = tasks.finish_ingestion_job_task.run(
+        [{"rows": 3}, {"rows": 0, "failed": True}],
+        job_id,
+        spooled.to_message(),
+    )
+
+    assert result == {
+        "job_id": job_id,
+        "rows": 3,
+        "parts": 2,
+        "parts_failed": 1,
+    }
+    assert [str(job) for job in finished] == [job_id]
+    assert not spooled.path.exists()
@@ -0,0 +1,109 @@
+import pytest
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+
+from infrastructure.database import compact
+from infrastructure.database.compact import (
+    SymbolMap,
+    bar_id,
+    migrate_to_compact,
+    parse_bar_id,
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return [row[-1] for row in self.rows]
+
+    def all(self):
+        return self.rows
+
+
+class SymbolSession:
+    """Plays the symbols table, numbering tickers as they are inserted"""
+
+    def __init__(self, existing):
+        self.symbols = dict(existing)
+        self.selects = 0
+
+    async def execute(self, statement, params=None):
+        parameters = statement.compile().params
+        if str(statement).startswith("INSERT"):
+            created = [
+                value
+                for name, value in parameters.items()
+                if name.startswith("ticker") and value not in self.symbols
+            ]
+            for ticker in created:
+                self.symbols[ticker] = len(self.symbols) + 1
+            return FakeResult([(ticker,) for ticker in created])
+        self.selects += 1
+        wanted = next(iter(parameters.values()))
+        return FakeResult(
+            [(self.symbols[t], t) for t in wanted if t in self.symbols]
+        )
+
+
+def test_bar_id_round_trip():
+    timestamp = datetime(2025, 3, 14, 15, 9, 26, 535897, tzinfo=timezone.utc)
+    value = bar_id(513, timestamp)
+
+    assert parse_bar_id(value) == (513, timestamp)
+    assert bar_id(513, timestamp.replace(tzinfo=None)) == value
+    assert parse_bar_id(uuid.UUID(int=1)) is None
+
+
+def test_bar_id_before_1970():
+    timestamp = datetime(1960, 5, 1, 0, 0, 0, 1, tzinfo=timezone.utc)
+    value = bar_id(7, timestamp)
+    # As Postgres' to_hex() writes a negative bigint.
+    assert value.hex[4:20] == "fffeea74487f8001"
+    assert parse_bar_id(value) == (7, timestamp)
+
+
+@pytest.mark.asyncio
+async def test_migration_overwrites_changed_bars(monkeypatch):
+    class CopySession(SymbolSession):
+        def __init__(self, existing):
+            super().__init__(existing)
+            self.statements = []
+
+        async def execute(self, statement, params=None):
+            if "stock_bars" in str(statement) or "UPDATE" in str(statement):
+                self.statements.append(
+                    str(statement.compile(dialect=postgresql.dialect()))
+                )
+                result = FakeResult([])
+                result.rowcount = 0
+                return result
+            return await super().execute(statement, params)
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(compact, "symbol_map", SymbolMap())
+    session = CopySession({"AAPL": 1})
+    await migrate_to_compact(session, ["AAPL"])
+
+    copy, touch = session.statements
+    assert "ON CONFLICT (symbol_id, timestamp) DO UPDATE" in copy
+    assert "IS DISTINCT FROM (excluded.open" in copy
+
+
+@pytest.mark.asyncio
+async def test_symbols_created_in_transaction_are_not_cached():
+    session = SymbolSession({"AAPL": 1})
+    symbols = SymbolMap()
+
+    ids = await symbols.ids(session, ["AAPL", "MSFT"], create=True)
+    assert ids == {"AAPL": 1, "MSFT": 2}
+
+    await symbols.ids(session, ["AAPL"])
+    assert session.selects == 1
+
+    assert await symbols.ids(session, ["MSFT", "TSLA"]) == {"MSFT": 2}
+    assert session.selects == 2
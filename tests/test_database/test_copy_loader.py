@@ -0,0 +1,90 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+
+from infrastructure.database import copy_loader
+from infrastructure.database.copy_loader import copy_prices
+
+
+HOUR = datetime(2025, 1, 1, 14, tzinfo=timezone.utc)
+
+
+class FakeResult:
+    def all(self):
+        return [
+            ("AAPL", HOUR, HOUR, HOUR.replace(minute=2)),
+        ]
+
+    def one(self):
+        return (2, 3)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.copied = []
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copied = list(records)
+        return f"COPY {len(self.copied)}"
+
+
+class CopySession:
+    def __init__(self):
+        self.driver = FakeDriver()
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(
+            str(statement.compile(dialect=postgresql.dialect()))
+        )
+        return FakeResult()
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    @property
+    def driver_connection(self):
+        return self.driver
+
+
+@pytest.mark.asyncio
+async def test_copies_then_merges_once(monkeypatch):
+    refreshed, ensured, versioned = [], [], []
+
+    async def ensure(timestamps):
+        ensured.extend(timestamps)
+
+    async def refresh(session, keys, written):
+        refreshed.extend(keys)
+        versioned.extend(written)
+
+    monkeypatch.setattr(copy_loader, "ensure_partitions", ensure)
+    monkeypatch.setattr(copy_loader, "refresh_rollups", refresh)
+    session = CopySession()
+    rows = [
+        ("AAPL", HOUR.replace(minute=minute), 1.0, 2.0, 0.5, 1.5, 10.0)
+        for minute in range(3)
+    ]
+
+    result = await copy_prices(session, iter(rows))
+
+    assert result.rows == 3 and result.tickers == ["AAPL"]
+    assert result.inserted == 2 and result.updated == 1
+    assert session.driver.copied == rows
+    create, buckets, merge = session.statements
+    assert create.startswith("CREATE TEMPORARY TABLE stock_prices_staging")
+    assert "date_bin" in buckets
+    assert merge.startswith("WITH merged AS")
+    assert "RETURNING xmax = 0 AS inserted" in merge
+    assert merge.count("INSERT INTO stock_prices ") == 1
+    assert "DISTINCT ON (stock_prices_staging.ticker" in merge
+    assert "ON CONFLICT (ticker, timestamp) DO UPDATE" in merge
+    assert refreshed == [("AAPL", HOUR)]
+    assert ensured == [HOUR]
+    # Versions see the bars themselves, not the hour: a later write at
+    # 14:01 is a backfill of what was loaded, not an append.
+    assert versioned == [("AAPL", HOUR), ("AAPL", HOUR.replace(minute=2))]
+    assert "min(stock_prices_staging.timestamp)" in buckets
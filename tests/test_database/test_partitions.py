@@ -0,0 +1,112 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from infrastructure.database import partitions
+from infrastructure.database.partitions import (
+    detach_partition,
+    ensure_partitions,
+    month_start,
+    next_month,
+    partition_name,
+)
+
+
+class FakeResult:
+    def __init__(self, names):
+        self.names = names
+
+    def scalars(self):
+        return self.names
+
+
+class CatalogConnection:
+    """
+    Answers the unattached-partition lookup from a set of attached names
+    """
+
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_inherits" in sql:
+            return FakeResult(
+                [n for n in params["names"] if n not in self.existing]
+            )
+        if sql.startswith("CREATE TABLE"):
+            self.existing.add(sql.split()[2])
+        if "DETACH PARTITION" in sql:
+            self.existing.discard(sql.split()[5])
+        return FakeResult([])
+
+
+def use_connection(monkeypatch, connection):
+    connections = []
+
+    @asynccontextmanager
+    async def autocommit():
+        connections.append(connection)
+        yield connection
+
+    monkeypatch.setattr(partitions, "_autocommit", autocommit)
+    return connections
+
+
+def test_month_boundaries_are_utc():
+    local = timezone(timedelta(hours=-5))
+    month = month_start(datetime(2025, 1, 31, 22, tzinfo=local))
+    assert month == datetime(2025, 2, 1, tzinfo=timezone.utc)
+    assert next_month(datetime(2025, 12, 1, tzinfo=timezone.utc)).year == 2026
+    assert partition_name(month) == "stock_prices_y2025m02"
+
+
+@pytest.mark.asyncio
+async def test_creates_only_missing_partitions_once(monkeypatch):
+    monkeypatch.setattr(partitions, "_known", set())
+    monkeypatch.setattr(partitions.settings, "partition_months_ahead", 0)
+    now = month_start(datetime.now(timezone.utc))
+    connection = CatalogConnection(existing=[partition_name(now)])
+    connections = use_connection(monkeypatch, connection)
+    backfill = [datetime(2020, 3, 9, tzinfo=timezone.utc)]
+
+    await ensure_partitions(backfill)
+    created = [s for s in connection.statements if s.startswith("CREATE")]
+    assert len(created) == 1
+    assert "stock_prices_y2020m03" in created[0]
+    assert "FROM ('2020-03-01T00:00:00+00:00')" in created[0]
+    assert "pg_advisory_unlock" in connection.statements[-1]
+
+    # Committed on creation, so known from then on without a lookup.
+    await ensure_partitions(backfill)
+    await ensure_partitions(backfill)
+    assert len(connections) == 1
+
+
+@pytest.mark.asyncio
+async def test_detached_month_gets_a_new_partition(monkeypatch):
+    monkeypatch.setattr(partitions, "_known", set())
+    monkeypatch.setattr(partitions.settings, "partition_months_ahead", 0)
+    now = month_start(datetime.now(timezone.utc))
+    march = datetime(2020, 3, 1, tzinfo=timezone.utc)
+    connection = CatalogConnection(
+        existing=[partition_name(now), partition_name(march)]
+    )
+    use_connection(monkeypatch, connection)
+
+    await ensure_partitions([march])
+    assert not any(s.startswith("CREATE") for s in connection.statements)
+
+    detached = await detach_partition(march)
+    assert detached.startswith("stock_prices_y2020m03_detached_")
+    assert connection.statements[-1] == (
+        f"ALTER TABLE stock_prices_y2020m03 RENAME TO {detached}"
+    )
+
+    await ensure_partitions([march])
+    assert connection.statements[-2].startswith(
+        "CREATE TABLE stock_prices_y2020m03 PARTITION OF stock_prices"
+    )
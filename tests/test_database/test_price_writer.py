@@ -0,0 +1,78 @@
+import pytest
+import uuid
+from datetime import datetime, timezone
+
+from infrastructure.cache.snapshot import LatestBar, latest_quotes
+from infrastructure.database import price_writer
+from infrastructure.database.price_writer import UpsertResult, upsert_prices
+from infrastructure.database.repositories import stock_price_repository
+from infrastructure.database.repositories.stock_price_repository import (
+    StockPriceRepository,
+)
+
+
+class ReturningSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append((statement, params))
+        return self.rows
+
+    async def commit(self):
+        pass
+
+
+async def nothing(*args, **kwargs):
+    return None
+
+
+@pytest.mark.asyncio
+async def test_returning_counts_inserted_and_updated(monkeypatch):
+    monkeypatch.setattr(price_writer, "ensure_partitions", nothing)
+    monkeypatch.setattr(price_writer, "refresh_rollups", nothing)
+    ids = [uuid.uuid4(), uuid.uuid4(), uuid.uuid4()]
+    session = ReturningSession(
+        [(ids[0], True), (ids[1], False), (ids[2], True)]
+    )
+    timestamp = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    bar = {"open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 10}
+    records = [
+        {"ticker": ticker, "timestamp": timestamp, **bar}
+        for ticker in ("AAPL", "MSFT", "TSLA")
+    ]
+
+    result = await upsert_prices(session, records, returning=True)
+
+    assert (result.inserted, result.updated, result.ids) == (2, 1, ids)
+    ((statement, params),) = session.statements
+    sql = str(statement)
+    assert "ON CONFLICT (ticker, timestamp) DO UPDATE" in sql
+    assert "RETURNING stock_prices.id, xmax = 0" in sql
+    assert len(params) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_backfill_does_not_become_the_latest_quote(monkeypatch):
+    async def fake_upsert(session, bars, returning):
+        return UpsertResult(inserted=len(bars))
+
+    monkeypatch.setattr(stock_price_repository, "upsert_prices", fake_upsert)
+    monkeypatch.setattr(stock_price_repository, "ensure_partitions", nothing)
+    latest = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    latest_quotes.offer([LatestBar("AAPL", latest, 1.0, 2.0, 0.5, 1.5, 10.0)])
+    bar = {"open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 10}
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    await StockPriceRepository(ReturningSession([])).upsert_stock_prices(
+        [{"ticker": "AAPL", "timestamp": old, **bar}]
+    )
+
+    assert latest_quotes.get_many(["AAPL"]) == ([], ["AAPL"])
+
+
+def test_a_statement_chunk_fits_in_one_insert():
+    # ticker, timestamp, OHLCV and the client-side id and created defaults
+    assert price_writer._PARAMETERS_PER_ROW == 9
+    assert price_writer.MAX_STATEMENT_ROWS * 9 <= 32700
@@ -0,0 +1,94 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from infrastructure.database.replicas import Replica, ReplicaPool
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeReplica:
+    """
+    Session maker whose sessions report `lag` and the `replayed` WAL
+    position, or fail when `lag` is None
+    """
+
+    def __init__(self, lag, replayed=0):
+        self.lag = lag
+        self.replayed = replayed
+        self.checks = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        yield self
+
+    async def execute(self, statement):
+        self.checks += 1
+        if self.lag is None:
+            raise OperationalError("SELECT 1", {}, ConnectionRefusedError())
+        return self
+
+    def one(self):
+        return self.lag, self.replayed
+
+
+def make_pool(*lags, clock=None):
+    makers = [FakeReplica(lag) for lag in lags]
+    pool = ReplicaPool(
+        replicas=[Replica(f"r{i}", m) for i, m in enumerate(makers)],
+        check_interval=5,
+        check_timeout=1,
+        max_lag=10,
+        clock=clock or FakeClock(),
+    )
+    return pool, makers
+
+
+@pytest.mark.asyncio
+async def test_skips_down_and_lagging_replicas():
+    pool, (down, lagging, fresh) = make_pool(None, 30, 0)
+
+    assert {await pool.pick() for _ in range(3)} == {fresh}
+    assert pool.stats.failed_checks == 1
+    assert fresh.checks == 1
+
+    fresh.lag = None
+    pool.mark_down(fresh)
+    assert await pool.pick() is None
+    assert pool.stats.primary_fallbacks == 1
+
+
+@pytest.mark.asyncio
+async def test_rechecks_after_interval():
+    clock = FakeClock()
+    pool, (replica,) = make_pool(None, clock=clock)
+    assert await pool.pick() is None
+
+    replica.lag = 0
+    assert await pool.pick() is None
+    clock.now += 5
+    assert await pool.pick() is replica
+    assert replica.checks == 2
+
+
+@pytest.mark.asyncio
+async def test_recent_writer_waits_for_replay():
+    clock = FakeClock()
+    # No lag: everything received is replayed, but the write is not in yet.
+    pool, (replica,) = make_pool(0, clock=clock)
+    replica.replayed = 100
+
+    assert await pool.pick(written_lsn=101) is None
+    assert await pool.pick(written_lsn=100) is replica
+    assert await pool.pick() is replica
+
+    replica.replayed = 200
+    clock.now += 5
+    assert await pool.pick(written_lsn=150) is replica
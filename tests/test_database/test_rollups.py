@@ -0,0 +1,139 @@
+import pytest
+import re
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects import postgresql
+
+from infrastructure.database.models.stock_price_rollup import (
+    StockPriceDaily,
+    StockPriceHourly,
+)
+from infrastructure.database.repositories.stock_price_repository import (
+    _candle_source,
+)
+from infrastructure.database.rollups import (
+    bucket_start,
+    rebuild_rollups,
+    refresh_rollups,
+    rollup_for,
+)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_bucket_start_matches_date_bin():
+    timestamp = datetime(2025, 3, 4, 10, 59, 59)
+    assert bucket_start(timestamp, timedelta(hours=1)) == datetime(
+        2025, 3, 4, 10, tzinfo=timezone.utc
+    )
+    assert bucket_start(timestamp, timedelta(days=1)) == datetime(
+        2025, 3, 4, tzinfo=timezone.utc
+    )
+
+
+def test_coarse_intervals_use_the_coarsest_rollup():
+    assert rollup_for(timedelta(minutes=15)) is None
+    assert rollup_for(timedelta(hours=4)) is StockPriceHourly
+    assert rollup_for(timedelta(days=1)) is StockPriceDaily
+
+
+@pytest.mark.asyncio
+async def test_refresh_touches_each_bucket_once():
+    session = RecordingSession()
+    await refresh_rollups(
+        session,
+        [
+            ("AAPL", datetime(2025, 1, 1, 10, 1, tzinfo=timezone.utc)),
+            ("AAPL", datetime(2025, 1, 1, 10, 2, tzinfo=timezone.utc)),
+            ("AAPL", datetime(2025, 1, 1, 11, 0, tzinfo=timezone.utc)),
+        ],
+    )
+
+    (
+        lock,
+        versions,
+        hourly_delete,
+        hourly_upsert,
+        daily_delete,
+        daily_upsert,
+    ) = session.statements
+    assert "pg_advisory_xact_lock" in str(lock)
+    assert "INSERT INTO ticker_versions" in str(versions)
+    assert "history_version = (ticker_versions.history_version +" in str(
+        versions
+    )
+    assert list(lock.params.values()) == ["rollup:", ["AAPL"]]
+    assert len(hourly_delete.params["param_2"]) == 2
+    assert len(daily_delete.params["param_2"]) == 1
+    assert "FROM stock_prices," in str(hourly_upsert)
+    assert "FROM stock_prices_1h," in str(daily_upsert)
+
+
+def test_candles_read_partial_edge_buckets_from_raw_bars():
+    source = _candle_source(
+        "AAPL",
+        timedelta(days=1),
+        datetime(2025, 1, 1, 9, 30, tzinfo=timezone.utc),
+        datetime(2025, 1, 5, 16, 0, tzinfo=timezone.utc),
+    )
+    compiled = source.compile(dialect=postgresql.dialect())
+    assert str(compiled).count("FROM stock_prices_1d") == 1
+    assert len(re.findall(r"FROM stock_prices\s", str(compiled))) == 2
+    assert (
+        datetime(2025, 1, 2, tzinfo=timezone.utc) in compiled.params.values()
+    )
+    assert (
+        datetime(2025, 1, 5, tzinfo=timezone.utc) in compiled.params.values()
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_locks_tickers_in_sorted_order():
+    session = RecordingSession()
+    timestamp = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+    await refresh_rollups(
+        session,
+        [("MSFT", timestamp), ("AAPL", timestamp), ("MSFT", timestamp)],
+    )
+
+    assert ["AAPL", "MSFT"] in session.statements[0].params.values()
+
+
+@pytest.mark.asyncio
+async def test_versions_use_written_bar_times_over_bucket_keys():
+    session = RecordingSession()
+    hour = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+    bar = hour.replace(minute=30)
+    await refresh_rollups(
+        session, [("AAPL", hour)], written=[("AAPL", bar), ("AAPL", bar)]
+    )
+
+    versions = session.statements[1]
+    # The last bar is 10:30, so a later write at 10:15 is a backfill.
+    assert [bar] in versions.params.values()
+    assert [hour] not in versions.params.values()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_locks_and_rewrites_versions():
+    class CommittingSession(RecordingSession):
+        async def commit(self):
+            self.statements.append("COMMIT")
+
+    session = CommittingSession()
+    await rebuild_rollups(session, ["AAPL"])
+
+    lock, *rebuilt, versions, commit = session.statements
+    assert "pg_advisory_xact_lock" in str(lock)
+    assert list(lock.params.values()) == ["rollup:", ["AAPL"]]
+    assert len(rebuilt) == 4
+    assert str(versions).startswith("UPDATE ticker_versions")
+    assert "history_version=(ticker_versions.history_version +" in str(
+        versions
+    )
+    assert commit == "COMMIT"
@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from domain.indicators.engine import IndicatorEngine
+from domain.indicators.indicators import IndicatorSpec, rsi
+
+
+Freshness = namedtuple("Freshness", "version history_version")
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SPECS = [
+    IndicatorSpec.parse(name)
+    for name in ("sma:5", "ema:5", "rsi:5", "bollinger:5", "vwap")
+]
+
+
+class SeriesRepository:
+    """Serves a growing price series the way the repository does"""
+
+    def __init__(self, bars: int):
+        rng = np.random.default_rng(7)
+        self.close = 100 + np.cumsum(rng.normal(size=bars))
+        self.volume = rng.uniform(1, 10, size=bars)
+        self.rows = 0
+        self.version = 0
+        self.history_version = 0
+        self.column_reads = []
+
+    def publish(self, rows: int):
+        self.version += 1
+        self.rows = rows
+
+    def rewrite(self):
+        self.version += 1
+        self.history_version += 1
+
+    def _timestamp(self, index):
+        return START + timedelta(minutes=int(index))
+
+    async def get_freshness(self, tickers):
+        return Freshness(self.version, self.history_version)
+
+    async def get_stock_price_columns(self, ticker, after=None):
+        first = 0
+        while after is not None and self._timestamp(first) <= after:
+            first += 1
+        self.column_reads.append(after)
+        window = slice(first, self.rows)
+        return {
+            "timestamp": np.array(
+                [
+                    int(self._timestamp(i).timestamp() * 1e6)
+                    for i in range(first, self.rows)
+                ],
+                dtype=np.int64,
+            ),
+            "open": self.close[window],
+            "high": self.close[window] + 1,
+            "low": self.close[window] - 1,
+            "close": self.close[window],
+            "volume": self.volume[window],
+        }
+
+
+def test_parse_indicator_specs():
+    assert IndicatorSpec.parse("SMA").label == "sma_20"
+    assert IndicatorSpec.parse("rsi:9").label == "rsi_9"
+    assert IndicatorSpec.parse("vwap").label == "vwap"
+    for invalid in ("macd", "sma:1", "sma:x", "vwap:5"):
+        with pytest.raises(ValueError):
+            IndicatorSpec.parse(invalid)
+
+
+def test_rsi_of_a_flat_series_is_neutral():
+    close = np.array([10.0, 10.0, 10.0, 10.0, 11.0, 11.0])
+    empty = {"close": close[:0]}
+
+    outputs, _ = rsi(empty, {"close": close}, 3)
+    values = outputs[""]
+
+    assert np.isnan(values[:3]).all()
+    np.testing.assert_allclose(values[3:5], [50.0, 100.0])
+
+
+@pytest.mark.asyncio
+async def test_appended_bars_extend_the_state():
+    repository = SeriesRepository(bars=60)
+    engine = IndicatorEngine(max_tickers=4, max_bytes=2**20)
+
+    repository.publish(40)
+    await engine.compute(repository, "AAPL", SPECS)
+    repository.publish(60)
+    extended = await engine.compute(repository, "AAPL", SPECS)
+
+    assert engine.stats.rebuilds == 1
+    assert engine.stats.extensions == 1
+    assert repository.column_reads[-1] is not None
+
+    full = await IndicatorEngine(max_tickers=4, max_bytes=2**20).compute(
+        repository, "AAPL", SPECS
+    )
+    assert extended.keys() == full.keys()
+    for name in full:
+        np.testing.assert_allclose(extended[name], full[name])
+    assert np.isnan(full["sma_5"][:4]).all()
+    assert not np.isnan(full["rsi_5"][5:]).any()
+
+
+@pytest.mark.asyncio
+async def test_window_slices_warmed_up_values():
+    repository = SeriesRepository(bars=30)
+    repository.publish(30)
+    engine = IndicatorEngine(max_tickers=4, max_bytes=2**20)
+
+    full = await engine.compute(repository, "AAPL", SPECS)
+    window = await engine.compute(
+        repository,
+        "AAPL",
+        SPECS,
+        start=START + timedelta(minutes=10),
+        end=START + timedelta(minutes=19),
+    )
+
+    assert len(window["timestamp"]) == 10
+    np.testing.assert_allclose(window["ema_5"], full["ema_5"][10:20])
+    assert window["vwap"][0] == pytest.approx(repository.close[10])
+    assert engine.stats.reuses == 1
+
+
+@pytest.mark.asyncio
+async def test_rewritten_history_rebuilds_the_state():
+    repository = SeriesRepository(bars=30)
+    repository.publish(20)
+    engine = IndicatorEngine(max_tickers=4, max_bytes=2**20)
+
+    await engine.compute(repository, "AAPL", SPECS)
+    repository.rewrite()
+    await engine.compute(repository, "AAPL", SPECS)
+
+    assert engine.stats.rebuilds == 2
+    assert repository.column_reads == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_states_are_evicted_past_the_byte_budget():
+    repository = SeriesRepository(bars=30)
+    repository.publish(30)
+    engine = IndicatorEngine(max_tickers=4, max_bytes=2**20)
+
+    await engine.compute(repository, "AAPL", SPECS)
+    engine.max_bytes = engine.snapshot()["bytes"]
+    await engine.compute(repository, "MSFT", SPECS)
+
+    assert list(engine._states) == ["MSFT"]
+    assert engine.stats.evictions == 1
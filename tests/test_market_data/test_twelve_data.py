@@ -0,0 +1,170 @@
+import asyncio
+import pytest
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from infrastructure.market_data.twelve_data import (
+    TokenBucket,
+    TwelveDataClient,
+    TwelveDataError,
+    retry_after,
+)
+
+
+SERIES = {"status": "ok", "values": [{"datetime": "2025-01-02"}]}
+
+
+class StandIn:
+    """
+    Local stand-in for the Twelve Data API, answering with `responses` in
+    turn and then with SERIES
+    """
+
+    def __init__(self, *responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.requests = []
+        self.peers = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        self.requests.append((time.monotonic(), dict(request.query)))
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.responses:
+            return self.responses.pop(0)
+        return web.json_response(SERIES)
+
+
+@pytest.fixture
+async def stand_in():
+    servers = []
+
+    async def start(*responses, delay=0.0):
+        handler = StandIn(*responses, delay=delay)
+        app = web.Application()
+        app.router.add_get("/time_series", handler.handle)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        return handler, str(server.make_url("/time_series"))
+
+    yield start
+    for server in servers:
+        await server.close()
+
+
+def make_client(url, credits=600, **options) -> TwelveDataClient:
+    options = {"backoff": 0.01, "timeout": 1.0, **options}
+    return TwelveDataClient(
+        url=url,
+        api_key="key",
+        bucket=TokenBucket(rate=credits / 60, capacity=credits),
+        **options,
+    )
+
+
+async def test_requests_share_keep_alive_connections(stand_in):
+    handler, url = await stand_in()
+
+    async with make_client(url, max_concurrency=2) as client:
+        results = await asyncio.gather(
+            *(client.get(symbol=f"S{n}") for n in range(10))
+        )
+
+    assert results == [SERIES] * 10
+    assert len(handler.requests) == 10
+    assert len(handler.peers) <= 2
+    assert handler.max_in_flight <= 2
+    assert all(query["apikey"] == "key" for _, query in handler.requests)
+
+
+async def test_concurrency_is_bounded(stand_in):
+    handler, url = await stand_in(delay=0.05)
+
+    async with make_client(url, max_concurrency=3) as client:
+        await asyncio.gather(*(client.get(symbol="AAPL") for _ in range(9)))
+
+    assert handler.max_in_flight == 3
+
+
+async def test_429_waits_for_retry_after(stand_in):
+    handler, url = await stand_in(
+        web.json_response(
+            {"code": 429, "message": "Out of credits"},
+            status=429,
+            headers={"Retry-After": "0.2"},
+        ),
+        # Twelve Data also reports running out of credits in a 200.
+        web.json_response(
+            {"code": 429, "message": "Out of credits", "status": "error"},
+            headers={"Retry-After": "0.1"},
+        ),
+    )
+
+    async with make_client(url) as client:
+        assert await client.get(symbol="AAPL") == SERIES
+
+    (first, _), (second, _), (third, _) = handler.requests
+    assert second - first >= 0.2
+    assert third - second >= 0.1
+
+
+async def test_server_errors_are_retried_with_backoff(stand_in):
+    handler, url = await stand_in(
+        web.Response(status=503), web.Response(status=502)
+    )
+
+    async with make_client(url) as client:
+        assert await client.get(symbol="AAPL") == SERIES
+    assert len(handler.requests) == 3
+
+
+async def test_client_errors_are_not_retried(stand_in):
+    handler, url = await stand_in(
+        web.json_response(
+            {"code": 400, "message": "Invalid symbol", "status": "error"}
+        )
+    )
+
+    async with make_client(url) as client:
+        with pytest.raises(TwelveDataError, match="Invalid symbol") as error:
+            await client.get(symbol="NOPE")
+    assert error.value.status == 400
+    assert len(handler.requests) == 1
+
+
+async def test_timeouts_give_up_after_the_last_retry(stand_in):
+    handler, url = await stand_in(delay=0.5)
+
+    async with make_client(url, timeout=0.1, max_retries=2) as client:
+        with pytest.raises(TwelveDataError, match="Request failed"):
+            await client.get(symbol="AAPL")
+    assert len(handler.requests) == 3
+
+
+async def test_bucket_spends_credits_at_the_configured_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+
+    waits = [await bucket.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert time.monotonic() - started >= 0.09
+
+    bucket.pause(0.1)
+    assert await bucket.acquire() >= 0.09
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after("3") == 3.0
+    assert retry_after(None) is None
+    assert retry_after("soon") is None
+    assert retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -1,9 +1,16 @@
 import asyncio
+import hashlib
 import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
 from httpx import AsyncClient
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
+from uuid import uuid4
 
 from application.api.routers import stock_ingestion
+from infrastructure.database.models.ingestion_job import IngestionJob
+from infrastructure.storage import spool
 
 
 @pytest.mark.asyncio
@@ -24,14 +31,170 @@ async def test_ingest_stock_data_triggers_batch(
     monkeypatch.setattr(
         stock_ingestion, "BatchDataProcessor", FakeProcessor, raising=False
     )
+    job = SimpleNamespace(id=uuid4())
+    jobs = AsyncMock()
+    jobs.create_job.return_value = job
+    monkeypatch.setattr(
+        stock_ingestion, "IngestionJobRepository", lambda db: jobs
+    )
 
     # Call the ingestion endpoint
     response = await client.post("/api/ingestion", headers=auth_headers)
     assert response.status_code == 200
-    assert response.json() == {"message": "ETL process started in background"}
+    assert response.json() == {
+        "message": "ETL process started in background",
+        "job_id": str(job.id),
+    }
 
     await asyncio.sleep(0)
 
     processor = created.get("instance")
     assert processor is not None, "BatchDataProcessor was not instantiated"
-    processor.run_batch.assert_awaited_once_with(symbols)
+    processor.run_batch.assert_awaited_once_with(symbols, job.id)
+    jobs.create_job.assert_awaited_once_with("api", "twelvedata", 3)
+
+
+CSV = b"symbol,datetime,open,high,low,close,volume\nAAPL,2025-01-02,1,2,0.5,1.5,10\n"
+
+
+@pytest.mark.asyncio
+async def test_upload_is_spooled_and_referenced(
+    auth_headers, monkeypatch, tmp_path, client: AsyncClient
+):
+    """POST /api/stocks-data enqueues a spool file reference, not the CSV"""
+
+    monkeypatch.setattr(spool.settings, "ingestion_spool_dir", str(tmp_path))
+    job = SimpleNamespace(id=uuid4())
+    jobs = AsyncMock()
+    jobs.create_job.return_value = job
+    monkeypatch.setattr(
+        stock_ingestion, "IngestionJobRepository", lambda db: jobs
+    )
+    enqueued = []
+    monkeypatch.setattr(
+        stock_ingestion.process_stocks_data_file_task,
+        "delay",
+        lambda message, job_id: enqueued.append((message, job_id)),
+    )
+
+    response = await client.post(
+        "/api/stocks-data",
+        files={"file": ("prices.csv", CSV, "text/csv")},
+        data={"sha256": hashlib.sha256(CSV).hexdigest()},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    assert response.json()["job_id"] == str(job.id)
+    ((message, job_id),) = enqueued
+    assert job_id == str(job.id)
+    jobs.create_job.assert_awaited_once_with("csv", "prices.csv", len(CSV))
+    assert message["size"] == len(CSV)
+    assert (tmp_path / message["name"]).read_bytes() == CSV
+    assert "AAPL" not in str(message)
+
+    response = await client.post(
+        "/api/stocks-data",
+        files={"file": ("prices.csv", CSV, "text/csv")},
+        data={"sha256": "0" * 64},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert len(enqueued) == 1
+    assert [path.name for path in tmp_path.iterdir()] == [message["name"]]
+
+
+STARTED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_job(**values) -> IngestionJob:
+    return IngestionJob(
+        **{
+            "id": uuid4(),
+            "kind": "csv",
+            "source": "prices.csv",
+            "status": "succeeded",
+            "total": 100,
+            "processed": 100,
+            "parts_total": 2,
+            "parts_done": 2,
+            "parts_failed": 0,
+            "rows": 900,
+            "rows_parsed": 1000,
+            "rows_inserted": 600,
+            "rows_updated": 300,
+            "rows_rejected": 100,
+            "created": STARTED,
+            "started": STARTED,
+            "finished": STARTED + timedelta(seconds=4),
+            **values,
+        }
+    )
+
+
+class FakeJobRepository:
+    jobs = [make_job(), make_job(status="running", finished=None)]
+
+    def __init__(self, db):
+        pass
+
+    async def get_job(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        raise HTTPException(status_code=404, detail="No ingestion job found")
+
+    async def list_jobs(self, limit, state=None):
+        return [job for job in self.jobs if state in (None, job.status)][
+            :limit
+        ]
+
+
+@pytest.mark.asyncio
+async def test_job_status_reports_counts_and_throughput(
+    auth_headers, monkeypatch, client: AsyncClient
+):
+    monkeypatch.setattr(
+        stock_ingestion, "IngestionJobRepository", FakeJobRepository
+    )
+    job = FakeJobRepository.jobs[0]
+
+    response = await client.get(
+        f"/api/ingestion/jobs/{job.id}", headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "succeeded"
+    assert body["rows_inserted"] == 600 and body["rows_rejected"] == 100
+    assert body["duration_seconds"] == 4.0
+    assert body["rows_per_second"] == 225
+    assert body["percent"] == 100.0 and body["eta_seconds"] is None
+
+    response = await client.get(
+        f"/api/ingestion/jobs/{uuid4()}", headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_recent_jobs_filter_on_status(
+    auth_headers, monkeypatch, client: AsyncClient
+):
+    monkeypatch.setattr(
+        stock_ingestion, "IngestionJobRepository", FakeJobRepository
+    )
+
+    response = await client.get("/api/ingestion/jobs", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    response = await client.get(
+        "/api/ingestion/jobs",
+        params={"status": "running", "limit": 5},
+        headers=auth_headers,
+    )
+    assert [job["status"] for job in response.json()] == ["running"]
+
+    response = await client.get(
+        "/api/ingestion/jobs", params={"limit": 0}, headers=auth_headers
+    )
+    assert response.status_code == 422
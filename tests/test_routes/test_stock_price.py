@@ -1,17 +1,34 @@
+import json
+from contextlib import asynccontextmanager
+
+import numpy as np
 import pytest
 import uuid
+from collections import namedtuple
 from datetime import datetime
 from fastapi import HTTPException
 from httpx import AsyncClient
 from pytest_mock import MockerFixture
 from starlette import status
 
-from application.api.schemas.stock_price import StockPrice, StockPriceCreate
+from application.api.responses import read_columnar
+from application.api.schemas.stock_price import (
+    Candle,
+    StockPrice,
+    StockPriceCreate,
+)
+from infrastructure.cache.snapshot import latest_quotes
+from infrastructure.database.price_writer import UpsertResult
 from infrastructure.database.repositories.stock_price_repository import (
     StockPriceRepository,
 )
 
 
+Freshness = namedtuple(
+    "Freshness", "version history_version last_modified last_ingested"
+)
+
+
 class StockPriceRepositoryPrepopulated(StockPriceRepository):
     def __init__(self, _=None):
         super().__init__(db=None)
@@ -41,19 +58,76 @@ class StockPriceRepositoryPrepopulated(StockPriceRepository):
         ]
 
     async def get_stock_prices(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, after=None
     ) -> list[StockPrice]:
+        if after is not None:
+            return [
+                p for p in self._prices if (p.ticker, p.timestamp) > after
+            ][:limit]
         return self._prices[skip : skip + limit]
 
     async def get_stock_prices_by_date_range(
-        self, start: datetime | None = None, end: datetime | None = None
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int | None = None,
+        after=None,
+        tickers: list[str] | None = None,
+        descending: bool = False,
     ) -> list[StockPrice]:
         return [
             p
             for p in self._prices
             if (start is None or p.timestamp >= start)
             and (end is None or p.timestamp <= end)
-        ]
+            and (after is None or (p.ticker, p.timestamp) > after)
+            and (not tickers or p.ticker in tickers)
+        ][:limit]
+
+    async def stream_stock_prices(self, tickers=None, **filters):
+        yield [p for p in self._prices if not tickers or p.ticker in tickers]
+
+    async def get_stock_price_columns(self, ticker: str, after=None):
+        matches = [p for p in self._prices if p.ticker == ticker]
+        return {
+            "timestamp": np.array(
+                [int(p.timestamp.timestamp() * 1e6) for p in matches]
+            ),
+            "open": np.array([p.open for p in matches]),
+            "high": np.array([p.high for p in matches]),
+            "low": np.array([p.low for p in matches]),
+            "close": np.array([p.close for p in matches]),
+            "volume": np.array([p.volume for p in matches], dtype=float),
+        }
+
+    async def get_candles(self, ticker, interval, start=None, end=None):
+        matches = [p for p in self._prices if p.ticker == ticker]
+        return [Candle(**p.model_dump(exclude={"id"})) for p in matches]
+
+    async def get_freshness(self, tickers):
+        matches = [p for p in self._prices if p.ticker in tickers]
+        if not matches:
+            return Freshness(None, None, None, None)
+        return Freshness(
+            version=len(matches),
+            history_version=0,
+            last_modified=max(p.timestamp for p in matches),
+            last_ingested=max(p.timestamp for p in self._prices),
+        )
+
+    async def get_stock_prices_batch(
+        self,
+        tickers,
+        ids=None,
+        start=None,
+        end=None,
+        limit=1000,
+        descending=False,
+    ):
+        return [p for p in self._prices if p.ticker in tickers or p.id in ids]
+
+    async def get_latest_prices(self, tickers):
+        return [p for p in self._prices if p.ticker in tickers]
 
     async def get_stock_price_by_id(
         self, stock_price_id: uuid.UUID
@@ -67,9 +141,13 @@ class StockPriceRepositoryPrepopulated(StockPriceRepository):
         )
 
     async def get_stock_prices_by_ticker(
-        self, ticker: str
+        self, ticker: str, limit: int | None = None, after=None
     ) -> list[StockPrice]:
-        matches = [p for p in self._prices if p.ticker == ticker]
+        matches = [
+            p
+            for p in self._prices
+            if p.ticker == ticker and (after is None or p.timestamp > after)
+        ][:limit]
         if not matches:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -85,6 +163,26 @@ class StockPriceRepositoryPrepopulated(StockPriceRepository):
         self._prices.append(new)
         return new
 
+    async def upsert_stock_prices(self, bars: list[dict]) -> UpsertResult:
+        result = UpsertResult()
+        for bar in bars:
+            new = StockPrice(id=uuid.uuid4(), **bar)
+            existing = [
+                i
+                for i, p in enumerate(self._prices)
+                if (p.ticker, p.timestamp.replace(tzinfo=None))
+                == (new.ticker, new.timestamp.replace(tzinfo=None))
+            ]
+            if existing:
+                new.id = self._prices[existing[0]].id
+                self._prices[existing[0]] = new
+                result.updated += 1
+            else:
+                self._prices.append(new)
+                result.inserted += 1
+            result.ids.append(new.id)
+        return result
+
     async def delete_stock_price(self, stock_price_id: uuid.UUID) -> bool:
         for idx, p in enumerate(self._prices):
             if p.id == stock_price_id:
@@ -187,6 +285,24 @@ async def test_get_prices_by_date_range_no_match(
     assert data == []
 
 
+@pytest.mark.asyncio
+async def test_get_prices_by_date_range_for_ticker(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/search?ticker=... only returns the requested tickers"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/search?ticker=TSLA,MSFT&order=desc", headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["ticker"] for p in data] == ["TSLA"]
+
+
 @pytest.mark.asyncio
 async def test_pagination_skip(
     auth_headers, mocker: MockerFixture, client: AsyncClient
@@ -253,3 +369,364 @@ async def test_get_invalid_uuid_returns_422(
     )
     response = await client.get("/api/stock/not-a-uuid", headers=auth_headers)
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_follows_next_link(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/prices walks pages through the opaque cursor"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/prices?limit=1", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["ticker"] == "AAPL"
+    assert 'rel="next"' in response.headers["link"]
+
+    cursor = response.headers["x-next-cursor"]
+    response = await client.get(
+        f"/api/stock/prices?limit=1&cursor={cursor}", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["ticker"] == "TSLA"
+    assert "link" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_returns_400(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/prices with a garbled cursor returns 400"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/prices?cursor=not-a-cursor", headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@asynccontextmanager
+async def fake_db_session(request=None):
+    yield None
+
+
+@pytest.mark.asyncio
+async def test_stream_ticker_as_ndjson(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker} streams NDJSON when asked for it"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    mocker.patch(
+        "application.api.routers.stock_price.async_db_session",
+        fake_db_session,
+    )
+    headers = {**auth_headers, "Accept": "application/x-ndjson"}
+    response = await client.get("/api/stock/ticker/AAPL", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["ticker"] for line in lines] == ["AAPL"]
+
+
+@pytest.mark.asyncio
+async def test_stream_search_as_csv(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/search streams CSV with a header row"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    mocker.patch(
+        "application.api.routers.stock_price.async_db_session",
+        fake_db_session,
+    )
+    headers = {**auth_headers, "Accept": "text/csv"}
+    response = await client.get("/api/stock/search", headers=headers)
+    assert response.status_code == 200
+    rows = response.text.splitlines()
+    assert rows[0] == "id,ticker,timestamp,open,high,low,close,volume"
+    assert len(rows) == 3
+
+
+@pytest.mark.asyncio
+async def test_ticker_as_columnar_binary(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker} packs columns when asked for them"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    headers = {
+        **auth_headers,
+        "Accept": "application/vnd.market-data.columns",
+    }
+    response = await client.get("/api/stock/ticker/TSLA", headers=headers)
+    assert response.status_code == 200
+
+    ticker, columns = read_columnar(response.content)
+    assert ticker == "TSLA"
+    assert columns["timestamp"].dtype == np.int64
+    assert columns["close"].tolist() == [205.0]
+
+
+@pytest.mark.asyncio
+async def test_json_rows_match_schema_serialization(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """Directly serialized rows are identical to the Pydantic output"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get("/api/stock/ticker/AAPL", headers=auth_headers)
+    assert response.status_code == 200
+    expected = StockPriceRepositoryPrepopulated()._prices[0]
+    assert response.json() == [expected.model_dump(mode="json")]
+
+
+@pytest.mark.asyncio
+async def test_candles_for_ticker(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker}/candles returns aggregated bars"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/ticker/AAPL/candles?interval=5m", headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["close"] == 105.0
+
+
+@pytest.mark.asyncio
+async def test_candles_reject_unknown_interval(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker}/candles validates the interval"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/ticker/AAPL/candles?interval=7m", headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_returns_304(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker} honours If-None-Match"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get("/api/stock/ticker/AAPL", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = await client.get(
+        "/api/stock/ticker/AAPL",
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_historical_range_is_cached_long(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """A /search range closed before the last ingested day is immutable"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    mocker.patch.object(
+        StockPriceRepositoryPrepopulated,
+        "get_freshness",
+        return_value=Freshness(
+            version=1,
+            history_version=0,
+            last_modified=datetime(2024, 12, 31),
+            last_ingested=datetime(2025, 1, 1, 12, 0),
+        ),
+    )
+    response = await client.get(
+        "/api/stock/search?ticker=AAPL&end=2024-12-31T23:59:59",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("private,")
+    assert "immutable" in response.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_latest_prices_are_served_from_snapshot(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/latest queries only tickers missing from memory"""
+
+    latest_quotes.discard("AAPL", "TSLA")
+    repository = mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    spy = mocker.spy(repository, "get_latest_prices")
+
+    for _ in range(2):
+        response = await client.get(
+            "/api/stock/latest?ticker=TSLA,AAPL", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [bar["ticker"] for bar in response.json()] == ["AAPL", "TSLA"]
+        assert "id" not in response.json()[0]
+    assert spy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_groups_prices_by_ticker(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """POST /api/stock/batch answers several tickers and ids at once"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.post(
+        "/api/stock/batch",
+        json={"tickers": ["AAPL", "MSFT"], "ids": [str(uuid.UUID(int=2))]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["MSFT"] == []
+    assert [p["close"] for p in data["AAPL"]] == [105.0]
+    assert [p["id"] for p in data["TSLA"]] == [str(uuid.UUID(int=2))]
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_tickers_or_ids(
+    auth_headers, client: AsyncClient
+):
+    """POST /api/stock/batch rejects an empty query"""
+
+    response = await client.post(
+        "/api/stock/batch", json={}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_indicators_for_ticker(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """GET /api/stock/ticker/{ticker}/indicators returns computed series"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    response = await client.get(
+        "/api/stock/ticker/AAPL/indicators?indicator=vwap,sma:2"
+        "&indicator=sma:2",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data) == ["ticker", "timestamp", "vwap", "sma_2"]
+    assert data["timestamp"] == ["2025-01-01T12:00:00Z"]
+    assert data["sma_2"] == [None]
+    assert data["vwap"] == [pytest.approx(305.0 / 3)]
+
+    response = await client.get(
+        "/api/stock/ticker/AAPL/indicators?indicator=macd",
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_ndjson(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """POST /api/stock/bulk reports inserted, updated and rejected bars"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    bar = {"open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 10}
+    lines = [
+        {"ticker": "AAPL", "timestamp": "2025-01-01T12:00:00Z", **bar},
+        {"ticker": "MSFT", "timestamp": "2025-01-01T12:00:00Z", **bar},
+        {"ticker": "MSFT", "timestamp": "2025-01-01", **bar, "low": 3},
+    ]
+    response = await client.post(
+        "/api/stock/bulk?return_ids=true",
+        content=b"\n".join(json.dumps(line).encode() for line in lines),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["inserted"], data["updated"], data["rejected"]) == (1, 1, 1)
+    assert data["ids"][0] == str(uuid.UUID(int=1))
+    assert data["rejections"] == [
+        {"index": 2, "reason": "low cannot exceed high"}
+    ]
+
+    response = await client.post(
+        "/api/stock/bulk", json={"ticker": "AAPL"}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_without_valid_bars(
+    auth_headers, mocker: MockerFixture, client: AsyncClient
+):
+    """POST /api/stock/bulk rejects every bar of an all-invalid body"""
+
+    mocker.patch(
+        "application.api.routers.stock_price.StockPriceRepository",
+        StockPriceRepositoryPrepopulated,
+    )
+    for body in ([{}], [1, 2], [{"ticker": 5, "timestamp": "2025-01-01"}]):
+        response = await client.post(
+            "/api/stock/bulk", json=body, headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["inserted"], data["rejected"]) == (0, len(body))
+        assert {item["reason"] for item in data["rejections"]} == {
+            "ticker must be a string"
+        }
@@ -0,0 +1,167 @@
+import pytest
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from domain.stock_data import stock_data_ingestion
+from domain.stock_data.stock_data_ingestion import BatchDataProcessor
+from infrastructure.cache.snapshot import LatestBar, latest_quotes
+from infrastructure.database.price_writer import UpsertResult
+from infrastructure.market_data.twelve_data import TwelveDataError
+
+
+class RecordingJobs:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        async def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return record
+
+
+@pytest.mark.asyncio
+async def test_batch_records_each_symbol_on_the_job(monkeypatch):
+    jobs = RecordingJobs()
+
+    async def fake_update_job(update):
+        return await update(jobs)
+
+    async def fake_process(self, symbol, bulk):
+        if symbol == "MSFT":
+            raise RuntimeError("rate limited")
+        return {"rows": 3, "rows_inserted": 3}
+
+    monkeypatch.setattr(stock_data_ingestion, "update_job", fake_update_job)
+    monkeypatch.setattr(BatchDataProcessor, "process_data", fake_process)
+    job_id = uuid4()
+
+    failed = await BatchDataProcessor().run_batch(
+        ["AAPL", "MSFT", "AAPL"], job_id
+    )
+
+    assert failed == 1
+
+    start, *parts, finish = jobs.calls
+    assert start == ("start_job", (job_id, 2, 2), {})
+    assert sorted(parts, key=str) == [
+        ("record_part", (job_id, 1), {"error": "MSFT: rate limited"}),
+        ("record_part", (job_id, 1, {"rows": 3, "rows_inserted": 3}), {}),
+    ]
+    assert finish == ("finish_job", (job_id,), {})
+
+
+class FakeClient:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def get(self, **params):
+        return {
+            "values": [
+                {
+                    "datetime": "2020-01-02",
+                    "open": "1",
+                    "high": "2",
+                    "low": "0.5",
+                    "close": "1.5",
+                    "volume": "10",
+                }
+            ]
+        }
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+
+async def fake_get_db():
+    yield FakeSession()
+
+
+stored = LatestBar("AAPL", datetime(2025, 1, 3), 1, 2, 0.5, 1.5, 10)
+
+
+class FakeRepository:
+    def __init__(self, session):
+        pass
+
+    async def get_latest_prices(self, tickers):
+        return [stored]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    monkeypatch.setattr(stock_data_ingestion, "async_get_db", fake_get_db)
+    monkeypatch.setattr(
+        stock_data_ingestion, "StockPriceRepository", FakeRepository
+    )
+
+
+@pytest.mark.asyncio
+async def test_backfill_does_not_become_the_latest_quote(monkeypatch, fake_db):
+    async def fake_upsert(session, rows, overwrite, returning):
+        return UpsertResult()
+
+    monkeypatch.setattr(stock_data_ingestion, "upsert_prices", fake_upsert)
+
+    await BatchDataProcessor(client=FakeClient()).process_data("AAPL")
+
+    # The snapshot holds the newest stored bar, not the 2020 batch.
+    (bar,), _ = latest_quotes.get_many(["AAPL"])
+    assert bar.timestamp == datetime(2025, 1, 3, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "symbols, copied", [(["AAPL"], 0), (["AAPL", "MSFT"], 2)]
+)
+async def test_large_batch_goes_through_copy(
+    monkeypatch, fake_db, symbols, copied
+):
+    loaded = []
+
+    async def fake_copy(session, rows, overwrite):
+        loaded.append(list(rows))
+        return UpsertResult(inserted=1)
+
+    async def fake_upsert(session, rows, overwrite, returning):
+        return UpsertResult(inserted=1)
+
+    monkeypatch.setattr(stock_data_ingestion, "copy_prices", fake_copy)
+    monkeypatch.setattr(stock_data_ingestion, "upsert_prices", fake_upsert)
+    monkeypatch.setattr(
+        stock_data_ingestion.settings,
+        "copy_load_min_rows",
+        2 * stock_data_ingestion.OUTPUT_SIZE,
+    )
+
+    await BatchDataProcessor(client=FakeClient()).run_batch(symbols)
+
+    # Each symbol fetches a single bar, but two symbols make a batch large
+    # enough to go through COPY.
+    assert len(loaded) == copied
+    assert all(len(rows) == 1 for rows in loaded)
+
+
+@pytest.mark.asyncio
+async def test_untracked_batch_survives_a_failing_symbol(monkeypatch):
+    processed = []
+
+    async def fake_process(self, symbol, bulk):
+        if symbol == "MSFT":
+            raise TwelveDataError("Unknown symbol", 404)
+        processed.append(symbol)
+        return {"rows": 3}
+
+    monkeypatch.setattr(BatchDataProcessor, "process_data", fake_process)
+
+    failed = await BatchDataProcessor(client=FakeClient()).run_batch(
+        ["AAPL", "MSFT", "NVDA"]
+    )
+
+    assert failed == 1
+    assert sorted(processed) == ["AAPL", "NVDA"]
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from domain.stock_data.bulk import validate_bars
+
+
+BAR = {"open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 10}
+
+
+def test_valid_bars_are_normalised():
+    bars, rejected = validate_bars(
+        [{"ticker": " AAPL ", "timestamp": "2025-01-01T09:30:00-05:00", **BAR}]
+    )
+
+    assert rejected == []
+    assert bars == [
+        {
+            "ticker": "AAPL",
+            "timestamp": datetime(2025, 1, 1, 14, 30, tzinfo=timezone.utc),
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "volume": 10.0,
+        }
+    ]
+
+
+def test_rejections_name_the_first_problem():
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    records = [
+        "not a bar",
+        {"ticker": "AAPL", "timestamp": "yesterday", **BAR},
+        {"ticker": "AAPL", "timestamp": future.isoformat(), **BAR},
+        {"ticker": "AAPL", "timestamp": "2025-01-01", **BAR, "close": "x"},
+        {"ticker": "AAPL", "timestamp": "2025-01-01", **BAR, "volume": -1},
+        {"ticker": "AAPL", "timestamp": "2025-01-02", **BAR},
+        {"ticker": "AAPL", "timestamp": "2025-01-02T00:00:00Z", **BAR},
+    ]
+
+    bars, rejected = validate_bars(records)
+
+    assert len(bars) == 1
+    assert [r["index"] for r in rejected] == [0, 1, 2, 3, 4, 5]
+    assert rejected[3]["reason"] == "close must be a number"
+    assert rejected[5]["reason"].startswith("superseded")